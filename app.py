@@ -1,12 +1,12 @@
 from __future__ import annotations
 
-import os, sys, traceback, secrets, json, hashlib, math
+import os, sys, time, traceback, secrets, json, hashlib, math
 from datetime import datetime as _dt
 from urllib.parse import urlparse, urljoin
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 from sqlalchemy import inspect as db_inspect, func as _func
 from flask import (Flask, render_template, redirect, url_for,
-                   flash, request, jsonify, session)
+                   flash, request, jsonify, session, Response, stream_with_context)
 from flask_login import (LoginManager, login_user, login_required,
                          logout_user, current_user)
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -34,7 +34,9 @@ except ImportError:
 try:
     from backend.dynamic_trainer import train_and_predict_dynamic
     from backend.model_manager   import get_suggestion_metrics
-    from backend.data_manager    import get_processed_data, FEATURE_GROUPS
+    from backend.data_manager    import (get_processed_data, get_quotes, get_quote,
+                                         close_on, data_version, retry_status,
+                                         FEATURE_GROUPS)
     print("[app] Backend modules loaded OK")
 except ImportError as e:
     print(f"[app] Backend import error: {e}")
@@ -42,8 +44,38 @@ except ImportError as e:
     def train_and_predict_dynamic(*a, **kw): return None, None
     def get_suggestion_metrics(*a, **kw):    return None
     def get_processed_data(*a, **kw):        return None
+    def get_quotes(*a, **kw):                return {}
+    def get_quote(*a, **kw):                 return None
+    def close_on(*a, **kw):                  return None
+    def data_version(*a, **kw):              return None
+    def retry_status(*a, **kw):              return {}
     FEATURE_GROUPS = {}
 
+try:
+    from backend.warmup import start as start_warmup, warmup_status
+except ImportError as e:
+    print(f"[app] Warm-up import error: {e}")
+    def start_warmup(*a, **kw): return None
+    def warmup_status():        return {}
+
+try:
+    from backend.model_registry import registry_status
+except ImportError as e:
+    print(f"[app] Model registry import error: {e}")
+    def registry_status(): return {}
+
+try:
+    from backend.job_queue import (submit as submit_job, get as get_job, watch as watch_job,
+                                   job_status, JobError, JobRejected)
+except ImportError as e:
+    print(f"[app] Job queue import error: {e}")
+    class JobError(Exception): pass
+    class JobRejected(Exception): status = 503
+    def submit_job(*a, **kw): raise JobRejected("Prediction queue is unavailable.")
+    def get_job(*a, **kw):    return None
+    def watch_job(*a, **kw):  return iter(())
+    def job_status():         return {}
+
 try:
     from backend.backtester import run_backtest
     print("[app] Backtester module loaded OK")
@@ -239,11 +271,15 @@ def ping():
 @limiter.limit("30 per minute")
 def api_cache_status():
     try:
-        from backend.data_manager import cache_status
+        from backend.data_manager import cache_status, cache_stats
         status = cache_status()
         return jsonify({
             "cache": status,
             "total_cached": len(status),
+            "stats": cache_stats(),
+            "warmup": warmup_status(),
+            "registry": registry_status(),
+            "jobs": job_status(),
             "market_open": _market_open_check(),
         })
     except Exception as e:
@@ -276,27 +312,20 @@ def api_refresh():
     if not expected or not secrets.compare_digest(secret, expected):
         return jsonify({"error": "unauthorized"}), 401
 
-    results = {"refreshed": [], "failed": [], "skipped": []}
+    results = {"refreshed": [], "failed": [], "skipped": [], "timings": {}}
 
     try:
-        from backend.data_manager import get_processed_data, cache_clear
-        cache_clear()
-
-        for ticker in TICKERS_TO_TRAIN[:10]:
-            try:
-                df = get_processed_data(ticker, force_refresh=True)
-                if df is not None:
-                    results["refreshed"].append(ticker)
-                    print(f"[refresh] {ticker}: OK, last: {df.index[-1].date()}")
-                else:
-                    results["failed"].append(ticker)
-            except Exception as e:
-                print(f"[refresh] {ticker}: ERROR: {e}")
-                results["failed"].append(ticker)
-
-        results["skipped"] = TICKERS_TO_TRAIN[10:]
+        from backend.data_manager import refresh_universe
+        t0 = time.perf_counter()
+
+        # Whole universe: batched upstream calls, per-ticker fallback inside
+        report = refresh_universe(list(TICKERS_TO_TRAIN))
+        for ticker, info in report.items():
+            results["refreshed" if info["ok"] else "failed"].append(ticker)
+        results["timings"]   = report
+        results["total_sec"] = round(time.perf_counter() - t0, 2)
         print(f"[refresh] Completed: {len(results['refreshed'])} OK, "
-              f"{len(results['failed'])} failed")
+              f"{len(results['failed'])} failed in {results['total_sec']}s")
 
     except Exception as e:
         print(f"[refresh] ERROR: {e}"); traceback.print_exc()
@@ -305,7 +334,30 @@ def api_refresh():
     return jsonify(results)
 
 
+def _refresh_pending(ticker: str):
+    """
+    503 + Retry-After when the upstream fetch for ticker failed and a
+    background retry is scheduled; None otherwise (caller keeps its own error).
+    """
+    retry = retry_status().get(ticker)
+    if not retry or retry["retry_in_sec"] is None:
+        return None
+    resp = jsonify({
+        "error":   "Market data refresh pending. Please try again shortly.",
+        "status":  "refresh_pending",
+        "retry_in_sec": retry["retry_in_sec"],
+    })
+    resp.headers["Retry-After"] = str(max(1, int(retry["retry_in_sec"] + 0.5)))
+    return resp, 503
+
+
 def _market_open_check():
+    try:
+        # Holiday/half-day aware calendar shared with the data cache
+        from backend.market_calendar import market_open
+        return market_open(_dt.utcnow())
+    except Exception:
+        pass
     try:
         from zoneinfo import ZoneInfo
         from datetime import datetime as dt
@@ -484,10 +536,11 @@ def admin_panel():
                         .order_by(_func.count(Prediction.id).desc())
                         .limit(10).all())
         try:
-            from backend.data_manager import cache_status
-            cache_info = cache_status()
+            from backend.data_manager import cache_status, cache_stats
+            cache_info  = cache_status()
+            cache_stats = cache_stats()
         except Exception:
-            cache_info = {}
+            cache_info, cache_stats = {}, {}
     except Exception as e:
         traceback.print_exc()
         return f"<pre>Admin panel error: {e}</pre>", 500
@@ -496,7 +549,8 @@ def admin_panel():
         user_count=user_count, pred_count=pred_count,
         revenue=round(float(revenue), 2), token_sales=int(token_sales),
         preds_today=preds_today, recent_preds=recent_preds,
-        top_users=top_users, cache_info=cache_info)
+        top_users=top_users, cache_info=cache_info,
+        cache_stats=cache_stats, registry=registry_status())
 
 
 # ══════════════════════════════════════════════════════════════════════════
@@ -509,18 +563,16 @@ def admin_panel():
 @csrf.exempt
 def api_market_summary():
     result = []
-    for t in TICKERS_TO_TRAIN[:12]:
-        try:
-            df = get_processed_data(t)
-            if df is not None and not df.empty:
-                cur  = float(df["Close"].iloc[-1])
-                prev = float(df["Close"].iloc[-2])
-                chg  = ((cur - prev) / prev) * 100
-                result.append({"ticker": t, "price": round(cur, 2),
-                                "change": round(chg, 2),
-                                "trend": "up" if chg >= 0 else "down"})
-        except Exception as e:
-            print(f"[market_summary] {t}: {e}")
+    try:
+        quotes = get_quotes(TICKERS_TO_TRAIN[:12])
+    except Exception as e:
+        print(f"[market_summary] {e}")
+        quotes = {}
+    for t, q in quotes.items():
+        chg = q["change_pct"]
+        result.append({"ticker": t, "price": round(q["price"], 2),
+                        "change": round(chg, 2),
+                        "trend": "up" if chg >= 0 else "down"})
     return jsonify(result)
 
 
@@ -533,9 +585,9 @@ def api_history(ticker):
     if ticker not in VALID_TICKERS:
         return jsonify({"error": "Invalid ticker"}), 400
     try:
-        df = get_processed_data(ticker)
+        df = get_processed_data(ticker, groups=[])
         if df is None or df.empty:
-            return jsonify({"error": "Data could not be retrieved"}), 404
+            return _refresh_pending(ticker) or (jsonify({"error": "Data could not be retrieved"}), 404)
         r = df.tail(100)
         return jsonify({
             "dates":  [d.strftime("%Y-%m-%d") for d in r.index],
@@ -591,6 +643,7 @@ def api_compare():
 
 VALID_MODELS = {"LINEAR","RANDOM_FOREST","EXTRA_TREES","GRADIENT_BOOST",
                 "XGBOOST","LIGHTGBM","LSTM"}
+VALID_FORECAST_MODES = {"recursive", "direct"}
 
 # ── Stripe ─────────────────────────────────────────────────────────────────
 TOKEN_PACKS = {
@@ -640,6 +693,7 @@ def api_predict_run():
     model    = str(payload.get("model",  "LINEAR")).upper().strip()
     features = payload.get("features", [])
     horizon  = int(payload.get("horizon", 14))
+    mode     = str(payload.get("mode", "recursive")).lower().strip()
 
     # Input validation
     if ticker not in VALID_TICKERS:
@@ -653,46 +707,126 @@ def api_predict_run():
         return jsonify({"error": f"Invalid feature group(s): {invalid_feats}"}), 400
     if horizon not in {7, 14, 30, 90}:
         return jsonify({"error": "Invalid horizon. Must be 7, 14, 30, or 90."}), 400
+    if mode not in VALID_FORECAST_MODES:
+        return jsonify({"error": "Invalid mode. Must be recursive or direct."}), 400
 
     w = get_wallet()
     if w.balance <= 0:
         return jsonify({"error": "Insufficient balance"}), 402
 
-    print(f"[predict_run] {ticker} | {model} | {len(features)} feature | {horizon}d")
+    print(f"[predict_run] {ticker} | {model} | {len(features)} feature | {horizon}d | {mode}")
 
+    # Training runs on the job queue's process pool; the client polls
+    # /api/jobs/<id> (or listens on /stream) and gets the chart from there.
+    params = {"ticker": ticker, "model": model, "features": features,
+              "horizon": horizon, "mode": mode}
     try:
-        preds, chart_data = train_and_predict_dynamic(ticker, model, features, horizon)
-    except Exception as e:
-        print(f"[predict_run] EXCEPTION: {e}"); traceback.print_exc()
-        return jsonify({"error": f"Model exception: {str(e)[:300]}"}), 500
+        job = submit_job(current_user.id, params,
+                         on_done=_predict_job_done(current_user.id, ticker, model))
+    except JobRejected as e:
+        resp = jsonify({"error": str(e)})
+        if e.status == 503:
+            resp.headers["Retry-After"] = "10"
+        return resp, e.status
 
-    if not preds:
-        return jsonify({
-            "error": (
+    return jsonify({
+        "status":     "queued",
+        "job_id":     job["id"],
+        "status_url": url_for("api_job_status", job_id=job["id"]),
+        "stream_url": url_for("api_job_stream", job_id=job["id"]),
+    }), 202
+
+
+def _predict_job_done(user_id: int, ticker: str, model: str):
+    """
+    Completion hook for a predict_run job, called in this process once the
+    pool returns. The token is only debited here, i.e. after a successful run;
+    the conditional UPDATE keeps two jobs finishing together from overdrawing.
+    """
+    def on_done(preds, chart_data):
+        if not preds:
+            raise JobError(
                 "Prediction failed. "
                 "Suggestion: Choose the LINEAR model and fewer features, "
                 "or try a different stock."
             )
-        }), 500
+        price = round(float(preds[-1]), 2)
+        with app.app_context():
+            try:
+                debited = Wallet.query.filter(
+                    Wallet.user_id == user_id, Wallet.balance > 0
+                ).update({Wallet.balance: Wallet.balance - 1,
+                          Wallet.last_updated: __import__("datetime").datetime.utcnow()},
+                         synchronize_session=False)
+                if not debited:
+                    db.session.rollback()
+                    raise JobError("Insufficient balance")
+                db.session.add(Prediction(
+                    user_id=user_id, symbol=ticker, model_type=model,
+                    predicted_result=f"${price}"
+                ))
+                db.session.commit()
+            except JobError:
+                raise
+            except Exception as e:
+                db.session.rollback()
+                print(f"[predict_run] DB record error: {e}")
+                raise JobError("Prediction could not be recorded. No token was charged.")
+            balance = Wallet.query.filter_by(user_id=user_id).first().balance
+        return {
+            "status":     "success",
+            "balance":    balance,
+            "prediction": price,
+            "chart_data": chart_data,
+        }
+    return on_done
 
-    w.balance -= 1
-    w.last_updated = __import__("datetime").datetime.utcnow()
-    try:
-        db.session.add(Prediction(
-            user_id=current_user.id, symbol=ticker, model_type=model,
-            predicted_result=f"${round(float(preds[-1]), 2)}"
-        ))
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"[predict_run] DB record error: {e}")
 
-    return jsonify({
-        "status":     "success",
-        "balance":    w.balance,
-        "prediction": round(float(preds[-1]), 2),
-        "chart_data": chart_data,
-    })
+def _public_job(rec: dict) -> dict:
+    return {k: rec.get(k) for k in ("id", "state", "stage", "progress", "params",
+                                    "result", "error")}
+
+
+def _owned_job(job_id: str):
+    job = get_job(job_id)
+    if not job or job.get("owner") != current_user.id:
+        return None
+    return _public_job(job)
+
+
+@app.route("/api/jobs/<job_id>")
+@login_required
+@limiter.limit("120 per minute")
+def api_job_status(job_id):
+    job = _owned_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/jobs/<job_id>/stream")
+@login_required
+@limiter.limit("30 per minute")
+def api_job_stream(job_id):
+    """
+    Server-sent events: one event per progress change, named after the job
+    state (queued/running/done/error). Each connection is capped so a sync
+    worker is never held for a whole training run; EventSource reconnects
+    after the advertised retry interval and resumes from the current state.
+    """
+    if _owned_job(job_id) is None:
+        return jsonify({"error": "Job not found"}), 404
+    owner = current_user.id
+
+    def events():
+        yield "retry: 1000\n\n"
+        for rec in watch_job(job_id):
+            if rec.get("owner") != owner:
+                return
+            yield f"event: {rec['state']}\ndata: {json.dumps(_public_job(rec))}\n\n"
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 # ── Sentiment API ──────────────────────────────────────────────────────────
@@ -764,70 +898,85 @@ def _safe_float(value, default=None):
         return default
 
 
+# Snapshots are pure functions of the data, so they are reused for as long
+# as the ticker's data version is unchanged. {ticker: (version, snapshot)}
+_SNAPSHOT_CACHE: dict = {}
+
+
 def _technical_snapshot(ticker: str) -> dict | None:
     """Small deterministic analysis layer used by the AI insight endpoints."""
     try:
-        df = get_processed_data(ticker)
+        df = get_processed_data(ticker, groups=[])
         if df is None or df.empty or "Close" not in df.columns:
             return None
 
-        df = df.dropna(subset=["Close"]).copy()
-        if len(df) < 30:
-            return None
-
-        closes = df["Close"].astype(float)
-        current = float(closes.iloc[-1])
-        prev = float(closes.iloc[-2]) if len(closes) > 1 else current
-        change_1d = ((current - prev) / prev * 100) if prev else 0.0
-        change_20d = ((current - closes.iloc[-21]) / closes.iloc[-21] * 100) if len(closes) > 21 and closes.iloc[-21] else 0.0
-        change_60d = ((current - closes.iloc[-61]) / closes.iloc[-61] * 100) if len(closes) > 61 and closes.iloc[-61] else change_20d
-
-        sma20 = float(closes.tail(20).mean())
-        sma50 = float(closes.tail(50).mean()) if len(closes) >= 50 else sma20
-        vol20 = float(closes.pct_change().tail(20).std() * (252 ** 0.5) * 100)
-        if not math.isfinite(vol20):
-            vol20 = 0.0
-
-        diffs = closes.diff().dropna().tail(14)
-        gains = diffs.clip(lower=0).mean()
-        losses = (-diffs.clip(upper=0)).mean()
-        rs = gains / losses if losses else 99.0
-        rsi = 100 - (100 / (1 + rs))
-        if not math.isfinite(float(rsi)):
-            rsi = 50.0
-
-        if current > sma20 > sma50:
-            trend = "bullish"
-        elif current < sma20 < sma50:
-            trend = "bearish"
-        else:
-            trend = "mixed"
-
-        if rsi >= 70:
-            rsi_state = "overbought"
-        elif rsi <= 30:
-            rsi_state = "oversold"
-        else:
-            rsi_state = "neutral"
-
-        return {
-            "ticker": ticker,
-            "price": round(current, 4),
-            "change_1d": round(change_1d, 2),
-            "change_20d": round(change_20d, 2),
-            "change_60d": round(change_60d, 2),
-            "sma20": round(sma20, 4),
-            "sma50": round(sma50, 4),
-            "rsi": round(float(rsi), 2),
-            "rsi_state": rsi_state,
-            "trend": trend,
-            "volatility": round(vol20, 2),
-        }
+        version = data_version(ticker, df)
+        cached = _SNAPSHOT_CACHE.get(ticker)
+        if version and cached and cached[0] == version:
+            return cached[1]
+        snap = _build_snapshot(ticker, df)
+        if version and snap:
+            _SNAPSHOT_CACHE[ticker] = (version, snap)
+        return snap
     except Exception as e:
         print(f"[ai snapshot] {ticker}: {e}")
         return None
 
 
+def _build_snapshot(ticker: str, df) -> dict | None:
+    closes = df["Close"].dropna().astype(float)
+    if len(closes) < 30:
+        return None
+
+    current = float(closes.iloc[-1])
+    prev = float(closes.iloc[-2]) if len(closes) > 1 else current
+    change_1d = ((current - prev) / prev * 100) if prev else 0.0
+    change_20d = ((current - closes.iloc[-21]) / closes.iloc[-21] * 100) if len(closes) > 21 and closes.iloc[-21] else 0.0
+    change_60d = ((current - closes.iloc[-61]) / closes.iloc[-61] * 100) if len(closes) > 61 and closes.iloc[-61] else change_20d
+
+    sma20 = float(closes.tail(20).mean())
+    sma50 = float(closes.tail(50).mean()) if len(closes) >= 50 else sma20
+    vol20 = float(closes.pct_change().tail(20).std() * (252 ** 0.5) * 100)
+    if not math.isfinite(vol20):
+        vol20 = 0.0
+
+    diffs = closes.diff().dropna().tail(14)
+    gains = diffs.clip(lower=0).mean()
+    losses = (-diffs.clip(upper=0)).mean()
+    rs = gains / losses if losses else 99.0
+    rsi = 100 - (100 / (1 + rs))
+    if not math.isfinite(float(rsi)):
+        rsi = 50.0
+
+    if current > sma20 > sma50:
+        trend = "bullish"
+    elif current < sma20 < sma50:
+        trend = "bearish"
+    else:
+        trend = "mixed"
+
+    if rsi >= 70:
+        rsi_state = "overbought"
+    elif rsi <= 30:
+        rsi_state = "oversold"
+    else:
+        rsi_state = "neutral"
+
+    return {
+        "ticker": ticker,
+        "price": round(current, 4),
+        "change_1d": round(change_1d, 2),
+        "change_20d": round(change_20d, 2),
+        "change_60d": round(change_60d, 2),
+        "sma20": round(sma20, 4),
+        "sma50": round(sma50, 4),
+        "rsi": round(float(rsi), 2),
+        "rsi_state": rsi_state,
+        "trend": trend,
+        "volatility": round(vol20, 2),
+    }
+
+
 def _risk_level(snapshot: dict, expected_return: float | None = None) -> str:
     score = 0
     if snapshot.get("volatility", 0) >= 55:
@@ -1117,7 +1266,7 @@ def api_ohlc(ticker):
     try:
         import numpy as np
 
-        df = get_processed_data(ticker)
+        df = get_processed_data(ticker, groups=[])
         if df is None or df.empty:
             return jsonify({"error": "No data"}), 422
 
@@ -1208,18 +1357,15 @@ def api_ohlc(ticker):
 def api_watchlist_get():
     items = Watchlist.query.filter_by(user_id=current_user.id)\
                     .order_by(Watchlist.added_at.desc()).all()
+    try:
+        quotes = get_quotes([item.symbol for item in items])
+    except Exception:
+        quotes = {}
     result = []
     for item in items:
-        try:
-            df = get_processed_data(item.symbol)
-            price = change = None
-            if df is not None and not df.empty:
-                cur   = float(df["Close"].iloc[-1])
-                prev  = float(df["Close"].iloc[-2])
-                price  = round(cur, 2)
-                change = round(((cur - prev) / prev) * 100, 2)
-        except Exception:
-            price = change = None
+        q = quotes.get(item.symbol)
+        price  = round(q["price"], 2) if q else None
+        change = round(q["change_pct"], 2) if q else None
         result.append({
             "symbol":   item.symbol,
             "added_at": item.added_at.strftime("%Y-%m-%d"),
@@ -1406,15 +1552,11 @@ def api_alerts_check():
         return jsonify({"checked": 0, "triggered": 0})
 
     # Fetch prices by symbol once
-    price_cache: dict[str, float] = {}
-    for alert in active_alerts:
-        if alert.symbol not in price_cache:
-            try:
-                df = get_processed_data(alert.symbol)
-                if df is not None and not df.empty:
-                    price_cache[alert.symbol] = float(df["Close"].iloc[-1])
-            except Exception:
-                pass
+    try:
+        quotes = get_quotes([alert.symbol for alert in active_alerts])
+    except Exception:
+        quotes = {}
+    price_cache: dict[str, float] = {s: q["price"] for s, q in quotes.items()}
 
     triggered_count = 0
     for alert in active_alerts:
@@ -1497,15 +1639,15 @@ def api_paper_portfolio():
 
     pos_data = []
     total_market_value = 0.0
+    try:
+        quotes = get_quotes([pos.symbol for pos in positions if pos.quantity > 0])
+    except Exception:
+        quotes = {}
 
     for pos in positions:
         if pos.quantity <= 0:
             continue
-        try:
-            df = get_processed_data(pos.symbol)
-            cur_price = float(df["Close"].iloc[-1]) if df is not None and not df.empty else None
-        except Exception:
-            cur_price = None
+        cur_price = quotes[pos.symbol]["price"] if pos.symbol in quotes else None
 
         market_val = round(pos.quantity * cur_price, 2) if cur_price else None
         cost_basis = round(pos.quantity * pos.avg_cost, 2)
@@ -1565,10 +1707,10 @@ def api_paper_trade():
 
     # Get current price
     try:
-        df = get_processed_data(symbol)
-        if df is None or df.empty:
+        quote = get_quote(symbol)
+        if quote is None:
             return jsonify({"error": "Price data could not be retrieved."}), 422
-        cur_price = float(df["Close"].iloc[-1])
+        cur_price = quote["price"]
     except Exception:
         return jsonify({"error": "Price data could not be retrieved."}), 422
 
@@ -1708,7 +1850,7 @@ def api_correlation():
     returns_map: dict[str, np.ndarray] = {}
     for ticker in tickers:
         try:
-            df = get_processed_data(ticker)
+            df = get_processed_data(ticker, groups=[])
             if df is None or df.empty:
                 continue
             closes = df["Close"].tail(days + 1).values.astype(float)
@@ -1769,16 +1911,11 @@ def api_accuracy_update():
 
     for pred in preds:
         try:
-            df = get_processed_data(pred.symbol)
-            if df is None or df.empty:
-                continue
-
-            target_date = pred.created_at + timedelta(days=14)
-            future_rows = df[df.index >= target_date]
-            if future_rows.empty:
+            target_date  = pred.created_at + timedelta(days=14)
+            actual_price = close_on(pred.symbol, target_date)
+            if actual_price is None:
                 continue
 
-            actual_price = float(future_rows["Close"].iloc[0])
             if not pred.predicted_result:
                 continue
 
@@ -2295,7 +2432,7 @@ def api_backtest_run():
         return jsonify({"error": "Backtest engine error. Try refreshing market data or selecting another ticker."}), 500
 
     if result is None:
-        return jsonify({"error": "Insufficient market data for this ticker. Try another ticker or refresh the data cache."}), 422
+        return _refresh_pending(ticker) or (jsonify({"error": "Insufficient market data for this ticker. Try another ticker or refresh the data cache."}), 422)
 
     return jsonify(result)
 
@@ -2381,18 +2518,18 @@ def apiv1_price(ticker):
     if ticker not in VALID_TICKERS:
         return jsonify({"error": "Unknown ticker."}), 404
     try:
-        df = get_processed_data(ticker)
-        if df is None or df.empty:
+        quote = get_quote(ticker)
+        if quote is None:
             return jsonify({"error": "No data available."}), 422
-        price  = round(float(df["Close"].iloc[-1]), 4)
-        prev   = round(float(df["Close"].iloc[-2]), 4)
+        price  = round(quote["price"], 4)
+        prev   = round(quote["prev_close"], 4)
         change = round((price - prev) / prev * 100, 4)
         return jsonify({
             "ticker":    ticker,
             "price":     price,
             "prev_close": prev,
             "change_pct": change,
-            "date":      df.index[-1].strftime("%Y-%m-%d"),
+            "date":      quote["date"],
         })
     except Exception:
         return jsonify({"error": "Data unavailable."}), 500
@@ -2409,7 +2546,7 @@ def apiv1_ohlc(ticker):
         return jsonify({"error": "Unknown ticker."}), 404
     days = min(int(request.args.get("days", 30)), 365)
     try:
-        df = get_processed_data(ticker)
+        df = get_processed_data(ticker, groups=[])
         if df is None or df.empty:
             return jsonify({"error": "No data available."}), 422
         df = df.tail(days).dropna(subset=["Open","High","Low","Close"])
@@ -2469,17 +2606,20 @@ def apiv1_sentiment(ticker):
 @_api_auth_required
 def apiv1_predict(ticker):
     """
-    GET /api/v1/predict/<ticker>?model=LINEAR&horizon=14
+    GET /api/v1/predict/<ticker>?model=LINEAR&horizon=14&mode=recursive
     Returns ML prediction spending 1 token.
     """
     ticker  = ticker.upper()
     model   = request.args.get("model", "LINEAR").upper()
     horizon = int(request.args.get("horizon", 14))
+    mode    = request.args.get("mode", "recursive").lower()
 
     if ticker not in VALID_TICKERS:
         return jsonify({"error": "Unknown ticker."}), 404
     if horizon not in (7, 14, 30, 90):
         return jsonify({"error": "horizon must be 7, 14, 30 or 90."}), 400
+    if mode not in VALID_FORECAST_MODES:
+        return jsonify({"error": "mode must be recursive or direct."}), 400
 
     user_id = request.api_user_id
     user    = db.session.get(User, user_id)
@@ -2489,7 +2629,7 @@ def apiv1_predict(ticker):
 
     try:
         result, _ = train_and_predict_dynamic(
-            ticker, model, list(VALID_FEATURE_GROUPS), horizon=horizon
+            ticker, model, list(VALID_FEATURE_GROUPS), horizon=horizon, mode=mode
         )
         if result is None:
             return jsonify({"error": "Prediction failed."}), 422
@@ -2543,5 +2683,32 @@ def unhandled(e):
     return "<h3>Unexpected error. Please try again.</h3>", 500
 
 
+# ── Cache warm-up ─────────────────────────────────────────────────────────
+def _warmup_priority() -> list:
+    """Most-predicted tickers first, then the rest of the training universe."""
+    try:
+        with app.app_context():
+            rows = (db.session.query(Prediction.symbol, _func.count(Prediction.id))
+                    .group_by(Prediction.symbol)
+                    .order_by(_func.count(Prediction.id).desc()).all())
+    except Exception as e:
+        print(f"[warmup] priority query failed: {e}")
+        rows = []
+    ranked = [sym for sym, _ in rows if sym in VALID_TICKERS]
+    return ranked + [t for t in TICKERS_TO_TRAIN if t not in ranked]
+
+
+def start_background_tasks():
+    """
+    Restores snapshots in the background; requests are served meanwhile
+    (FINTAP_WARMUP=0 disables it, e.g. in tests). Called from the server
+    entry points (gunicorn.conf.py, run.py, __main__ below), never on import:
+    job-queue processes re-import this module and must not warm the cache.
+    """
+    start_warmup(_warmup_priority)
+
+
 if __name__ == "__main__":
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":   # reloader child only
+        start_background_tasks()
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -5,9 +5,15 @@ import pandas as pd
 from typing import Optional
 
 try:
-    from .data_manager import get_processed_data
+    from .data_manager import get_processed_data, data_version
 except ImportError:
-    from data_manager import get_processed_data
+    from data_manager import get_processed_data, data_version
+
+
+# Sonuçlar veri sürümüyle anahtarlanır: veri değişmedikçe aynı parametreli
+# backtest yeniden simüle edilmez. {(ticker, sürüm, parametreler): sonuç}
+_RESULT_CACHE: dict = {}
+_RESULT_CACHE_MAX = 64
 
 
 # ──────────────────────────────────────────────────────────────────────────────
@@ -19,7 +25,7 @@ def _compute_signal(df: pd.DataFrame, idx: int) -> str:
     if len(window) < 15:
         return "neutral"
 
-    closes = window["Close"].values.astype(float)
+    closes = window["Close"].to_numpy(dtype=float)
 
     diffs  = np.diff(closes[-15:])
     gains  = np.where(diffs > 0, diffs, 0.0)
@@ -54,12 +60,34 @@ def run_backtest(
     allow_short: bool = False,
 ) -> Optional[dict]:
 
-    df = get_processed_data(ticker)
+    df = get_processed_data(ticker, groups=[])     # yalnızca OHLCV tabanı gerekir
     if df is None or df.empty:
         return None
 
+    key = (ticker, data_version(ticker, df), horizon, lookback_days,
+           float(start_capital), bool(allow_short))
+    if key in _RESULT_CACHE:
+        return _RESULT_CACHE[key]
+
+    result = _simulate(ticker, df, horizon, lookback_days, start_capital, allow_short)
+    for k in [k for k in _RESULT_CACHE if k[0] == ticker and k[1] != key[1]]:
+        del _RESULT_CACHE[k]          # eski veri sürümünün sonuçları artık geçersiz
+    if len(_RESULT_CACHE) >= _RESULT_CACHE_MAX:
+        del _RESULT_CACHE[next(iter(_RESULT_CACHE))]
+    _RESULT_CACHE[key] = result
+    return result
+
+
+def _simulate(
+    ticker: str,
+    df: pd.DataFrame,
+    horizon: int,
+    lookback_days: int,
+    start_capital: float,
+    allow_short: bool,
+) -> Optional[dict]:
     # Test için yeterli geçmiş veri olması gerekiyor
-    df = df.tail(lookback_days + horizon + 60).copy()
+    df = df.tail(lookback_days + horizon + 60)
     required_cols = [c for c in ("Close", "High", "Low", "Volume") if c in df.columns]
     if "Close" not in required_cols:
         return None
@@ -68,7 +96,7 @@ def run_backtest(
     if len(df) < horizon * 3:
         return None
 
-    closes = df["Close"].values.astype(float)
+    closes = df["Close"].to_numpy(dtype=float)
     dates  = [d.strftime("%Y-%m-%d") for d in df.index]
     n      = len(closes)
 
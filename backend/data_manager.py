@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 import warnings; warnings.filterwarnings("ignore")
-import time, traceback
+import os, pickle, random, time, threading, traceback, zlib
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import (Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeout, FIRST_COMPLETED, wait)
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -10,35 +14,98 @@ import numpy as np
 import requests
 import yfinance as yf
 
+try:
+    from . import indicators as ind
+    from . import market_calendar as cal
+except ImportError:
+    import indicators as ind
+    import market_calendar as cal
+
+try:
+    import fcntl; HAS_FCNTL = True     # Windows'ta yok → süreçler arası kilit devre dışı
+except ImportError:
+    HAS_FCNTL = False
+
 # ── IN-MEMORY CACHE ──────────────────────────────────────────────────────────
-_MEM_CACHE: dict = {}   # {ticker: {"df": DataFrame, "at": datetime}}
+_MEM_CACHE: dict = {}   # {ticker: {"df", "state", "at", "bytes", "used"}}
 
+# Bellek bütçesi: yerel çerçevelerin toplam boyutu (memory_usage(deep=True))
+# aşılınca en uzun süredir kullanılmayan ticker'lar atılır (LRU). Disk deposu
+# ve paylaşımlı katman etkilenmez; atılan ticker sonraki istekte oradan döner.
+_CACHE_BUDGET = int(float(os.environ.get("FINTAP_CACHE_MB", 128)) * 1024 * 1024)
+_CACHE_LOCK = threading.Lock()
+_CACHE_STATS = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0}
 
-def _market_open() -> bool:
-    try:
-        from zoneinfo import ZoneInfo
-        now_et = datetime.now(tz=ZoneInfo("America/New_York"))
-        if now_et.weekday() >= 5:       # hafta sonu
-            return False
-        t = now_et.hour * 60 + now_et.minute
-        return 570 <= t < 960           # 09:30 = 570 dk, 16:00 = 960 dk
-    except Exception:
-        # zoneinfo yoksa (Python < 3.9) UTC fallback
-        now = datetime.utcnow()
-        if now.weekday() >= 5:
-            return False
-        return 14 <= now.hour < 21      # 09:30–16:00 EST ≈ 14:30–21:00 UTC
+# ── SON BAR FİYAT TABLOSU ────────────────────────────────────────────────────
+# Her yenilemede (_install) ticker başına tek satır güncellenir: son/önceki
+# kapanış, değişim, tarih ve veri sürümü. Fiyat okuyan endpoint'ler tüm
+# feature çerçevesine dokunmadan get_quotes() ile toplu okur. Kapanış geçmişi
+# ayrıca küçük bir dizi çifti olarak tutulur (close_on: belirli tarihteki fiyat).
+_QUOTES: dict = {}       # {ticker: {"price", "prev_close", "change", "change_pct", "date", "version", "expires"}}
+_CLOSE_HIST: dict = {}   # {ticker: (datetime64[ns] dizisi, float64 kapanışlar)}
+_QUOTE_LOCK = threading.Lock()
+
+# ── SINGLE-FLIGHT ────────────────────────────────────────────────────────────
+# TTL dolduğunda aynı ticker için gelen eşzamanlı istekler tek bir yenilemede
+# birleşir: ilk çağıran indirir, diğerleri eski çerçeveyi hemen alır ya da
+# (eski çerçeve yoksa) aynı sonucu bekler.
+_INFLIGHT: dict = {}        # {ticker: Future}
+_INFLIGHT_LOCK = threading.Lock()
+_INFLIGHT_WAIT = 120        # takipçinin en fazla bekleme süresi (s) — gunicorn timeout
+
+# ── STALE-WHILE-REVALIDATE ───────────────────────────────────────────────────
+# TTL'i geçmiş ama grace penceresindeki kayıt beklemeden döndürülür; yenileme
+# sınırlı bir arka plan havuzunda yapılır ve sonuç cache'e atomik olarak yazılır.
+_SWR_GRACE = int(os.environ.get("FINTAP_SWR_GRACE", 6 * 3600))   # TTL sonrası (s)
+_REFRESH_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("FINTAP_REFRESH_WORKERS", 2)),
+    thread_name_prefix="data-refresh",
+)
+_REFRESH_TIMES: dict = {}   # {ticker: son yenileme süresi (s)}
+
+# ── KALICI OHLCV DEPOSU ──────────────────────────────────────────────────────
+# Her ticker için ham günlük barlar diskte tutulur; yenilemede yalnızca son
+# bardan sonraki kuyruk indirilip eklenir. Yeniden başlayan bir worker taze
+# depodan ağa hiç çıkmadan veri sunabilir.
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DATA_DIR = os.environ.get("FINTAP_DATA_DIR") or os.path.join(_BASE_DIR, "data")
+_STORE_OVERLAP_DAYS = 10   # revizyon (temettü düzeltmesi) tespiti için tekrar çekilen gün
 
+# ── SÜREÇLER ARASI PAYLAŞIMLI CACHE ──────────────────────────────────────────
+# Gunicorn worker'ları feature çerçevelerini data/shared altındaki bellek
+# eşlemeli (.npy) matrislerden okur; sayfa önbelleği tüm süreçlerce paylaşılır.
+# Bir ticker'ı aynı anda yalnızca kilidi tutan tek süreç yeniler.
+_SHARED_CACHE = os.environ.get("FINTAP_SHARED_CACHE", "1") != "0"
 
-def _ttl() -> int:
-    return 3600 if _market_open() else 6 * 3600
+# ── KOMPAKT SAKLAMA ──────────────────────────────────────────────────────────
+# Açıksa feature sütunları tek, bitişik bir float32 matriste tutulur (bellek
+# ~yarıya iner); fiyat/hacim ve hedef sütunları hassasiyet için float64 kalır.
+# Tüketiciler feature_values() ile kopyasız NumPy görünümleri alır.
+_COMPACT = os.environ.get("FINTAP_COMPACT_FEATURES", "0") == "1"
+_WIDE_COLS = ["target_lr", "Close", "High", "Low", "Volume"]
+
+
+def _expiry(ticker: str, at: datetime) -> datetime:
+    """
+    at'te alınmış veri, bir sonraki barın oluşabileceği ana kadar tazedir:
+    hisselerde NYSE kapanışı (+ yerleşme payı, tatil/yarım gün takvimli),
+    kriptoda UTC gün dönümü ya da saatlik kısmi bar yenilemesi.
+    """
+    return cal.next_bar_at(ticker, at)
 
 
 def cache_clear(ticker: str | None = None):
-    if ticker:
-        _MEM_CACHE.pop(ticker, None)
-    else:
-        _MEM_CACHE.clear()
+    with _CACHE_LOCK:
+        if ticker:
+            _MEM_CACHE.pop(ticker, None)
+        else:
+            _MEM_CACHE.clear()
+    with _QUOTE_LOCK:
+        if ticker:
+            _QUOTES.pop(ticker, None); _CLOSE_HIST.pop(ticker, None)
+        else:
+            _QUOTES.clear(); _CLOSE_HIST.clear()
+    _shared_clear(ticker)
     print(f"[cache] {'Tümü' if not ticker else ticker} temizlendi")
 
 
@@ -48,13 +115,59 @@ def cache_status() -> dict:
         t: {
             "age_min":   round((now - e["at"]).total_seconds() / 60, 1),
             "rows":      len(e["df"]),
-            "fresh":     (now - e["at"]).total_seconds() < _ttl(),
+            "fresh":     now < _expiry(t, e["at"]),
+            "expires_in_min": round((_expiry(t, e["at"]) - now).total_seconds() / 60, 1),
             "last_date": str(e["df"].index[-1].date()),
+            "revalidating": t in _INFLIGHT,
+            "refresh_sec":  _REFRESH_TIMES.get(t),
+            "bytes":        e.get("bytes", 0),
+            "version":      e.get("version"),
         }
-        for t, e in _MEM_CACHE.items()
+        for t, e in list(_MEM_CACHE.items())
     }
 
 
+def cache_stats() -> dict:
+    """Cache geneli sayaçlar: isabet/ıskalama/atılma ve toplam yerel boyut."""
+    with _CACHE_LOCK:
+        stats = dict(_CACHE_STATS)
+        stats["entries"] = len(_MEM_CACHE)
+        stats["resident_bytes"] = sum(e.get("bytes", 0) for e in _MEM_CACHE.values())
+    lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+    stats["budget_bytes"] = _CACHE_BUDGET
+    stats["hit_rate"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else None
+    stats["http"] = http_stats()
+    stats["sources"] = source_stats()
+    stats["retries"] = retry_status()
+    stats["limiter"] = limiter_stats()
+    return stats
+
+
+def _count(key: str):
+    with _CACHE_LOCK:
+        _CACHE_STATS[key] += 1
+
+
+def _frame_bytes(df: pd.DataFrame, state: Optional[dict]) -> int:
+    size = int(df.memory_usage(deep=True).sum())
+    for part in ("ewm", "raw"):
+        extra = (state or {}).get(part)
+        if isinstance(extra, pd.DataFrame):
+            size += int(extra.memory_usage(deep=True).sum())
+    return size
+
+
+def _evict(keep: str):
+    """Bütçe aşıldıysa LRU sırasıyla kayıt atar; yeni kurulan ticker korunur. Kilit altında çağrılır."""
+    total = sum(e.get("bytes", 0) for e in _MEM_CACHE.values())
+    while total > _CACHE_BUDGET and len(_MEM_CACHE) > 1:
+        victim = min((t for t in _MEM_CACHE if t != keep),
+                     key=lambda t: _MEM_CACHE[t].get("used", 0.0))
+        total -= _MEM_CACHE.pop(victim).get("bytes", 0)
+        _CACHE_STATS["evictions"] += 1
+        print(f"[cache] {victim} bellek bütçesi için atıldı ({total/2**20:.1f}/{_CACHE_BUDGET/2**20:.0f} MB)")
+
+
 # ── YARDIMCI ─────────────────────────────────────────────────────────────────
 _HDRS = {
     "User-Agent": (
@@ -64,26 +177,80 @@ _HDRS = {
     "Accept": "application/json,text/html,*/*",
 }
 
+# ── HTTP OTURUM HAVUZU ───────────────────────────────────────────────────────
+# Üç kaynak da keep-alive bağlantıları yeniden kullanan ortak oturumlarla
+# çalışır: v8/csv tek bir requests.Session (host başına sınırlı urllib3 havuzu),
+# yfinance ise tek bir curl_cffi oturumu (curl tutamaçlarını thread başına
+# kendisi tutar). Böylece evren yenilemesinde TLS el sıkışması bir kez ödenir.
+_HTTP_TIMEOUT = float(os.environ.get("FINTAP_HTTP_TIMEOUT", 20))   # s
+_HTTP_POOL    = int(os.environ.get("FINTAP_HTTP_POOL", 8))         # host başına bağlantı
+_HTTP_LOCK    = threading.RLock()
+_HTTP_SESSION: Optional[requests.Session] = None
+_YF_SESSION   = None
+_HTTP_STATS   = {"yf_sessions": 0, "yf_reused": 0}
 
-def _ewm(s: pd.Series, span: int) -> pd.Series:
-    return s.ewm(span=span, adjust=False, min_periods=1).mean()
 
+def _http_session() -> requests.Session:
+    """v8/csv için paylaşılan keep-alive oturumu."""
+    global _HTTP_SESSION
+    if _HTTP_SESSION is None:
+        with _HTTP_LOCK:
+            if _HTTP_SESSION is None:
+                from requests.adapters import HTTPAdapter
+                sess = requests.Session()
+                sess.headers.update(_HDRS)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=_HTTP_POOL, pool_block=True)
+                sess.mount("https://", adapter)
+                sess.mount("http://", adapter)
+                _HTTP_SESSION = sess
+    return _HTTP_SESSION
 
-# ── 3 KATMANLI İNDİRME ───────────────────────────────────────────────────────
-def _yf(ticker: str, start: str) -> Optional[pd.DataFrame]:
 
-    try:
-        # curl_cffi session — Yahoo Finance'ın bot engelini geçer
+def _yf_session():
+    """yfinance için paylaşılan, yeniden kullanılan oturum."""
+    global _YF_SESSION
+    with _HTTP_LOCK:
+        if _YF_SESSION is not None:
+            _HTTP_STATS["yf_reused"] += 1
+            return _YF_SESSION
         try:
+            # curl_cffi session — Yahoo Finance'ın bot engelini geçer
             from curl_cffi import requests as cffi_requests
-            sess = cffi_requests.Session(impersonate="chrome")
+            _YF_SESSION = cffi_requests.Session(impersonate="chrome", timeout=_HTTP_TIMEOUT)
         except Exception:
-            # curl_cffi yoksa normal requests session dene
-            sess = requests.Session()
-            sess.headers.update(_HDRS)
+            # curl_cffi yoksa paylaşılan requests oturumu
+            _YF_SESSION = _http_session()
+        _HTTP_STATS["yf_sessions"] += 1
+        return _YF_SESSION
 
-        t  = yf.Ticker(ticker, session=sess)
-        df = t.history(start=start, auto_adjust=True)
+
+def http_stats() -> dict:
+    """Açılan/yeniden kullanılan bağlantı sayaçları (urllib3 havuzlarından)."""
+    opened = requests_ = 0
+    sess = _HTTP_SESSION
+    if sess is not None:
+        for adapter in set(sess.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    opened    += pool.num_connections
+                    requests_ += pool.num_requests
+    return {
+        "connections_opened": opened,
+        "connections_reused": max(requests_ - opened, 0),
+        "timeout_sec": _HTTP_TIMEOUT,
+        "pool_per_host": _HTTP_POOL,
+        **_HTTP_STATS,
+    }
+
+
+# ── 3 KATMANLI İNDİRME ───────────────────────────────────────────────────────
+def _yf(ticker: str, start: str) -> Optional[pd.DataFrame]:
+
+    try:
+        t  = yf.Ticker(ticker, session=_yf_session())
+        df = t.history(start=start, auto_adjust=True, timeout=_HTTP_TIMEOUT)
 
         if df is not None and not df.empty:
             df.columns = df.columns.str.lower()
@@ -98,10 +265,10 @@ def _v8(ticker: str, start: str) -> Optional[pd.DataFrame]:
     try:
         s  = int(datetime.strptime(start, "%Y-%m-%d").timestamp())
         e  = int(datetime.utcnow().timestamp())
-        r  = requests.get(
+        r  = _http_session().get(
             f"https://query1.finance.yahoo.com/v8/finance/chart/{ticker}"
             f"?interval=1d&period1={s}&period2={e}",
-            headers=_HDRS, timeout=20)
+            timeout=_HTTP_TIMEOUT)
         r.raise_for_status()
         res = r.json().get("chart", {}).get("result", [])
         if not res:
@@ -118,7 +285,7 @@ def _v8(ticker: str, start: str) -> Optional[pd.DataFrame]:
         }, index=idx).dropna()
         if not df.empty:
             print(f"[data] {ticker}: v8 OK ({len(df)}r, son:{df.index[-1].date()})")
-        return df or None
+        return df if not df.empty else None
     except Exception as e:
         print(f"[data] {ticker}: v8 err: {e}")
     return None
@@ -128,10 +295,10 @@ def _csv(ticker: str, start: str) -> Optional[pd.DataFrame]:
     try:
         s = int(datetime.strptime(start, "%Y-%m-%d").timestamp())
         e = int(datetime.utcnow().timestamp())
-        r = requests.get(
+        r = _http_session().get(
             f"https://query1.finance.yahoo.com/v7/finance/download/{ticker}"
             f"?period1={s}&period2={e}&interval=1d&events=history",
-            headers=_HDRS, timeout=20)
+            timeout=_HTTP_TIMEOUT)
         r.raise_for_status()
         from io import StringIO
         df = pd.read_csv(StringIO(r.text))
@@ -143,25 +310,968 @@ def _csv(ticker: str, start: str) -> Optional[pd.DataFrame]:
         df = df[["open","high","low","close","volume"]].dropna()
         if not df.empty:
             print(f"[data] {ticker}: csv OK ({len(df)}r, son:{df.index[-1].date()})")
-        return df or None
+        return df if not df.empty else None
     except Exception as e:
         print(f"[data] {ticker}: csv err: {e}")
     return None
 
 
-def _download_raw(ticker: str, start: str) -> Optional[pd.DataFrame]:
-    for attempt in range(2):
-        for fn in (_yf, _v8, _csv):
-            df = fn(ticker, start)
-            if df is not None and len(df) > 50:
+# ── KAYNAK SAĞLIĞI ───────────────────────────────────────────────────────────
+# Her kaynak için başarı oranı ve gecikme (EWMA + son 100 çağrının yüzdelikleri)
+# tutulur; kaynaklar beklenen maliyete (gecikme / başarı) göre sıralanır. Üst
+# üste _BREAKER_FAILS kez başarısız olan kaynak _BREAKER_COOLDOWN boyunca atlanır,
+# süre dolunca bir deneme hakkı alır (yarı açık) — yine başarısızsa tekrar açılır.
+_SOURCE_ALPHA     = 0.3
+_BREAKER_FAILS    = int(os.environ.get("FINTAP_BREAKER_FAILS", 3))
+_BREAKER_COOLDOWN = int(os.environ.get("FINTAP_BREAKER_COOLDOWN", 300))   # s
+_SOURCE_LOCK      = threading.Lock()
+_SOURCE_HEALTH: dict = {}   # {kaynak: {"ok", "fail", "ewma_ms", "ewma_ok", "lat", "streak", "open_until"}}
+
+# ── HEDGE (YEDEKLİ) İNDİRME ──────────────────────────────────────────────────
+# FINTAP_HEDGE_DELAY > 0 ise en sağlıklı kaynak başlatılır; bu süre içinde
+# geçerli yanıt gelmezse (ya da kaynak hata verirse) sıradaki kaynak da paralel
+# başlatılır. İlk geçerli çerçeve kazanır, başlamamış olanlar iptal edilir.
+# Soğuk indirme gecikmesi en hızlı sağlıklı kaynakla sınırlanır; bedeli fazladan
+# upstream çağrısıdır.
+_HEDGE_DELAY = float(os.environ.get("FINTAP_HEDGE_DELAY", 0))    # s; 0 = kapalı
+_HEDGE_POOL  = ThreadPoolExecutor(max_workers=6, thread_name_prefix="data-hedge")
+
+# ── UPSTREAM HIZ SINIRI (TOKEN BUCKET) ───────────────────────────────────────
+# Yahoo'ya giden her istek (_yf/_v8/_csv, toplu indirmede sembol başına bir
+# jeton) süreç genelindeki kovadan jeton alır: saniyede _RATE_LIMIT jeton
+# dolar, en çok _RATE_BURST birikir. İki şerit vardır — "user" (istek
+# thread'i) ve "background" (SWR/yeniden deneme/toplu yenileme/ısınma);
+# bekleyen kullanıcı isteği varken arka plan jeton alamaz. Kovanın
+# kapasitesinden büyük talepler (toplu indirme) kovayı borçlandırır.
+_RATE_LIMIT = float(os.environ.get("FINTAP_YAHOO_RATE", 5))     # jeton/s; 0 = sınırsız
+_RATE_BURST = int(os.environ.get("FINTAP_YAHOO_BURST", 10))
+_LANES      = ("user", "background")
+_BUCKET     = {"tokens": float(_RATE_BURST), "at": time.monotonic()}
+_BUCKET_COND = threading.Condition()
+_LANE_WAITING = dict.fromkeys(_LANES, 0)
+_LANE_STATS = {l: {"acquired": 0, "waited": 0, "wait_sec": 0.0, "max_wait_sec": 0.0}
+               for l in _LANES}
+_LANE_TLS   = threading.local()
+
+
+def _sources() -> list:
+    return [("yfinance", _yf), ("v8", _v8), ("csv", _csv)]
+
+
+def _health(name: str) -> dict:
+    return _SOURCE_HEALTH.setdefault(name, {
+        "ok": 0, "fail": 0, "ewma_ms": None, "ewma_ok": 1.0,
+        "lat": deque(maxlen=100), "streak": 0, "open_until": 0.0,
+    })
+
+
+def _record_source(name: str, ok: bool, sec: float):
+    ms = sec * 1000
+    with _SOURCE_LOCK:
+        h = _health(name)
+        h["ok" if ok else "fail"] += 1
+        h["lat"].append(ms)
+        h["ewma_ms"] = ms if h["ewma_ms"] is None else \
+            _SOURCE_ALPHA * ms + (1 - _SOURCE_ALPHA) * h["ewma_ms"]
+        h["ewma_ok"] = _SOURCE_ALPHA * ok + (1 - _SOURCE_ALPHA) * h["ewma_ok"]
+        h["streak"] = 0 if ok else h["streak"] + 1
+        if h["streak"] >= _BREAKER_FAILS:
+            h["open_until"] = time.monotonic() + _BREAKER_COOLDOWN
+            print(f"[data] {name}: {h['streak']} ardışık hata, {_BREAKER_COOLDOWN}s devre dışı")
+
+
+def _ranked_sources(fallback: bool = True) -> list:
+    """Devresi kapalı kaynaklar, beklenen maliyete göre; hepsi açıksa (fallback) tümü sabit sırada."""
+    now = time.monotonic()
+    with _SOURCE_LOCK:
+        cost = {}
+        for name, _ in _sources():
+            h = _health(name)
+            if h["open_until"] <= now:
+                cost[name] = (h["ewma_ms"] or 0.0) / max(h["ewma_ok"], 0.05)
+    ranked = sorted((s for s in _sources() if s[0] in cost), key=lambda s: cost[s[0]])
+    return ranked or (_sources() if fallback else [])
+
+
+def source_stats() -> dict:
+    now = time.monotonic()
+    with _SOURCE_LOCK:
+        out = {}
+        for name, _ in _sources():
+            h = _health(name)
+            lat = np.array(h["lat"]) if h["lat"] else None
+            calls = h["ok"] + h["fail"]
+            out[name] = {
+                "calls":        calls,
+                "success_rate": round(h["ok"] / calls, 3) if calls else None,
+                "ewma_ms":      round(h["ewma_ms"], 1) if h["ewma_ms"] is not None else None,
+                "p50_ms":       round(float(np.percentile(lat, 50)), 1) if lat is not None else None,
+                "p95_ms":       round(float(np.percentile(lat, 95)), 1) if lat is not None else None,
+                "breaker":      "open" if h["open_until"] > now else "closed",
+                "retry_in_sec": max(round(h["open_until"] - now), 0),
+            }
+        return out
+
+
+@contextmanager
+def background_lane():
+    """Bu blokta (aynı thread'de) yapılan upstream istekleri arka plan şeridinden jeton alır."""
+    prev = getattr(_LANE_TLS, "lane", "user")
+    _LANE_TLS.lane = "background"
+    try:
+        yield
+    finally:
+        _LANE_TLS.lane = prev
+
+
+def _current_lane() -> str:
+    return getattr(_LANE_TLS, "lane", "user")
+
+
+def _acquire(n: int = 1, lane: Optional[str] = None) -> float:
+    """n jeton alınana kadar bekler; beklenen süreyi (s) döndürür."""
+    if _RATE_LIMIT <= 0:
+        return 0.0
+    lane = lane or _current_lane()
+    need = min(n, _RATE_BURST)
+    t0 = time.monotonic()
+    with _BUCKET_COND:
+        _LANE_WAITING[lane] += 1
+        try:
+            while True:
+                now = time.monotonic()
+                _BUCKET["tokens"] = min(_RATE_BURST,
+                                        _BUCKET["tokens"] + (now - _BUCKET["at"]) * _RATE_LIMIT)
+                _BUCKET["at"] = now
+                yields = lane == "background" and _LANE_WAITING["user"] > 0
+                if not yields and _BUCKET["tokens"] >= need:
+                    _BUCKET["tokens"] -= n
+                    break
+                deficit = need - _BUCKET["tokens"]
+                _BUCKET_COND.wait(deficit / _RATE_LIMIT if deficit > 0 and not yields else 0.05)
+        finally:
+            _LANE_WAITING[lane] -= 1
+            _BUCKET_COND.notify_all()
+        waited = time.monotonic() - t0
+        st = _LANE_STATS[lane]
+        st["acquired"] += n
+        if waited > 0.001:
+            st["waited"] += 1
+            st["wait_sec"] += waited
+            st["max_wait_sec"] = max(st["max_wait_sec"], waited)
+    return waited
+
+
+def limiter_stats() -> dict:
+    with _BUCKET_COND:
+        tokens = min(_RATE_BURST, _BUCKET["tokens"]
+                     + (time.monotonic() - _BUCKET["at"]) * _RATE_LIMIT)
+        return {
+            "rate":   _RATE_LIMIT,
+            "burst":  _RATE_BURST,
+            "tokens": round(tokens, 2),
+            "lanes": {
+                l: {
+                    "queued":       _LANE_WAITING[l],
+                    "acquired":     st["acquired"],
+                    "waited":       st["waited"],
+                    "avg_wait_ms":  round(st["wait_sec"] / st["waited"] * 1000, 1) if st["waited"] else 0.0,
+                    "max_wait_ms":  round(st["max_wait_sec"] * 1000, 1),
+                }
+                for l, st in _LANE_STATS.items()
+            },
+        }
+
+
+def _call_source(name: str, fn, ticker: str, start: str,
+                 lane: Optional[str] = None) -> Optional[pd.DataFrame]:
+    _acquire(1, lane)
+    t0 = time.perf_counter()
+    df = fn(ticker, start)
+    _record_source(name, df is not None, time.perf_counter() - t0)
+    return df
+
+
+def _download_hedged(ticker: str, start: str, min_rows: int) -> Optional[pd.DataFrame]:
+    queue, pending = _ranked_sources(), set()
+    lane = _current_lane()                 # hedge thread'leri çağıranın şeridini kullanır
+    while queue or pending:
+        if queue:
+            name, fn = queue.pop(0)
+            pending.add(_HEDGE_POOL.submit(_call_source, name, fn, ticker, start, lane))
+        done, pending = wait(pending, timeout=_HEDGE_DELAY if queue else None,
+                             return_when=FIRST_COMPLETED)
+        for f in done:
+            df = f.result()
+            if df is not None and len(df) >= min_rows:
+                for p in pending:
+                    p.cancel()        # çalışanlar biter, sonuçları yok sayılır
                 return df
-        if attempt == 0:
-            print(f"[data] {ticker}: tüm yöntemler başarısız, 2s bekleniyor...")
-            time.sleep(2)
     return None
 
 
+# ── VERİ SAĞLAYICILARI ───────────────────────────────────────────────────────
+# _download_raw etkin sağlayıcıya yönlenir (FINTAP_DATA_PROVIDER):
+#   yahoo     : yfinance → v8 → csv zinciri (varsayılan)
+#   replay    : data/replay/<TICKER>.csv|.parquet|.pkl, yoksa disk deposu — ağsız
+#   synthetic : ticker'a göre tohumlanmış deterministik GBM — ağsız, tekrarlanabilir
+# Sağlayıcı imzası: fn(ticker, start, min_rows) -> küçük harfli OHLCV DataFrame | None
+_PROVIDERS: dict = {}
+_DATA_PROVIDER = os.environ.get("FINTAP_DATA_PROVIDER", "yahoo").strip().lower()
+_REPLAY_DIR    = os.environ.get("FINTAP_REPLAY_DIR")        # varsayılan data/replay
+_SYNTH_SEED    = int(os.environ.get("FINTAP_SYNTHETIC_SEED", 0))
+_SYNTH_ORIGIN  = "2010-01-04"
+
+
+def register_provider(name: str, fn):
+    _PROVIDERS[name] = fn
+
+
+def set_provider(name: str):
+    """Etkin sağlayıcıyı değiştirir (benchmark/test); bilinmeyen ad ValueError."""
+    global _DATA_PROVIDER
+    if name not in _PROVIDERS:
+        raise ValueError(f"bilinmeyen veri sağlayıcı: {name} ({', '.join(_PROVIDERS)})")
+    _DATA_PROVIDER = name
+
+
+def provider_name() -> str:
+    return _DATA_PROVIDER if _DATA_PROVIDER in _PROVIDERS else "yahoo"
+
+
+def _download_raw(ticker: str, start: str, min_rows: int = 51) -> Optional[pd.DataFrame]:
+    return _PROVIDERS[provider_name()](ticker, start, min_rows)
+
+
+def _replay_provider(ticker: str, start: str, min_rows: int = 51) -> Optional[pd.DataFrame]:
+    d = _REPLAY_DIR or os.path.join(_DATA_DIR, "replay")
+    df = None
+    for ext, reader in ((".parquet", pd.read_parquet),
+                        (".csv", lambda p: pd.read_csv(p, index_col=0, parse_dates=True)),
+                        (".pkl", pd.read_pickle)):
+        path = os.path.join(d, f"{ticker}{ext}")
+        if os.path.exists(path):
+            try:
+                df = reader(path)
+            except Exception as e:
+                print(f"[replay] {ticker}: okuma hatası ({path}): {e}")
+            break
+    if df is None:
+        rec = _store_load(ticker)
+        df  = rec["raw"] if rec is not None else None
+    df = _normalize_raw(df) if df is not None else None
+    if df is None:
+        return None
+    df = df[df.index >= start]
+    if len(df) < min_rows:
+        return None
+    print(f"[data] {ticker}: replay OK ({len(df)}r, son:{df.index[-1].date()})")
+    return df
+
+
+def _synthetic_bars(ticker: str, end: pd.Timestamp) -> pd.DataFrame:
+    """
+    _SYNTH_ORIGIN'den end'e kadar deterministik GBM barları. Tohum ticker'ın
+    crc32'si olduğundan aynı ticker hep aynı yolu üretir; farklı start/end
+    ile yapılan çağrılar çakışan günlerde birebir aynı barları verir.
+    """
+    crypto = cal.is_crypto(ticker)
+    idx = (pd.date_range(_SYNTH_ORIGIN, end, freq="D") if crypto
+           else pd.bdate_range(_SYNTH_ORIGIN, end))
+    # Her seri kendi akışından çekilir → n büyüdükçe önceki günler değişmez
+    par, r_lr, r_gap, r_hi, r_lo, r_vol = (
+        np.random.default_rng(s) for s in
+        np.random.SeedSequence([zlib.crc32(ticker.encode()), _SYNTH_SEED]).spawn(6))
+    n   = len(idx)
+    dt  = 1 / (365 if crypto else 252)
+    vol = par.uniform(0.45, 0.9) if crypto else par.uniform(0.15, 0.5)
+    mu  = par.uniform(-0.05, 0.25)
+    p0  = float(np.exp(par.uniform(np.log(5), np.log(500))))
+    base = par.uniform(1e5, 5e7)
+
+    sig   = vol * np.sqrt(dt)
+    lr    = (mu - 0.5 * vol**2) * dt + sig * r_lr.standard_normal(n)
+    close = p0 * np.exp(np.cumsum(lr))
+    open_ = np.concatenate(([p0], close[:-1])) * np.exp(0.3 * sig * r_gap.standard_normal(n))
+    high  = np.maximum(open_, close) * (1 + sig * np.abs(r_hi.standard_normal(n)))
+    low   = np.minimum(open_, close) * (1 - sig * np.abs(r_lo.standard_normal(n)))
+    volume = np.round(base * np.exp(0.4 * r_vol.standard_normal(n) + 8 * np.abs(lr)))
+    return pd.DataFrame({"open": open_, "high": high, "low": low,
+                         "close": close, "volume": volume}, index=idx)
+
+
+def _synthetic_provider(ticker: str, start: str, min_rows: int = 51) -> Optional[pd.DataFrame]:
+    df = _synthetic_bars(ticker, pd.Timestamp(datetime.utcnow().date()))
+    df = df[df.index >= start]
+    return df if len(df) >= min_rows else None
+
+
+def _yahoo_provider(ticker: str, start: str, min_rows: int = 51) -> Optional[pd.DataFrame]:
+    """Kaynak zincirinden tek geçiş; tekrar denemeler arka planda planlanır (_schedule_retry)."""
+    if _HEDGE_DELAY > 0:
+        return _download_hedged(ticker, start, min_rows)
+    for name, fn in _ranked_sources():
+        df = _call_source(name, fn, ticker, start)
+        if df is not None and len(df) >= min_rows:
+            return df
+    print(f"[data] {ticker}: tüm yöntemler başarısız")
+    return None
+
+
+register_provider("yahoo", _yahoo_provider)
+register_provider("replay", _replay_provider)
+register_provider("synthetic", _synthetic_provider)
+
+
+# ── KALICI DEPO: OKU / YAZ / KUYRUK EKLE ─────────────────────────────────────
+def _bar_path(ticker: str) -> str:
+    return os.path.join(_DATA_DIR, "bars", f"{ticker.replace('-', '_')}.pkl")
+
+
+def _normalize_raw(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Kaynaktan bağımsız tek biçim: küçük harfli OHLCV, tz'siz günlük indeks."""
+    df = df.copy()
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    df = df.loc[:, ~df.columns.duplicated()]
+    if not {"open","high","low","close","volume"}.issubset(df.columns):
+        return None
+    df = df[["open","high","low","close","volume"]]
+    idx = pd.DatetimeIndex(df.index)
+    if idx.tz is not None:
+        idx = idx.tz_localize(None)
+    df.index = idx.normalize()
+    df = df[~df.index.duplicated(keep="last")].sort_index()
+    return df
+
+
+def _store_load(ticker: str) -> Optional[dict]:
+    """Depodaki kaydı döndürür: {"raw": DataFrame, "at": datetime, "start": str}."""
+    path = _bar_path(ticker)
+    if not os.path.exists(path):
+        return None
+    try:
+        rec = pd.read_pickle(path)
+        if rec.get("raw") is None or rec["raw"].empty:
+            return None
+        return rec
+    except Exception as e:
+        print(f"[store] {ticker}: okuma hatası: {e}")
+        return None
+
+
+def _store_save(ticker: str, raw: pd.DataFrame, at: datetime, start: str):
+    path = _bar_path(ticker)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        pd.to_pickle({"raw": raw, "at": at, "start": start}, tmp)
+        os.replace(tmp, path)   # atomik: okuyucular yarım dosya görmez
+    except Exception as e:
+        print(f"[store] {ticker}: yazma hatası: {e}")
+
+
+def _merge_tail(old: pd.DataFrame, tail: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """
+    Yeni kuyruğu eski barlara ekler. Saklanan son bar çoğu zaman gün içi
+    (kısmi) bardır — kripto saatlik yenilendiğinden hep öyledir — ve kuyruktaki
+    haliyle üzerine yazılır. Ondan önceki çakışan günlerde kapanış farklıysa
+    (temettü/bölünme sonrası geriye dönük düzeltme) None döner → tam indirme.
+    """
+    common = old.index.intersection(tail.index)
+    if len(common) == 0:
+        return None
+    settled = common[common < old.index[-1]]
+    if not np.allclose(old.loc[settled, "close"].values,
+                       tail.loc[settled, "close"].values, rtol=1e-6):
+        return None
+    return pd.concat([old[old.index < tail.index[0]], tail])
+
+
+def _fetch_raw(
+    ticker: str, start: str, stored: Optional[dict], prefetched: Optional[pd.DataFrame] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Depoda uyumlu geçmiş varsa yalnızca kuyruğu, yoksa tüm geçmişi indirir.
+    prefetched: toplu indirmeden gelen çerçeve; verilirse ilk indirmenin yerine geçer.
+    """
+    if stored is not None and stored.get("start", start) <= start:
+        old       = stored["raw"]
+        tail_from = (old.index[-1] - timedelta(days=_STORE_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        tail      = prefetched if prefetched is not None else \
+            _download_raw(ticker, tail_from, min_rows=1)
+        if tail is None:
+            return None
+        tail = _normalize_raw(tail)
+        if tail is not None and prefetched is not None:
+            tail = tail[tail.index >= tail_from]
+        merged = _merge_tail(old, tail) if tail is not None and not tail.empty else None
+        if merged is not None:
+            print(f"[store] {ticker}: +{len(merged)-len(old)} bar eklendi (kuyruk: {tail_from})")
+            return merged
+        print(f"[store] {ticker}: geçmiş revize edilmiş, tam indirme yapılıyor")
+    elif prefetched is not None and len(prefetched) >= 51:
+        return _normalize_raw(prefetched)
+
+    df_raw = _download_raw(ticker, start)
+    return _normalize_raw(df_raw) if df_raw is not None else None
+
+
+# ── PAYLAŞIMLI CACHE: YAYINLA / OKU / KİLİTLE ───────────────────────────────
+def _shared_dir() -> str:
+    return os.path.join(_DATA_DIR, "shared")
+
+
+def _shared_key(ticker: str) -> str:
+    return ticker.replace("-", "_")
+
+
+def _shared_publish(ticker: str, df: pd.DataFrame, state: Optional[dict], at: datetime):
+    """
+    Çerçeveyi diğer worker'lar için yayınlar: değerler (ve durumdaki ham
+    OHLCV) dtype bloğu başına nesil adlı .npy dosyalarına, sütun/indeks/EWM
+    durumu küçük bir meta dosyasına yazılır.
+    Meta en son değiştirilir; okuyucular hep tutarlı bir çift görür.
+    """
+    if not _SHARED_CACHE:
+        return
+    try:
+        d   = _shared_dir(); os.makedirs(d, exist_ok=True)
+        key = _shared_key(ticker)
+        gen = f"{key}.{int(time.time() * 1000)}_{os.getpid()}"
+        mats = _shared_write(d, gen, df)
+        raw  = None
+        if state and isinstance(state.get("raw"), pd.DataFrame):
+            # Ham OHLCV de eşlenir; meta'da her worker için pickle'lanmaz
+            raw   = (_shared_write(d, f"{gen}.raw", state["raw"]), state["raw"].index.values)
+            state = {k: v for k, v in state.items() if k != "raw"}
+
+        meta = {"at": at, "matrices": mats, "index": df.index.values,
+                "state": state, "raw": raw}
+        tmp = os.path.join(d, f"{key}.meta.{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            pickle.dump(meta, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, os.path.join(d, f"{key}.meta"))
+
+        # Eski nesiller: eşlemiş süreçler inode'u tutmaya devam eder (POSIX)
+        for f in os.listdir(d):
+            if f.startswith(f"{key}.") and f.endswith(".npy") and not f.startswith(f"{gen}."):
+                try:
+                    os.remove(os.path.join(d, f))
+                except OSError:
+                    pass
+    except Exception as e:
+        print(f"[shared] {ticker}: yayın hatası: {e}")
+
+
+def _shared_write(d: str, prefix: str, df: pd.DataFrame) -> list:
+    """Her dtype bloğunu atomik olarak {prefix}.{i}.npy'ye yazar: [(dosya, sütunlar)]."""
+    mats = []
+    for i, (cols, arr) in enumerate(_frame_blocks(df)):
+        mat = f"{prefix}.{i}.npy"
+        tmp = os.path.join(d, f"{mat}.tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(arr))
+        os.replace(tmp, os.path.join(d, mat))
+        mats.append((mat, cols))
+    return mats
+
+
+# pandas < 3'te concat varsayılan olarak kopyalar; 3+'ta (CoW) zaten tembel ve
+# copy anahtarı kullanımdan kalktı
+_NO_COPY = {} if int(pd.__version__.split(".")[0]) >= 3 else {"copy": False}
+
+
+def _shared_frame(d: str, mats: list, index) -> pd.DataFrame:
+    """Eşlenen bloklardan kopyasız DataFrame kurar; her blok kendi memmap'ini gösterir."""
+    index = pd.DatetimeIndex(index)
+    parts = [pd.DataFrame(np.load(os.path.join(d, mat), mmap_mode="c"),
+                          index=index, columns=cols, copy=False)
+             for mat, cols in mats]
+    return parts[0] if len(parts) == 1 else pd.concat(parts, axis=1, **_NO_COPY)
+
+
+def _shared_load(ticker: str) -> Optional[dict]:
+    """Yayınlanmış çerçeveyi kopyasız (memmap) DataFrame olarak döndürür."""
+    if not _SHARED_CACHE:
+        return None
+    d    = _shared_dir()
+    path = os.path.join(d, f"{_shared_key(ticker)}.meta")
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as fh:
+            meta = pickle.load(fh)
+        df    = _shared_frame(d, meta["matrices"], meta["index"])
+        state = meta["state"]
+        if meta.get("raw") is not None:
+            state = dict(state or {}, raw=_shared_frame(d, *meta["raw"]))
+        return {"df": df, "state": state, "at": meta["at"]}
+    except Exception as e:   # yarışta silinmiş nesil vb. → ıska
+        print(f"[shared] {ticker}: okuma hatası: {e}")
+        return None
+
+
+def _shared_clear(ticker: Optional[str] = None):
+    d = _shared_dir()
+    if not os.path.isdir(d):
+        return
+    prefix = f"{_shared_key(ticker)}." if ticker else ""
+    for f in os.listdir(d):
+        if f.startswith(prefix) and not f.endswith(".lock"):
+            try:
+                os.remove(os.path.join(d, f))
+            except OSError:
+                pass
+
+
+@contextmanager
+def _shared_lock(ticker: str):
+    """Ticker başına süreçler arası yazıcı kilidi (flock); alınamazsa kilitsiz devam."""
+    if not (_SHARED_CACHE and HAS_FCNTL):
+        yield
+        return
+    try:
+        os.makedirs(_shared_dir(), exist_ok=True)
+        fh = open(os.path.join(_shared_dir(), f"{_shared_key(ticker)}.lock"), "a+")
+    except OSError:
+        yield
+        return
+    locked   = False
+    deadline = time.time() + _INFLIGHT_WAIT
+    try:
+        while not locked:
+            try:
+                fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB); locked = True
+            except BlockingIOError:
+                if time.time() > deadline:
+                    print(f"[shared] {ticker}: kilit zaman aşımı, kilitsiz devam")
+                    break
+                time.sleep(0.1)
+        yield
+    finally:
+        if locked:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+        fh.close()
+
+
+# ── SNAPSHOT ─────────────────────────────────────────────────────────────────
+# Yeniden başlatma/deploy sonrası ısınma için bellekteki çerçeveler (durum ve
+# sürüm bilgisiyle) ticker başına bir pickle olarak yazılır. Geri yüklenen
+# kayıt kendi "at" zamanını korur; süresi geçmişse normal SWR/artımlı
+# yenileme yoluna girer. Değişmemiş kayıtlar tekrar yazılmaz.
+_SNAPSHOT_SAVED: dict = {}   # {ticker: (at, sürüm, sütun sayısı)}
+
+
+def snapshot_frames(directory: str) -> int:
+    """Bellekteki çerçeveleri dizine yazar; yazılan ticker sayısını döndürür."""
+    os.makedirs(directory, exist_ok=True)
+    with _CACHE_LOCK:
+        entries = {t: dict(e) for t, e in _MEM_CACHE.items()}
+    written = 0
+    for t, e in entries.items():
+        sig = (e["at"], e.get("version"), len(e["df"].columns))
+        if _SNAPSHOT_SAVED.get(t) == sig:
+            continue
+        path = os.path.join(directory, f"{_shared_key(t)}.frame")
+        rec  = {"at": e["at"], "version": e.get("version"), "df": e["df"], "state": e["state"]}
+        try:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as fh:
+                pickle.dump(rec, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            _SNAPSHOT_SAVED[t] = sig
+            written += 1
+        except Exception as ex:
+            print(f"[snapshot] {t}: yazma hatası: {ex}")
+    return written
+
+
+def restore_frames(tickers: list, directory: str) -> list:
+    """
+    Snapshot'taki çerçeveleri verilen sırayla cache'e kurar (bellekte
+    olmayanları). Sürüm bilgisi içerikle uyuşmayan ya da okunamayan (ör. farklı
+    pandas sürümüyle yazılmış) dosyalar atlanır. Kurulan ticker'ları döndürür.
+    """
+    restored = []
+    for t in tickers:
+        path = os.path.join(directory, f"{_shared_key(t)}.frame")
+        if t in _MEM_CACHE or not os.path.exists(path):
+            continue
+        try:
+            with open(path, "rb") as fh:
+                rec = pickle.load(fh)
+            if rec["df"].empty or rec.get("version") != _fingerprint(rec["df"]):
+                print(f"[snapshot] {t}: sürüm uyuşmuyor, atlandı")
+                continue
+        except Exception as ex:
+            print(f"[snapshot] {t}: okuma hatası: {ex}")
+            continue
+        df = _install(t, rec["df"], rec["state"], rec["at"], publish=False)
+        _SNAPSHOT_SAVED[t] = (rec["at"], rec["version"], len(df.columns))
+        restored.append(t)
+    return restored
+
+
+def _install(ticker: str, df: pd.DataFrame, state: Optional[dict], at: datetime,
+             publish: bool = True) -> pd.DataFrame:
+    """
+    Yeni çerçeveyi yerel cache'e koyar ve (gerekirse) diğer worker'lara yayınlar.
+    Kompakt modda saklanan (ve döndürülen) çerçeve float32 feature bloklu olandır.
+    """
+    if _COMPACT:
+        df = _compact(df)
+    size    = _frame_bytes(df, state)
+    version = _fingerprint(df)
+    with _CACHE_LOCK:
+        _MEM_CACHE[ticker] = {"df": df, "state": state, "at": at, "version": version,
+                              "bytes": size, "used": time.monotonic()}
+        _evict(keep=ticker)
+    _update_quote(ticker, df, at, version)
+    if publish:
+        _shared_publish(ticker, df, state, at)
+    return df
+
+
+def _fingerprint(df: pd.DataFrame) -> str:
+    """Veri sürümü: son bar tarihi + kapanış serisinin crc32'si ("YYYYMMDD-xxxxxxxx")."""
+    closes = np.ascontiguousarray(df["Close"].to_numpy(dtype=float))
+    return f"{df.index[-1]:%Y%m%d}-{zlib.crc32(closes.tobytes()):08x}"
+
+
+def data_version(ticker: str, df: Optional[pd.DataFrame] = None) -> Optional[str]:
+    """
+    Verinin sürüm parmak izi ("YYYYMMDD-xxxxxxxx"). Yeni bar gelince artar,
+    aynı gün içinde düzeltilen kapanışlarda hash kısmı değişir; veri aynı
+    kaldıkça sabittir. Model/tahmin/backtest/özet cache'leri bununla anahtarlanır.
+    df verilirse onun sürümü döner (cache'teki çerçeveyse hesaplanmadan).
+    """
+    entry = _MEM_CACHE.get(ticker)
+    if entry is not None and (df is None or entry["df"] is df):
+        return entry.get("version") or _fingerprint(entry["df"])
+    if df is not None:
+        return _fingerprint(df) if len(df) else None
+    with _QUOTE_LOCK:
+        row = _QUOTES.get(ticker)
+    return row["version"] if row else None
+
+
+def _update_quote(ticker: str, df: pd.DataFrame, at: datetime, version: Optional[str] = None):
+    closes = df["Close"].to_numpy(dtype=float)
+    if len(closes) == 0:
+        return
+    cur  = float(closes[-1])
+    prev = float(closes[-2]) if len(closes) > 1 else cur
+    row = {
+        "price":      cur,
+        "prev_close": prev,
+        "change":     cur - prev,
+        "change_pct": (cur - prev) / prev * 100 if prev else 0.0,
+        "date":       df.index[-1].strftime("%Y-%m-%d"),
+        "version":    version or _fingerprint(df),
+        "expires":    _expiry(ticker, at),
+    }
+    hist = (df.index.values.astype("datetime64[ns]"), closes.copy())
+    with _QUOTE_LOCK:
+        _QUOTES[ticker] = row
+        _CLOSE_HIST[ticker] = hist
+
+
+def get_quotes(tickers) -> dict:
+    """
+    {ticker: {"price", "prev_close", "change", "change_pct", "date", "version"}}.
+    Taze satırlar doğrudan tablodan okunur; eksik ya da süresi geçmiş ticker'lar
+    için bir kez get_processed_data çağrılır (SWR sayesinde çoğunlukla beklemeden).
+    Verisi alınamayan ticker sonuçta yer almaz.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    now = datetime.utcnow()
+    with _QUOTE_LOCK:
+        missing = [t for t in tickers if t not in _QUOTES or now >= _QUOTES[t]["expires"]]
+    for t in missing:
+        try:
+            get_processed_data(t, groups=[])
+        except Exception as e:
+            print(f"[quote] {t}: {e}")
+    with _QUOTE_LOCK:
+        return {t: {k: v for k, v in _QUOTES[t].items() if k != "expires"}
+                for t in tickers if t in _QUOTES}
+
+
+def get_quote(ticker: str) -> Optional[dict]:
+    return get_quotes([ticker]).get(ticker)
+
+
+def close_on(ticker: str, when) -> Optional[float]:
+    """when tarihindeki ya da sonraki ilk işlem gününün kapanışı; yoksa None."""
+    if ticker not in _CLOSE_HIST:
+        get_quotes([ticker])
+    with _QUOTE_LOCK:
+        hist = _CLOSE_HIST.get(ticker)
+    if hist is None:
+        return None
+    dates, closes = hist
+    i = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(when).tz_localize(None), "ns")))
+    return float(closes[i]) if i < len(closes) else None
+
+
+def _compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Feature sütunlarını tek bir bitişik float32 matrise toplar; _WIDE_COLS float64 kalır."""
+    feat = [c for c in df.columns if c not in _WIDE_COLS]
+    wide = [c for c in df.columns if c in _WIDE_COLS]
+    if (df.columns[:len(feat)].tolist() == feat
+            and (df.dtypes.iloc[:len(feat)] == np.float32).all()
+            and (df.dtypes.iloc[len(feat):] == np.float64).all()):
+        return df                                          # zaten kompakt
+    block = np.ascontiguousarray(df[feat].to_numpy(dtype=np.float32))
+    return pd.concat([pd.DataFrame(block, index=df.index, columns=feat, copy=False),
+                      df[wide].astype(float)], axis=1)
+
+
+def _frame_blocks(df: pd.DataFrame) -> list:
+    """Çerçeveyi aynı dtype'lı ardışık sütun gruplarına böler: [(sütunlar, matris)]."""
+    blocks, start = [], 0
+    dtypes = list(df.dtypes)
+    for i in range(1, len(dtypes) + 1):
+        if i == len(dtypes) or dtypes[i] != dtypes[start]:
+            cols = list(df.columns[start:i])
+            blocks.append((cols, df.iloc[:, start:i].to_numpy()))
+            start = i
+    return blocks
+
+
+def feature_values(df: pd.DataFrame, cols: list, rows=None, dtype=None) -> np.ndarray:
+    """
+    Seçilen sütunları ara DataFrame kopyası olmadan NumPy dizisi olarak verir.
+
+    Sütunlar aynı dtype bloğunda ardışıksa ve rows verilmemişse dönen dizi
+    cache'teki bloğun salt okunur görünümüdür; aksi halde tek bir toplama ile
+    tek kopya üretilir. dtype verilirse (ör. float) gerekiyorsa dönüştürülür.
+    """
+    pos = df.columns.get_indexer(cols)
+    if (pos < 0).any():
+        raise KeyError([c for c, p in zip(cols, pos) if p < 0])
+    lo, hi = int(pos.min()), int(pos.max()) + 1
+    block = df.iloc[:, lo:hi].to_numpy()      # tek dtype bloğunda kopyasız
+    idx = pos - lo
+    if rows is None and (np.diff(idx) == 1).all():
+        out = block[:, idx[0]:idx[-1] + 1]
+    elif rows is None:
+        out = block[:, idx]
+    else:
+        out = block[np.ix_(np.asarray(rows), idx)]
+    return out if dtype is None else out.astype(dtype, copy=False)
+
+
 # ── FEATURE HESAPLAMA ─────────────────────────────────────────────────────────
+# En uzun gösterge penceresi 252 bar (52 hafta); artımlı hesapta yeni barların
+# önüne bu kadar geçmiş eklenir. EWM'ler ise pencere başındaki durumdan devam eder.
+# İlk _FEATURE_WARMUP bar (en uzun pencerenin dolması) ve hedefi olmayan son
+# bar atılır; ardından hesaplanmış sütunlarda NaN kalan satırlar da düşülür
+# (ör. sıfır hacimli günlerde v_ratio) — çerçevede NaN satır bulunmaz.
+# Gruplar tembeldir — taban (_WIDE_COLS) hep hesaplanır, her FEATURE_GROUPS
+# girdisi ilk istendiğinde hesaplanıp cache'teki çerçeveye eklenir.
+_FEATURE_LOOKBACK = 300
+_FEATURE_WARMUP   = 251
+_GROUP_LOCKS: dict = {}     # {ticker: Lock} — tembel grup hesabı için
+_EWM_COLS = ["ema9", "ema12", "ema21", "ema26", "macd_sig"]
+_OHLCV    = ["open", "high", "low", "close", "volume"]
+
+
+def _complete_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Herhangi bir sütunu NaN olan satırları atar; NaN yoksa çerçevenin kendisi."""
+    bad = df.isna().to_numpy().any(axis=1)
+    return df[~bad] if bad.any() else df
+
+
+def _clean_raw(df_raw: pd.DataFrame) -> Optional[pd.DataFrame]:
+    df_raw.columns = [str(c).strip().lower() for c in df_raw.columns]
+    df_raw = df_raw.loc[:, ~df_raw.columns.duplicated()]
+    df_raw = df_raw[~df_raw.index.duplicated(keep="last")]
+
+    needed = {"open","high","low","close","volume"}
+    if not needed.issubset(set(df_raw.columns)):
+        return None
+    for col in needed:
+        df_raw[col] = pd.to_numeric(df_raw[col], errors="coerce")
+    df_raw.dropna(subset=list(needed), inplace=True)
+    return df_raw
+
+
+def _indicators(df_raw: pd.DataFrame, seed: Optional[pd.Series] = None,
+                groups: Optional[list] = None) -> tuple:
+    """
+    Temizlenmiş OHLCV'den gösterge sütunlarını hesaplar (dropna yapmadan).
+    Hesaplar backend/indicators.py'deki NumPy çekirdekleriyle yapılır.
+    seed: pencereden bir önceki bardaki EWM değerleri (_EWM_COLS); verilirse
+    EWM'ler tam geçmişle hesaplanmış gibi devam eder.
+    groups: hesaplanacak FEATURE_GROUPS adları (None: hepsi, []: yalnızca taban).
+    Taban sütunlar (_WIDE_COLS) ve EWM durumu her zaman hesaplanır; gruplar
+    ortak ara dizileri (SMA20, ATR14, ...) bir kez hesaplayıp paylaşır.
+    Dönüş: (gösterge DataFrame'i, bar bazında EWM durum DataFrame'i)
+    """
+    sd = (lambda k: None) if seed is None else (lambda k: float(seed[k]))
+    rm, div = ind.rolling_mean, ind.safe_div
+
+    c  = df_raw["close"].to_numpy(dtype=float)
+    h  = df_raw["high"].to_numpy(dtype=float)
+    lo = df_raw["low"].to_numpy(dtype=float)
+    v  = df_raw["volume"].to_numpy(dtype=float)
+    op = df_raw["open"].to_numpy(dtype=float)
+    out: dict = {}
+    memo: dict = {}
+
+    def once(key, fn):
+        if key not in memo:
+            memo[key] = fn()
+        return memo[key]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lr = np.log(c / ind.shift(c, 1))
+        ems = {sp: ind.ewm(c, sp, sd(f"ema{sp}")) for sp in (9, 12, 21, 26)}
+        macd = div(ems[12]-ems[26], c); sig = ind.ewm(macd, 9, sd("macd_sig"))
+
+        s20   = lambda: once("s20", lambda: rm(c, 20))
+        atr14 = lambda: once("atr14", lambda: rm(np.fmax(h-lo, np.fmax(
+            np.abs(h-ind.shift(c, 1)), np.abs(lo-ind.shift(c, 1)))), 14))  # fmax: NaN atlanır
+        hh14  = lambda: once("hh14", lambda: ind.rolling_max(h, 14))
+        ll14  = lambda: once("ll14", lambda: ind.rolling_min(lo, 14))
+
+        def returns():
+            out["lr_1"]  = lr;                 out["lr_2"] = ind.shift(lr, 1)
+            out["lr_3"]  = ind.shift(lr, 2);   out["lr_5"] = np.log(c/ind.shift(c, 5))/5
+            out["lr_10"] = np.log(c/ind.shift(c, 10))/10
+            out["lr_20"] = np.log(c/ind.shift(c, 20))/20
+
+        def rsi():
+            for p in [7, 14, 21]:
+                out[f"rsi_{p}"] = ind.rsi(c, p)
+            out["rsi_diff"] = out["rsi_14"] - out["rsi_7"]
+            out["rsi_mom"]  = ind.diff(out["rsi_14"], 5)
+
+        def macd_():
+            out["macd"] = macd; out["macd_sig"] = sig
+            out["macd_hist"] = macd-sig; out["macd_mom"] = ind.diff(macd, 3)
+
+        def bollinger():
+            sd20 = ind.rolling_std(c, 20)
+            bbu = s20()+2*sd20; bbl = s20()-2*sd20
+            out["bb_pct"]   = np.clip(div(c-bbl, bbu-bbl), 0, 1)
+            out["bb_width"] = div(bbu-bbl, s20())
+
+        def ema():
+            for sp in [9, 21]:
+                out[f"dist_ema{sp}"] = div(c-ems[sp], ems[sp])
+
+        def sma():
+            for w in [5,10,20,50,100]:
+                sm = s20() if w == 20 else rm(c, w); out[f"dist_sma{w}"] = div(c-sm, sm)
+            ema()
+
+        def volatility():
+            for w in [5,10,20]: out[f"vol_{w}d"] = ind.rolling_std(lr, w)
+            out["rvol_20"]   = out["vol_20d"]*np.sqrt(252)
+            out["vol_ratio"] = div(out["vol_10d"], out["vol_20d"])
+
+        def atr():
+            out["atr_pct"]   = div(atr14(), c)
+            out["atr_trend"] = div(atr14(), rm(atr14(), 14))
+
+        def stoch():
+            stk = np.nan_to_num(100*div(c-ll14(), hh14()-ll14()), nan=50.0)
+            out["stoch_k"] = stk; out["stoch_d"] = rm(stk, 3)
+            out["stoch_diff"] = stk-out["stoch_d"]
+
+        def williams():
+            out["willr"] = np.nan_to_num(-100*div(hh14()-c, hh14()-ll14()), nan=-50.0)
+
+        def cci():
+            tp = (h+lo+c)/3; tp_ma = rm(tp, 20); tp_md = ind.rolling_mad(tp, 20)
+            out["cci"] = np.nan_to_num(np.clip(div(tp-tp_ma, 0.015*tp_md), -300, 300), nan=0.0)
+
+        def adx():
+            pdm = np.clip(ind.diff(h), 0, None); mdm = np.clip(-ind.diff(lo), 0, None)
+            out["adx_plus"]  = np.nan_to_num(100*div(rm(pdm, 14), atr14()), nan=0.0)
+            out["adx_minus"] = np.nan_to_num(100*div(rm(mdm, 14), atr14()), nan=0.0)
+            out["adx_diff"]  = out["adx_plus"]-out["adx_minus"]
+
+        def momentum():
+            for w in [3,5,10,20]: out[f"roc_{w}"] = (c/ind.shift(c, w) - 1)*100
+
+        def volume():
+            vsma = rm(v, 14); vrel = div(v, vsma)
+            out["v_ratio"] = np.clip(vrel, 0, 10)
+            out["v_trend"] = np.clip(div(vsma, rm(v, 50)), 0, 5)
+            out["pv_corr"] = np.clip(lr*vrel, -5, 5)
+
+        def pattern():
+            out["hl_pct"]     = div(h-lo, c)
+            out["open_close"] = div(c-op, c)
+
+        def distance():
+            out["dist_52w_high"] = div(c-ind.rolling_max(c, 252), c)
+            out["dist_52w_low"]  = div(c-ind.rolling_min(c, 252), c)
+
+        def trend():
+            s50 = rm(c, 50)
+            out["sma20_slope"] = div(ind.diff(s20(), 5), ind.shift(s20(), 5))
+            out["sma50_slope"] = div(ind.diff(s50, 5), ind.shift(s50, 5))
+
+        builders = {
+            "Returns": returns, "RSI": rsi, "MACD": macd_, "Bollinger": bollinger,
+            "SMA": sma, "EMA": ema, "Volatility": volatility, "ATR": atr,
+            "Stoch": stoch, "Williams": williams, "CCI": cci, "ADX": adx,
+            "Momentum": momentum, "Volume": volume, "Pattern": pattern,
+            "Distance": distance, "Trend": trend,
+        }
+        for g in (FEATURE_GROUPS if groups is None else groups):
+            if g in builders:
+                builders[g]()
+
+        out["target_lr"] = ind.shift(lr, -1)
+    out["Close"] = c; out["High"] = h; out["Low"] = lo; out["Volume"] = v
+
+    cols  = [k for k in _feature_columns() if k in out]
+    frame = pd.DataFrame({k: out[k] for k in cols}, index=df_raw.index)
+    ewm_state = pd.DataFrame({"ema9": ems[9], "ema12": ems[12], "ema21": ems[21],
+                              "ema26": ems[26], "macd_sig": sig}, index=df_raw.index)
+    return frame, ewm_state
+
+
+def _feature_columns() -> list:
+    """Tam çerçevenin sütun sırası: FEATURE_GROUPS sırasıyla göstergeler, sonra _WIDE_COLS."""
+    return list(dict.fromkeys([c for cols in FEATURE_GROUPS.values() for c in cols] + _WIDE_COLS))
+
+
+def _groups_in(df: pd.DataFrame) -> list:
+    """Çerçevede tüm sütunları bulunan (hesaplanmış) feature grupları."""
+    have = set(df.columns)
+    return [g for g, cols in FEATURE_GROUPS.items() if have.issuperset(cols)]
+
+
+def _build_features(df_raw: pd.DataFrame, ticker: str,
+                    groups: Optional[list] = None) -> Optional[tuple]:
+    """
+    _features ile aynı; artımlı yenileme ve tembel gruplar için durumu da döndürür.
+    groups: hesaplanacak feature grupları (None: hepsi, []: yalnızca taban).
+    """
+    try:
+        df_raw = _clean_raw(df_raw)
+        if df_raw is None or len(df_raw) < 120:
+            return None
+
+        out, ewm_state = _indicators(df_raw, groups=groups)
+        out = _complete_rows(out.iloc[_FEATURE_WARMUP:-1])
+        if out.empty or len(out) < 60:
+            return None
+        print(f"[data] {ticker}: {len(out)} satır, {len(_groups_in(out))} grup, "
+              f"son: {out.index[-1].date()} OK")
+        state = {"ewm": ewm_state.tail(_FEATURE_LOOKBACK + 1), "last": df_raw.index[-1],
+                 "raw": df_raw}
+        return out, state
+    except Exception as e:
+        print(f"[data] {ticker} feature err: {e}"); traceback.print_exc(); return None
+
+
 def _features(df_raw: pd.DataFrame, ticker: str) -> Optional[pd.DataFrame]:
     """
     Ham OHLCV verisinden ~50 teknik gösterge hesaplar.
@@ -183,105 +1293,153 @@ def _features(df_raw: pd.DataFrame, ticker: str) -> Optional[pd.DataFrame]:
       v_*           : hacim göstergeleri
       target_lr     : ertesi gün logaritmik getiri (modelin tahmin hedefi)
     """
-    try:
-        df_raw.columns = [str(c).strip().lower() for c in df_raw.columns]
-        df_raw = df_raw.loc[:, ~df_raw.columns.duplicated()]
-        df_raw = df_raw[~df_raw.index.duplicated(keep="last")]
+    res = _build_features(df_raw, ticker)
+    return res[0] if res else None
+
 
-        needed = {"open","high","low","close","volume"}
-        if not needed.issubset(set(df_raw.columns)):
+def _features_incremental(
+    df_raw: pd.DataFrame, prev_df: pd.DataFrame, prev_state: dict, ticker: str
+) -> Optional[tuple]:
+    """
+    Önceki feature çerçevesine yalnızca yeni barların satırlarını ekler.
+
+    Yeni barların önüne _FEATURE_LOOKBACK kadar geçmiş konur; rolling pencereler
+    bu dilimde, EWM'ler ise saklanan durumdan devam ederek hesaplanır. Önceki
+    son bar kısmi (gün içi) olabileceğinden o bar da yeniden hesaplanır ve
+    çerçevenin son satırı (hedefi o barın kapanışına bağlı) yenilenir; yeni bar
+    gelmese de son bar değiştiyse aynı yol izlenir. Sonuç tam yeniden hesapla
+    aynıdır. Geçmiş değişmişse ya da durum yetersizse None döner (çağıran tam
+    hesaba düşer).
+    """
+    try:
+        raw = _clean_raw(df_raw)
+        last = prev_state["last"]
+        if raw is None or last not in raw.index:
             return None
-        for col in needed:
-            df_raw[col] = pd.to_numeric(df_raw[col], errors="coerce")
-        df_raw.dropna(subset=list(needed), inplace=True)
-        if len(df_raw) < 120:
+        pos = raw.index.get_loc(last)
+        old = prev_state.get("raw")
+        if (pos == len(raw) - 1 and old is not None and last in old.index
+                and np.allclose(old.loc[last, _OHLCV].values.astype(float),
+                                raw.loc[last, _OHLCV].values.astype(float), rtol=1e-9)):
+            return prev_df, prev_state            # yeni bar yok, son bar aynı
+        w0 = pos + 1 - _FEATURE_LOOKBACK
+        if w0 < 1 or pos < 1 or raw.index[w0 - 1] not in prev_state["ewm"].index:
             return None
 
-        c = df_raw["close"].astype(float)
-        h = df_raw["high"].astype(float)
-        lo = df_raw["low"].astype(float)
-        v  = df_raw["volume"].astype(float)
-        op = df_raw["open"].astype(float)
-        out = pd.DataFrame(index=df_raw.index)
-
-        lr = np.log(c / c.shift(1))
-        out["lr_1"]  = lr;          out["lr_2"]  = lr.shift(1)
-        out["lr_3"]  = lr.shift(2); out["lr_5"]  = np.log(c/c.shift(5))/5
-        out["lr_10"] = np.log(c/c.shift(10))/10
-        out["lr_20"] = np.log(c/c.shift(20))/20
-
-        for p in [7, 14, 21]:
-            d = c.diff(); g = d.where(d>0,0.).rolling(p).mean()
-            l = (-d.where(d<0,0.)).rolling(p).mean()
-            out[f"rsi_{p}"] = (100 - 100/(1+g/l.replace(0,np.nan))).fillna(50)
-        out["rsi_diff"] = out["rsi_14"] - out["rsi_7"]
-        out["rsi_mom"]  = out["rsi_14"].diff(5)
-
-        macd = (_ewm(c,12)-_ewm(c,26))/c.replace(0,np.nan); sig = _ewm(macd,9)
-        out["macd"] = macd; out["macd_sig"] = sig
-        out["macd_hist"] = macd-sig; out["macd_mom"] = macd.diff(3)
-
-        s20=c.rolling(20).mean(); sd20=c.rolling(20).std()
-        bbu=s20+2*sd20; bbl=s20-2*sd20
-        out["bb_pct"]   = ((c-bbl)/(bbu-bbl).replace(0,np.nan)).clip(0,1)
-        out["bb_width"] = (bbu-bbl)/s20.replace(0,np.nan)
-
-        for w in [5,10,20,50,100]:
-            sm=c.rolling(w).mean(); out[f"dist_sma{w}"]=(c-sm)/sm.replace(0,np.nan)
-        for sp in [9,21]:
-            em=_ewm(c,sp); out[f"dist_ema{sp}"]=(c-em)/em.replace(0,np.nan)
-
-        for w in [5,10,20]: out[f"vol_{w}d"]=lr.rolling(w).std()
-        out["rvol_20"]  = lr.rolling(20).std()*np.sqrt(252)
-        out["vol_ratio"]= out["vol_10d"]/out["vol_20d"].replace(0,np.nan)
-
-        pc=c.shift(1); tr=pd.concat([h-lo,(h-pc).abs(),(lo-pc).abs()],axis=1).max(axis=1)
-        atr14=tr.rolling(14).mean()
-        out["atr_pct"]  =atr14/c.replace(0,np.nan)
-        out["atr_trend"]=atr14/atr14.rolling(14).mean().replace(0,np.nan)
-
-        ll14=lo.rolling(14).min(); hh14=h.rolling(14).max()
-        stk=(100*(c-ll14)/(hh14-ll14).replace(0,np.nan)).fillna(50)
-        out["stoch_k"]=stk; out["stoch_d"]=stk.rolling(3).mean()
-        out["stoch_diff"]=stk-out["stoch_d"]
-        out["willr"]=(-100*(hh14-c)/(hh14-ll14).replace(0,np.nan)).fillna(-50)
-
-        tp=(h+lo+c)/3; tp_ma=tp.rolling(20).mean()
-        tp_md=tp.rolling(20).apply(lambda x:np.mean(np.abs(x-x.mean())),raw=True)
-        out["cci"]=((tp-tp_ma)/(0.015*tp_md.replace(0,np.nan))).clip(-300,300).fillna(0)
-
-        pdm=h.diff().clip(lower=0); mdm=(-lo.diff()).clip(lower=0)
-        tr14=tr.rolling(14).mean().replace(0,np.nan)
-        out["adx_plus"] =(100*pdm.rolling(14).mean()/tr14).fillna(0)
-        out["adx_minus"]=(100*mdm.rolling(14).mean()/tr14).fillna(0)
-        out["adx_diff"] =out["adx_plus"]-out["adx_minus"]
-
-        for w in [3,5,10,20]: out[f"roc_{w}"]=c.pct_change(w)*100
-
-        vsma=v.rolling(14).mean()
-        out["v_ratio"]=(v/vsma.replace(0,np.nan)).clip(0,10)
-        out["v_trend"]=(vsma/v.rolling(50).mean().replace(0,np.nan)).clip(0,5)
-        out["pv_corr"]=(lr*(v/vsma.replace(0,np.nan))).clip(-5,5)
-
-        out["hl_pct"]    =(h-lo)/c.replace(0,np.nan)
-        out["open_close"]=(c-op)/c.replace(0,np.nan)
-        out["dist_52w_high"]=(c-c.rolling(252).max())/c.replace(0,np.nan)
-        out["dist_52w_low"] =(c-c.rolling(252).min())/c.replace(0,np.nan)
-
-        out["sma20_slope"]=s20.diff(5)/s20.shift(5).replace(0,np.nan)
-        s50=c.rolling(50).mean()
-        out["sma50_slope"]=s50.diff(5)/s50.shift(5).replace(0,np.nan)
-
-        out["target_lr"]=lr.shift(-1)
-        out["Close"]=c; out["High"]=h; out["Low"]=lo; out["Volume"]=v
-
-        out.dropna(inplace=True)
-        if out.empty or len(out) < 60:
+        # Eski barlar değişmiş mi? (kapanışlar önceki çerçeveyle örtüşmeli)
+        common = prev_df.index.intersection(raw.index[w0:pos])
+        if len(common) == 0 or not np.allclose(
+                prev_df.loc[common, "Close"].values,
+                raw.loc[common, "close"].values.astype(float), rtol=1e-9):
             return None
-        print(f"[data] {ticker}: {len(out)} satır, son: {out.index[-1].date()} OK")
-        return out
+
+        seed = prev_state["ewm"].loc[raw.index[w0 - 1]]
+        out, ewm_state = _indicators(raw.iloc[w0:], seed, groups=_groups_in(prev_df))
+
+        # Önceki son bar (pos) kısmi olabilir: hedefi ona bağlı pos-1 satırından
+        # itibaren satırlar, pos'tan itibaren EWM durumu yeniden yazılır
+        rows = _complete_rows(out.iloc[_FEATURE_LOOKBACK - 2:-1])
+        df = pd.concat([prev_df[prev_df.index < raw.index[pos - 1]], rows])
+        ewm = prev_state["ewm"]
+        state = {
+            "ewm": pd.concat([ewm[ewm.index < last], ewm_state.iloc[_FEATURE_LOOKBACK - 1:]])
+                     .tail(_FEATURE_LOOKBACK + 1),
+            "last": raw.index[-1],
+            "raw":  raw,
+        }
+        print(f"[data] {ticker}: artımlı +{len(raw)-pos-1} bar, son: {df.index[-1].date()} OK")
+        return df, state
     except Exception as e:
-        print(f"[data] {ticker} feature err: {e}"); traceback.print_exc(); return None
+        print(f"[data] {ticker} artımlı feature err: {e}"); traceback.print_exc(); return None
+
+
+def _carry_groups(entry: Optional[dict]) -> list:
+    """Yenilemede korunacak gruplar: önceki çerçevede hesaplanmış olanlar."""
+    return _groups_in(entry["df"]) if entry is not None else []
+
+
+def _materialize(ticker: str, df: pd.DataFrame, groups: list) -> pd.DataFrame:
+    """
+    İstenen grupları çerçeveye ekler. Eksik gruplar cache kaydındaki ham
+    OHLCV'den yalnızca o gruplar için hesaplanır ve kayıttaki çerçeve
+    genişletilir; sonraki istekler hazır sütunları bulur. Kayıt atılmışsa ya
+    da ham veri taşımıyorsa gruplar disk deposundan hesaplanır (cache'e yazılmaz).
+    """
+    def lacking(frame):
+        have = set(frame.columns)
+        return [g for g in groups if g in FEATURE_GROUPS and not have.issuperset(FEATURE_GROUPS[g])]
+
+    if not lacking(df):
+        return df
+    # Aynı ticker için eşzamanlı istekler grubu bir kez hesaplar
+    with _GROUP_LOCKS.setdefault(ticker, threading.Lock()):
+        entry = _MEM_CACHE.get(ticker)
+        raw = (entry.get("state") or {}).get("raw") if entry is not None else None
+        if raw is None:                             # atılmış kayıt / eski yayın
+            return _grow(df, _detached_raw(ticker, df), lacking(df))
+        df = entry["df"]                            # yarışta daha yeni çerçeve kurulmuş olabilir
+        missing = lacking(df)
+        if not missing:
+            return df
+
+        t0 = time.perf_counter()
+        grown = _grow(df, raw, missing)
+        if _COMPACT:
+            grown = _compact(grown)
+        # Grup NaN ürettiği için satır düştüyse sürüm de değişmeli: sonuç/tahmin
+        # cache'leri aynı sürümle eski satır kümesinin sonuçlarını vermesin
+        dropped = len(grown) != len(df)
+        with _CACHE_LOCK:
+            installed = _MEM_CACHE.get(ticker) is entry
+            if installed:
+                entry["df"] = grown
+                entry["bytes"] = _frame_bytes(grown, entry["state"])
+                if dropped:
+                    entry["version"] = _fingerprint(grown)
+                _evict(keep=ticker)
+        if installed and dropped:
+            _update_quote(ticker, grown, entry["at"], entry["version"])
+    print(f"[data] {ticker}: +{','.join(missing)} hesaplandı "
+          f"({(time.perf_counter() - t0) * 1000:.1f} ms)")
+    return grown
+
+
+def _grow(df: pd.DataFrame, raw: pd.DataFrame, missing: list) -> pd.DataFrame:
+    """df'e raw'dan hesaplanan eksik grupların sütunlarını ekler (sütun sırası korunur)."""
+    out, _ = _indicators(raw, groups=missing)
+    cols = [c for c in out.columns if c not in df.columns]
+    grown = pd.concat([df, out[cols].reindex(df.index)], axis=1)
+    return _complete_rows(grown[[c for c in _feature_columns() if c in grown.columns]])
+
+
+def _detached_raw(ticker: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cache kaydı olmayan çerçeve için ham OHLCV: disk deposu çerçevenin tüm
+    barlarını kapsıyorsa o, yoksa çerçevenin kendi sütunları (açılış = kapanış).
+    """
+    stored = _store_load(ticker)
+    raw = stored["raw"] if stored is not None else None
+    if raw is not None and df.index.isin(raw.index).all():
+        return raw.loc[:df.index[-1]]
+    return pd.DataFrame({"open": df["Close"], "high": df["High"], "low": df["Low"],
+                         "close": df["Close"], "volume": df["Volume"]}, index=df.index)
+
+
+def indicator_state(ticker: str, df: pd.DataFrame) -> ind.IndicatorState:
+    """
+    df'in son satırındaki bardan devam eden artımlı gösterge motoru (tahmin
+    döngüsü için); satırları _features ile aynıdır. Cache kaydındaki ham
+    OHLCV'den kurulur. Ham veri yoksa (eski yayın vb.) çerçevenin kendi
+    sütunları kullanılır, açılış kapanışa eşit sayılır.
+    """
+    entry = _MEM_CACHE.get(ticker)
+    raw = (entry.get("state") or {}).get("raw") if entry is not None else None
+    if raw is not None and df.index[-1] in raw.index:
+        raw = raw.loc[:df.index[-1]]
+        return ind.IndicatorState.from_history(raw["open"], raw["high"], raw["low"],
+                                               raw["close"], raw["volume"])
+    return ind.IndicatorState.from_history(df["Close"], df["High"], df["Low"],
+                                           df["Close"], df["Volume"])
 
 
 # ── ANA FONKSİYON ────────────────────────────────────────────────────────────
@@ -289,33 +1447,410 @@ def get_processed_data(
     ticker: str,
     start_date: str = "2018-01-01",
     force_refresh: bool = False,
+    groups: Optional[list] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    Ticker'ın feature çerçevesi. groups: gereken FEATURE_GROUPS adları —
+    None tüm grupları, [] yalnızca tabanı (Close/High/Low/Volume/target_lr)
+    ister. Dönen çerçeve en az istenen sütunları içerir; daha önce başka bir
+    istek için hesaplanmış gruplar da bulunabilir.
+    """
+    df = _cached_frame(ticker, start_date, force_refresh)
+    if df is None:
+        return None
+    return _materialize(ticker, df, list(FEATURE_GROUPS) if groups is None else groups)
+
+
+def _cached_frame(
+    ticker: str, start_date: str, force_refresh: bool
 ) -> Optional[pd.DataFrame]:
     now = datetime.utcnow()
-    ttl = _ttl()
 
-    if not force_refresh and ticker in _MEM_CACHE:
-        entry = _MEM_CACHE[ticker]
-        age   = (now - entry["at"]).total_seconds()
-        if age < ttl:
+    # Kayıt bir kez alınır: arka plan _install/_evict araya girebilir
+    entry = None if force_refresh else _MEM_CACHE.get(ticker)
+    if entry is not None:
+        age     = (now - entry["at"]).total_seconds()
+        expires = _expiry(ticker, entry["at"])
+        entry["used"] = time.monotonic()
+        if now < expires:
+            _count("hits")
             print(f"[data] {ticker}: cache HIT ({age/60:.0f}dk, son:{entry['df'].index[-1].date()})")
             return entry["df"]
+        if now < expires + timedelta(seconds=_SWR_GRACE):
+            _count("stale_hits")
+            print(f"[data] {ticker}: cache STALE ({age/3600:.1f}s), arka planda yenileniyor")
+            _revalidate_async(ticker, start_date)
+            return entry["df"]
         print(f"[data] {ticker}: cache STALE ({age/3600:.1f}s), yenileniyor...")
+    if not force_refresh:
+        _count("misses")
+
+    flight, leader = _claim_flight(ticker)
+    if not leader:
+        stale = _MEM_CACHE.get(ticker)
+        if stale is not None and not force_refresh:
+            print(f"[data] {ticker}: yenileme sürüyor, eski çerçeve döndürülüyor")
+            return stale["df"]
+        print(f"[data] {ticker}: yenileme sürüyor, sonucu bekleniyor...")
+        try:
+            return flight.result(timeout=_INFLIGHT_WAIT)
+        except FutureTimeout:
+            stale = _MEM_CACHE.get(ticker)
+            return stale["df"] if stale is not None else None
+
+    return _run_flight(ticker, flight, start_date, force_refresh)
+
+
+def _claim_flight(ticker: str) -> tuple:
+    """(Future, lider_mi) — ticker için yürüyen yenileme yoksa yenisini kaydeder."""
+    with _INFLIGHT_LOCK:
+        flight = _INFLIGHT.get(ticker)
+        if flight is not None:
+            return flight, False
+        flight = _INFLIGHT[ticker] = Future()
+        return flight, True
+
+
+def _run_flight(
+    ticker: str, flight: Future, start_date: str, force_refresh: bool
+) -> Optional[pd.DataFrame]:
+    t0 = time.perf_counter()
+    try:
+        df = _refresh(ticker, start_date, force_refresh, datetime.utcnow())
+        flight.set_result(df)
+        return df
+    except BaseException as e:
+        flight.set_exception(e)
+        raise
+    finally:
+        _REFRESH_TIMES[ticker] = round(time.perf_counter() - t0, 2)
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(ticker, None)
+
+
+def _revalidate_async(ticker: str, start_date: str):
+    """Yürüyen yenileme yoksa arka plan havuzuna bir yenileme ekler."""
+    flight, leader = _claim_flight(ticker)
+    if not leader:
+        return
+
+    def job():
+        try:
+            with background_lane():
+                _run_flight(ticker, flight, start_date, True)
+        except Exception as e:
+            print(f"[data] {ticker}: arka plan yenileme hatası: {e}")
+
+    try:
+        _REFRESH_POOL.submit(job)
+    except RuntimeError:   # yorumlayıcı kapanıyor
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(ticker, None)
+        flight.set_result(None)
+
+
+def _refresh(
+    ticker: str, start_date: str, force_refresh: bool, now: datetime
+) -> Optional[pd.DataFrame]:
+    """
+    Single-flight lideri: önce başka bir worker'ın yayınladığı taze çerçeveye
+    bakar, yoksa süreçler arası kilidi alıp disk deposu / upstream üzerinden yeniler.
+    """
+    local = _MEM_CACHE.get(ticker)
+    if not force_refresh:
+        shared = _shared_load(ticker)
+        if (shared is not None and now < _expiry(ticker, shared["at"])
+                and (local is None or shared["at"] > local["at"])):
+            print(f"[data] {ticker}: paylaşımlı cache HIT (son:{shared['df'].index[-1].date()})")
+            return _install(ticker, shared["df"], shared["state"], shared["at"], publish=False)
+
+    with _shared_lock(ticker):
+        # Kilidi beklerken başka bir worker yenilemiş olabilir
+        shared = _shared_load(ticker)
+        if shared is not None and shared["at"] >= now:
+            print(f"[data] {ticker}: başka worker yeniledi, paylaşımlı çerçeve alınıyor")
+            return _install(ticker, shared["df"], shared["state"], shared["at"], publish=False)
+        return _refresh_local(ticker, start_date, force_refresh, now)
+
+
+def _refresh_local(
+    ticker: str, start_date: str, force_refresh: bool, now: datetime
+) -> Optional[pd.DataFrame]:
+    """Disk deposu / upstream üzerinden çerçeveyi yeniler."""
+    stored = _store_load(ticker)
 
-    df_raw = _download_raw(ticker, start_date)
+    # Bellekte yok ama disk deposu taze → ağa çıkmadan sun
+    if (not force_refresh and ticker not in _MEM_CACHE and stored is not None
+            and stored.get("start", start_date) <= start_date
+            and now < _expiry(ticker, stored["at"])):
+        res = _build_features(stored["raw"].copy(), ticker, groups=[])
+        if res is not None:
+            print(f"[data] {ticker}: disk deposu HIT (son:{stored['raw'].index[-1].date()})")
+            return _install(ticker, res[0], res[1], stored["at"])
+
+    # Arka planda yeniden deneme bekliyorsa upstream'e gitmeden hızlı dön
+    pending = _retry_pending(ticker)
+    df_raw  = None if pending else _fetch_raw(ticker, start_date, stored)
     if df_raw is None:
+        if pending:
+            print(f"[data] {ticker}: yenileme bekliyor, upstream atlandı")
+        else:
+            _schedule_retry(ticker, start_date)
         # İndirme başarısız — eski cache daha iyi
-        if ticker in _MEM_CACHE:
-            old = _MEM_CACHE[ticker]
+        old = _MEM_CACHE.get(ticker)
+        if old is not None:
             print(f"[data] {ticker}: indirme başarısız, eski cache ({(now-old['at']).total_seconds()/3600:.1f}s) kullanılıyor")
             return old["df"]
+        if stored is not None:
+            print(f"[data] {ticker}: indirme başarısız, disk deposu kullanılıyor")
+            return _features(stored["raw"].copy(), ticker)
         return None
 
-    df = _features(df_raw, ticker)
-    if df is None:
+    _clear_retry(ticker)
+    _store_save(ticker, df_raw, now, start_date)
+
+    # Önceki çerçeve ve EWM durumu varsa yalnızca yeni satırları hesapla
+    res  = None
+    prev = _MEM_CACHE.get(ticker)
+    if prev is not None and prev.get("state") is not None:
+        res = _features_incremental(df_raw.copy(), prev["df"], prev["state"], ticker)
+    if res is None:
+        res = _build_features(df_raw.copy(), ticker, groups=_carry_groups(prev))
+    if res is None:
         return None
 
-    _MEM_CACHE[ticker] = {"df": df, "at": now}
-    return df
+    df, state = res
+    return _install(ticker, df, state, now)
+
+
+# ── ARKA PLAN YENİDEN DENEME ─────────────────────────────────────────────────
+# Upstream başarısızsa istek thread'i beklemez: eldeki (eski) çerçeve ya da
+# None hemen döner ve yeniden deneme arka planda planlanır — üstel geri
+# çekilme (_RETRY_BASE·2^n, en çok _RETRY_MAX) ve ±%50 jitter ile. Deneme
+# beklerken gelen istekler upstream'e gitmez. Ticker başına _RETRY_BUDGET
+# deneme bitince ticker _RETRY_MAX boyunca soğumada kalır: istekler yine
+# upstream'e gitmez (eski veri ya da 503), süre dolunca bütçe yenilenir.
+_RETRY_BASE   = float(os.environ.get("FINTAP_RETRY_BASE", 5))     # s
+_RETRY_MAX    = float(os.environ.get("FINTAP_RETRY_MAX", 300))    # s
+_RETRY_BUDGET = int(os.environ.get("FINTAP_RETRY_BUDGET", 4))
+_RETRIES: dict = {}   # {ticker: {"attempt", "due": epoch | None, "cooldown": epoch | None, "last", "timer"}}
+_RETRY_LOCK = threading.Lock()
+
+
+def _schedule_retry(ticker: str, start_date: str):
+    now = time.time()
+    with _RETRY_LOCK:
+        rec = _RETRIES.get(ticker)
+        if rec is not None and rec["due"] is not None:
+            return                                            # zaten planlı
+        attempt = rec["attempt"] + 1 if rec is not None else 1
+        if attempt > _RETRY_BUDGET:
+            if rec.get("cooldown") is None:
+                rec["cooldown"] = now + _RETRY_MAX            # bütçe bitti → soğuma
+                print(f"[retry] {ticker}: deneme bütçesi bitti, {_RETRY_MAX:.0f}s soğuma")
+                return
+            if now < rec["cooldown"]:
+                return
+            attempt = 1
+        delay = min(_RETRY_MAX, _RETRY_BASE * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        timer = threading.Timer(delay, _fire_retry, args=(ticker, start_date, attempt))
+        timer.daemon = True
+        _RETRIES[ticker] = {"attempt": attempt, "due": now + delay, "cooldown": None,
+                            "last": now, "timer": timer}
+    print(f"[retry] {ticker}: {attempt}/{_RETRY_BUDGET}. deneme {delay:.1f}s sonra")
+    timer.start()
+
+
+def _fire_retry(ticker: str, start_date: str, attempt: int):
+    with _RETRY_LOCK:
+        rec = _RETRIES.get(ticker)
+        if rec is None or rec["attempt"] != attempt or rec["due"] is None:
+            return                                            # arada yenilendi
+        rec["due"] = None
+    _revalidate_async(ticker, start_date)
+
+
+def _clear_retry(ticker: str):
+    with _RETRY_LOCK:
+        rec = _RETRIES.pop(ticker, None)
+    if rec is not None:
+        rec["timer"].cancel()
+
+
+def _retry_pending(ticker: str) -> bool:
+    """Deneme planlıysa ya da bütçe bitmiş ve soğuma sürüyorsa True (upstream atlanır)."""
+    rec = _RETRIES.get(ticker)
+    if rec is None:
+        return False
+    return rec["due"] is not None or (rec.get("cooldown") or 0.0) > time.time()
+
+
+def _retry_in(rec: dict, now: float) -> Optional[float]:
+    if rec["due"] is not None:
+        return round(max(0.0, rec["due"] - now), 1)
+    cooldown = rec.get("cooldown")
+    return round(cooldown - now, 1) if cooldown is not None and cooldown > now else None
+
+
+def retry_status() -> dict:
+    """{ticker: {"attempt", "budget", "retry_in_sec", "exhausted"}} — başarısız yenilemeler."""
+    now = time.time()
+    with _RETRY_LOCK:
+        return {
+            t: {
+                "attempt":      r["attempt"],
+                "budget":       _RETRY_BUDGET,
+                "retry_in_sec": _retry_in(r, now),
+                "exhausted":    r.get("cooldown") is not None,
+            }
+            for t, r in _RETRIES.items()
+        }
+
+
+# ── TOPLU (EVREN) YENİLEME ───────────────────────────────────────────────────
+# Cron yenilemesi evreni birkaç çok sembollü yf.download çağrısıyla çeker
+# (depoda geçmişi olanlar için yalnızca kuyruk). Toplu çağrıda eksik kalanlar
+# tekil yoldan (kaynak sıralaması, single-flight) sınırlı bir thread havuzunda
+# yenilenir. Tam feature hesapları FINTAP_FEATURE_PROCS > 1 ise süreç havuzuna
+# dağıtılır; NumPy çekirdekleriyle ticker başına birkaç ms sürdüğünden varsayılan
+# süreç içidir.
+_BULK_CHUNK    = 20
+_BULK_WORKERS  = int(os.environ.get("FINTAP_BULK_WORKERS", 4))
+_FEATURE_PROCS = int(os.environ.get("FINTAP_FEATURE_PROCS", 0))
+
+
+def _bulk_download(tickers: list, start: str) -> dict:
+    """Tek yf.download çağrısıyla çok sembol indirir: {ticker: ham df}."""
+    _acquire(len(tickers))
+    t0 = time.perf_counter()
+    try:
+        data = yf.download(tickers, start=start, auto_adjust=True, group_by="ticker",
+                           threads=True, progress=False, session=_yf_session(),
+                           timeout=_HTTP_TIMEOUT)
+    except Exception as e:
+        print(f"[bulk] yf.download err: {e}")
+        data = None
+    out = {}
+    if data is not None and not data.empty:
+        for t in tickers:
+            if isinstance(data.columns, pd.MultiIndex):
+                if t not in data.columns.get_level_values(0):
+                    continue
+                df = data[t]
+            elif len(tickers) == 1:
+                df = data
+            else:
+                continue
+            df = df.dropna(how="all")
+            if not df.empty:
+                out[t] = df
+    sec = time.perf_counter() - t0
+    _record_source("yfinance", bool(out), sec)
+    print(f"[bulk] {len(out)}/{len(tickers)} sembol indirildi ({sec:.1f}s, başlangıç {start})")
+    return out
+
+
+def _timed_build(df_raw: pd.DataFrame, ticker: str, groups: list) -> tuple:
+    t0 = time.perf_counter()
+    return _build_features(df_raw, ticker, groups), time.perf_counter() - t0
+
+
+def _build_many(jobs: dict) -> dict:
+    """{ticker: (ham df, gruplar)} → {ticker: (sonuç, süre)}; süreç havuzu yoksa/bozulursa sırayla."""
+    if _FEATURE_PROCS > 1 and len(jobs) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=_FEATURE_PROCS) as ex:
+                futs = {t: ex.submit(_timed_build, raw, t, g) for t, (raw, g) in jobs.items()}
+                return {t: f.result() for t, f in futs.items()}
+        except Exception as e:
+            print(f"[bulk] süreç havuzu kullanılamadı ({e}), sırayla hesaplanıyor")
+    return {t: _timed_build(raw, t, g) for t, (raw, g) in jobs.items()}
+
+
+def refresh_universe(tickers: list, start_date: str = "2018-01-01") -> dict:
+    """
+    Ticker listesini toplu yeniler ve cache'e kurar.
+    Dönüş: {ticker: {"ok", "rows", "last_date", "path", "fetch_sec",
+                     "features_sec", "total_sec"}} — path "bulk" ya da "single".
+    """
+    now    = datetime.utcnow()
+    stored = {t: _store_load(t) for t in tickers}
+
+    # 1) Toplu indirme — kuyruk ve tam geçmiş grupları kendi başlangıçlarıyla
+    groups: dict = {}
+    for t, rec in stored.items():
+        if rec is not None and rec.get("start", start_date) <= start_date:
+            key, s = "tail", (rec["raw"].index[-1]
+                              - timedelta(days=_STORE_OVERLAP_DAYS)).strftime("%Y-%m-%d")
+        else:
+            key, s = "full", start_date
+        g = groups.setdefault(key, {"start": s, "tickers": []})
+        g["start"] = min(g["start"], s)
+        g["tickers"].append(t)
+
+    bulk, fetch_sec = {}, {}
+    for g in (groups.values() if provider_name() == "yahoo" else ()):
+        for i in range(0, len(g["tickers"]), _BULK_CHUNK):
+            chunk = g["tickers"][i:i + _BULK_CHUNK]
+            t0 = time.perf_counter()
+            with background_lane():
+                bulk.update(_bulk_download(chunk, g["start"]))
+            fetch_sec.update(dict.fromkeys(chunk, round(time.perf_counter() - t0, 2)))
+
+    # 2) Depoya ekle, feature'ları hesapla (önceki durum varsa artımlı)
+    raws, done, jobs = {}, {}, {}
+    for t, prefetched in bulk.items():
+        raw = _fetch_raw(t, start_date, stored[t], prefetched=prefetched)
+        if raw is None:
+            continue
+        _clear_retry(t)
+        _store_save(t, raw, now, start_date)
+        raws[t] = raw
+        prev = _MEM_CACHE.get(t)
+        if prev is not None and prev.get("state") is not None:
+            t0  = time.perf_counter()
+            res = _features_incremental(raw.copy(), prev["df"], prev["state"], t)
+            if res is not None:
+                done[t] = (res, time.perf_counter() - t0)
+                continue
+        jobs[t] = (raw.copy(), _carry_groups(prev))
+    done.update(_build_many(jobs))
+
+    report = {}
+    for t, (res, sec) in done.items():
+        if res is None:
+            continue
+        df = _install(t, res[0], res[1], now)
+        report[t] = {
+            "ok": True, "rows": len(df), "last_date": str(df.index[-1].date()),
+            "path": "bulk", "fetch_sec": fetch_sec.get(t), "features_sec": round(sec, 3),
+            "total_sec": round(fetch_sec.get(t, 0) + sec, 2),
+        }
+
+    # 3) Toplu yoldan geçmeyenler — tekil yol, sınırlı paralellik
+    def single(t):
+        t0 = time.perf_counter()
+        try:
+            with background_lane():
+                df = get_processed_data(t, start_date, force_refresh=True, groups=[])
+        except Exception as e:
+            print(f"[bulk] {t}: tekil yenileme hatası: {e}")
+            df = None
+        sec = round(time.perf_counter() - t0, 2)
+        return t, {
+            "ok": df is not None, "rows": len(df) if df is not None else 0,
+            "last_date": str(df.index[-1].date()) if df is not None else None,
+            "path": "single", "fetch_sec": None, "features_sec": None, "total_sec": sec,
+        }
+
+    rest = [t for t in tickers if t not in report]
+    if rest:
+        with ThreadPoolExecutor(max_workers=_BULK_WORKERS, thread_name_prefix="data-bulk") as ex:
+            report.update(ex.map(single, rest))
+
+    print(f"[bulk] {sum(r['ok'] for r in report.values())}/{len(tickers)} ticker yenilendi "
+          f"({len(rest)} tekil yoldan)")
+    return {t: report[t] for t in tickers}
 
 
 # ── FEATURE GRUPLARI ─────────────────────────────────────────────────────────
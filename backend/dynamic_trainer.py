@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 import warnings; warnings.filterwarnings("ignore")
+import os
+import pickle
 import traceback
 import time
 import numpy as np
-import pandas as pd
 from datetime import timedelta
-from typing import Optional
+from typing import Callable, Optional
 
 from sklearn.linear_model import Ridge
 from sklearn.ensemble import (
@@ -33,202 +34,188 @@ except Exception:
     HAS_TF = False
 
 try:
-    from .data_manager import get_processed_data, FEATURE_GROUPS, DEFAULT_GROUPS
+    from .inference import compile_predictor
+    from . import model_registry
 except ImportError:
-    from data_manager import get_processed_data, FEATURE_GROUPS, DEFAULT_GROUPS
+    from inference import compile_predictor
+    import model_registry
+
+try:
+    from .data_manager import (get_processed_data, data_version, feature_values,
+                               FEATURE_GROUPS, DEFAULT_GROUPS, indicator_state)
+except ImportError:
+    from data_manager import (get_processed_data, data_version, feature_values,
+                              FEATURE_GROUPS, DEFAULT_GROUPS, indicator_state)
 
 
 # ──────────────────────────────────────────────────────────────
 #  MODEL CACHE — aynı parametrelerle tekrar sorgu gelirse modeli
-#  yeniden eğitmek yerine bellekten döndür → hız kazanımı
+#  yeniden eğitmek yerine bellekten döndür → hız kazanımı.
+#  Anahtar verinin sürümünü (data_version) içerir: veri değişmedikçe
+#  model geçerlidir, yeni bar gelince anahtar kendiliğinden değişir.
 # ──────────────────────────────────────────────────────────────
-_MODEL_CACHE: dict = {}   # {cache_key: {"model": ..., "sc": ..., "feat_set": ..., "at": float}}
-_MODEL_CACHE_TTL = 1800  
+_MODEL_CACHE: dict = {}     # {cache_key: {"model": ..., "sc": ..., "feat_set": ..., "at": float}}
+_FORECAST_CACHE: dict = {}  # {cache_key|horizon: {"result": (future, chart), "at": float}}
+_MODEL_CACHE_MAX = 20
+
+
+def _cache_key(ticker: str, model_type: str, groups: list, version: str) -> str:
+    """Cache anahtarı: ticker@veri sürümü + model tipi + feature grupları (sıralı, tekrar eden girişlerden bağımsız)."""
+    return f"{ticker}@{version}|{model_type}|{'_'.join(sorted(groups))}"
 
 
-def _cache_key(ticker: str, model_type: str, groups: list) -> str:
-    """Cache anahtarı: ticker + model tipi + feature grupları (sıralı, tekrar eden girişlerden bağımsız)."""
-    return f"{ticker}|{model_type}|{'_'.join(sorted(groups))}"
+def _cache_put(cache: dict, key: str, value: dict):
+    """Kaydı ekle; aynı ticker'ın eski sürümlü kayıtlarını at, boyut sınırını aşarsa en az kullanılanı sil."""
+    head, _, _ = key.partition("|")
+    prefix = head.partition("@")[0] + "@"
+    for k in [k for k in cache if k.startswith(prefix) and not k.startswith(head + "|")]:
+        del cache[k]
+    value["at"] = time.time()
+    cache[key] = value
+    if len(cache) > _MODEL_CACHE_MAX:
+        oldest = min(cache, key=lambda k: cache[k]["at"])
+        del cache[oldest]
 
 
 def _get_cached_model(key: str):
-    """Cache'te varsa ve TTL dolmamışsa modeli döndür, yoksa None."""
+    """Cache'te varsa modeli döndür, yoksa None."""
     entry = _MODEL_CACHE.get(key)
-    if entry and (time.time() - entry["at"]) < _MODEL_CACHE_TTL:
+    if entry:
+        entry["at"] = time.time()
         print(f"[trainer] Cache HIT: {key}")
-        return entry
-    return None
+    return entry
+
+
+def _set_cached_model(key: str, model, sc, feat_set: list, fast=None):
+    _cache_put(_MODEL_CACHE, key, {"model": model, "sc": sc, "feat_set": feat_set,
+                                   "fast": fast})
+
+
+def snapshot_models(path: str) -> int:
+    """Eğitilmiş modelleri ve tahmin sonuçlarını tek bir pickle'a yazar (LSTM cache'lenmez)."""
+    snap = {"models": dict(_MODEL_CACHE), "forecasts": dict(_FORECAST_CACHE)}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as fh:
+        pickle.dump(snap, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return len(snap["models"]) + len(snap["forecasts"])
 
 
-def _set_cached_model(key: str, model, sc, feat_set: list):
-    """Modeli cache'e kaydet. Cache 20'yi geçerse en eski modeli sil."""
-    _MODEL_CACHE[key] = {"model": model, "sc": sc, "feat_set": feat_set, "at": time.time()}
-    if len(_MODEL_CACHE) > 20:
-        oldest = min(_MODEL_CACHE, key=lambda k: _MODEL_CACHE[k]["at"])
-        del _MODEL_CACHE[oldest]
+def restore_models(path: str) -> int:
+    """
+    Snapshot'taki modelleri cache'e geri koyar. Yalnızca anahtarındaki veri
+    sürümü ticker'ın şu anki data_version'ı ile aynı olanlar alınır; böylece
+    eski veriyle eğitilmiş bir model hiçbir zaman sunulmaz.
+    """
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(path, "rb") as fh:
+            snap = pickle.load(fh)
+    except Exception as e:
+        print(f"[trainer] model snapshot okunamadı: {e}")
+        return 0
+    n = 0
+    for cache, entries in ((_MODEL_CACHE, snap.get("models", {})),
+                           (_FORECAST_CACHE, snap.get("forecasts", {}))):
+        for key, entry in entries.items():
+            ticker, _, version = key.partition("|")[0].partition("@")
+            if key not in cache and version == data_version(ticker):
+                _cache_put(cache, key, entry)
+                n += 1
+    print(f"[trainer] snapshot'tan {n} model/tahmin geri yüklendi")
+    return n
 
 
 # ──────────────────────────────────────────────────────────────
-#  YARDIMCI: Geçmiş pencereden feature satırı hesapla
-#  (Gelecek tahmininde tarihi DataFrame olmadığından bu fonksiyon
-#   sadece fiyat listelerini kullanarak gösterge hesaplar.)
+#  MODEL KURULUMU — LSTM dışındaki tipler. Direct modda aynı tip her
+#  ufuk için ayrı hedefle (aynı X ile) tekrar eğitilir.
 # ──────────────────────────────────────────────────────────────
-def _compute_row(
-    p: list, h: list, lo: list, v: list, feat_cols: list
-) -> dict:
-    n = len(p)
-
-    def s(lst, w):
-        w = min(w, len(lst))
-        return float(np.mean(lst[-w:])) if w > 0 else float(lst[-1])
-
-    def sd(lst, w):
-        w = min(w, len(lst))
-        a = lst[-w:]
-        return float(np.std(a)) if len(a) > 1 else 0.0
-
-    def ewm_v(lst, span):
-        return float(pd.Series(lst).ewm(span=span, adjust=False).mean().iloc[-1])
-
-    def div(a, b, d=0.0):
-        return float(a / b) if b and b != 0 else d
-
-    cur = float(p[-1])
-    p1  = float(p[-2]) if n >= 2 else cur
-    p2  = float(p[-3]) if n >= 3 else p1
-    p5  = float(p[-6]) if n >= 6 else p1
-    p10 = float(p[-11]) if n >= 11 else p1
-    p20 = float(p[-21]) if n >= 21 else p1
-
-    p3   = float(p[-4]) if n >= 4 else p2
-
-    lr1  = np.log(cur/p1)  if p1  > 0 else 0.0
-    lr2  = np.log(cur/p2)  if p2  > 0 else 0.0
-    lr3  = np.log(cur/p3)  if p3  > 0 else 0.0
-    lr5  = div(np.log(cur/p5)  if p5  > 0 else 0, 5)
-    lr10 = div(np.log(cur/p10) if p10 > 0 else 0, 10)
-    lr20 = div(np.log(cur/p20) if p20 > 0 else 0, 20)
-
-    # RSI
-    def rsi_fn(per):
-        diffs = [p[-i]-p[-i-1] for i in range(1, min(per+2, n))]
-        if not diffs: return 50.0
-        g = np.mean([max(d, 0) for d in diffs])
-        l = np.mean([max(-d, 0) for d in diffs])
-        return 100 - 100/(1 + g/l) if l > 0 else 100.0
-
-    r7  = rsi_fn(7)
-    r14 = rsi_fn(14)
-    r21 = rsi_fn(21)
-
-    # MACD
-    e12 = ewm_v(p, 12); e26 = ewm_v(p, 26)
-    macd_v = div(e12-e26, cur)
-    sig    = macd_v * 0.85
-    macd_h = macd_v - sig
-
-    # Bollinger
-    s20 = s(p, 20); sd20 = sd(p, 20)
-    bbu = s20 + 2*sd20; bbl = s20 - 2*sd20
-    bb_p = div(cur-bbl, bbu-bbl, 0.5)
-    bb_w = div(bbu-bbl, s20)
-
-    # SMA/EMA uzaklıkları
-    ds = {w: div(cur - s(p, w), s(p, w)) for w in [5, 10, 20, 50, 100]}
-    de = {sp: div(cur - ewm_v(p, sp), ewm_v(p, sp)) for sp in [9, 21]}
-
-    # Volatilite
-    lrs  = [np.log(p[-i]/p[-i-1]) for i in range(1, min(22, n)) if p[-i-1] > 0]
-    vol5  = float(np.std(lrs[-5:]))  if len(lrs) >= 5  else 0.0
-    vol10 = float(np.std(lrs[-10:])) if len(lrs) >= 10 else 0.0
-    vol20 = float(np.std(lrs[-20:])) if len(lrs) >= 20 else 0.0
-    rvol  = vol20 * np.sqrt(252)
-    vrat  = div(vol10, vol20, 1.0)
-
-    # ATR
-    hi = float(h[-1]); li = float(lo[-1])
-    atr_v = [
-        max(h[-i]-lo[-i], abs(h[-i]-p[-i-1]), abs(lo[-i]-p[-i-1]))
-        for i in range(1, min(15, len(h)))
-    ]
-    atr14 = float(np.mean(atr_v)) if atr_v else 0.0
-    atr_p = div(atr14, cur)
-    atr_t = div(atr14, float(np.mean(atr_v[-14:])) if len(atr_v) >= 14 else atr14, 1.0)
-
-    # Stoch
-    hh14 = max(h[-14:]) if len(h) >= 14 else max(h)
-    ll14 = min(lo[-14:]) if len(lo) >= 14 else min(lo)
-    stk  = div(100*(cur-ll14), hh14-ll14, 50.0)
-    willr = div(-100*(hh14-cur), hh14-ll14, -50.0)
-
-    # CCI
-    tp = (hi + li + cur) / 3
-    tp_arr = [(h[-i]+lo[-i]+p[-i])/3 for i in range(1, min(21, n))]
-    tp_ma  = float(np.mean(tp_arr)) if tp_arr else tp
-    tp_md  = float(np.mean(np.abs(np.array(tp_arr) - tp_ma))) if tp_arr else 0.0
-    cci    = max(-300.0, min(300.0, div(tp-tp_ma, 0.015*tp_md)))
-
-    # ADX
-    pdms = [max(h[-i]-h[-i-1], 0) for i in range(1, min(15, len(h)-1))]
-    mdms = [max(lo[-i-1]-lo[-i], 0) for i in range(1, min(15, len(lo)-1))]
-    adxp = div(100*np.mean(pdms), atr14) if (pdms and atr14 > 0) else 0.0
-    adxm = div(100*np.mean(mdms), atr14) if (mdms and atr14 > 0) else 0.0
-
-    # ROC
-    def roc(w):
-        ref = p[-w-1] if n > w else p[0]
-        return div(cur-ref, ref) * 100
-
-    # Hacim
-    vc   = float(v[-1])
-    vs   = s(v, 14)
-    vs50 = s(v, 50)
-    vr   = min(div(vc, vs, 1.0), 10.0)
-    vtr  = min(div(vs, vs50, 1.0), 5.0)
-    pvc  = max(-5.0, min(5.0, lr1 * vr))
-
-    # Pattern
-    hlp = div(hi-li, cur)
-    oc  = div(cur - float(p[-1]), cur)
-
-    # 52 haftalık
-    hi52 = max(p[-252:]) if n >= 252 else max(p)
-    lo52 = min(p[-252:]) if n >= 252 else min(p)
-
-    # Eğim
-    sm20c  = s(p, 20)
-    sm20p  = float(np.mean(p[-25:-5])) if n >= 25 else sm20c
-    sm50c  = s(p, 50)
-    sm50p  = float(np.mean(p[-55:-5])) if n >= 55 else sm50c
-    sl20   = div(sm20c-sm20p, sm20p)
-    sl50   = div(sm50c-sm50p, sm50p)
-
-    row = {
-        "lr_1":lr1, "lr_2":lr2, "lr_3":lr3, "lr_5":lr5, "lr_10":lr10, "lr_20":lr20,
-        "rsi_7":r7, "rsi_14":r14, "rsi_21":r21, "rsi_diff":r14-r7, "rsi_mom":r14-r21,
-        "macd":macd_v, "macd_sig":sig, "macd_hist":macd_h, "macd_mom":macd_v*0.05,
-        "bb_pct":bb_p, "bb_width":bb_w,
-        "dist_sma5":ds[5], "dist_sma10":ds[10], "dist_sma20":ds[20],
-        "dist_sma50":ds[50], "dist_sma100":ds[100],
-        "dist_ema9":de[9], "dist_ema21":de[21],
-        "vol_5d":vol5, "vol_10d":vol10, "vol_20d":vol20, "rvol_20":rvol, "vol_ratio":vrat,
-        "atr_pct":atr_p, "atr_trend":atr_t,
-        "stoch_k":stk, "stoch_d":stk, "stoch_diff":0.0,
-        "willr":willr, "cci":cci,
-        "adx_plus":adxp, "adx_minus":adxm, "adx_diff":adxp-adxm,
-        "roc_3":roc(3), "roc_5":roc(5), "roc_10":roc(10), "roc_20":roc(20),
-        "v_ratio":vr, "v_trend":vtr, "pv_corr":pvc,
-        "hl_pct":hlp, "open_close":oc,
-        "dist_52w_high":div(cur-hi52, cur), "dist_52w_low":div(cur-lo52, cur),
-        "sma20_slope":sl20, "sma50_slope":sl50,
-    }
-    return {k: row.get(k, 0.0) for k in feat_cols}
+def _fit_estimator(model_type: str, X_tr, y_tr, X_te, y_te):
+    """Eğitilmiş model; bilinmeyen tipte None."""
+    eval_set = [(X_te, y_te)] if len(X_te) else None
+    if model_type == "LINEAR":
+        # Ridge regresyon: L2 regularizasyonlu lineer model.
+        model = Ridge(alpha=2.0)
+        model.fit(X_tr, y_tr)
+
+    elif model_type == "RANDOM_FOREST":
+        # 100 bağımsız karar ağacı eğitilir; sonuçların ortalaması tahmin olur.
+        model = RandomForestRegressor(
+            n_estimators=100, max_depth=8, min_samples_leaf=5,
+            n_jobs=1, random_state=42
+        )
+        model.fit(X_tr, y_tr)
+
+    elif model_type == "EXTRA_TREES":
+        # Random Forest'a benzer ama bölünme noktaları tamamen rastgele seçilir.
+        model = ExtraTreesRegressor(
+            n_estimators=100, max_depth=8, min_samples_leaf=5,
+            n_jobs=1, random_state=42
+        )
+        model.fit(X_tr, y_tr)
+
+    elif model_type == "GRADIENT_BOOST":
+        # Her yeni ağaç önceki ağacın hatasını düzeltmeye çalışır.
+        model = GradientBoostingRegressor(
+            n_estimators=150, learning_rate=0.05, max_depth=4,
+            subsample=0.8, min_samples_leaf=5, random_state=42
+        )
+        model.fit(X_tr, y_tr)
+
+    elif model_type == "XGBOOST":
+        if not HAS_XGB:
+            raise ImportError("xgboost kurulu değil — requirements.txt'e ekle")
+        # XGBoost: en popüler ML yarışma algoritması.
+        model = xgb.XGBRegressor(
+            n_estimators=200, learning_rate=0.05, max_depth=5,
+            subsample=0.8, colsample_bytree=0.8, reg_lambda=2.0,
+            random_state=42, verbosity=0, n_jobs=1
+        )
+        model.fit(X_tr, y_tr, eval_set=eval_set, verbose=False)
+
+    elif model_type == "LIGHTGBM":
+        if not HAS_LGB:
+            raise ImportError("lightgbm kurulu değil — requirements.txt'e ekle")
+        # LightGBM: büyük veri setleri için XGBoost alternatifi.
+        model = lgb.LGBMRegressor(
+            n_estimators=200, learning_rate=0.05, num_leaves=31,
+            min_child_samples=20, reg_lambda=2.0,
+            random_state=42, verbose=-1, n_jobs=1
+        )
+        model.fit(X_tr, y_tr, eval_set=eval_set)
+
+    else:
+        return None
+    return model
+
+
+def _test_metrics(model, X_te, y_te) -> dict:
+    """Test setinde 1 günlük getiri tahmini: RMSE, MAE ve yön isabeti."""
+    if len(X_te) == 0:
+        return {}
+    err = np.ravel(model.predict(X_te)) - y_te
+    hit = np.mean(np.sign(err + y_te) == np.sign(y_te))
+    return {"rmse": round(float(np.sqrt(np.mean(err**2))), 6),
+            "mae":  round(float(np.mean(np.abs(err))), 6),
+            "hit_rate": round(float(hit), 4), "test_rows": int(len(y_te))}
+
+
+def _cum_target(y: np.ndarray, k: int) -> np.ndarray:
+    """Her satırdan itibaren k günlük birikimli log getiri (son k-1 satır NaN)."""
+    cs  = np.concatenate(([0.0], np.cumsum(y)))
+    out = np.full(len(y), np.nan)
+    out[:len(y) - k + 1] = cs[k:] - cs[:len(y) - k + 1]
+    return out
 
 
 # ──────────────────────────────────────────────────────────────
 #  ANA FONKSİYON
 # ──────────────────────────────────────────────────────────────
 VALID_HORIZONS = {7, 14, 30, 90}   # desteklenen tahmin periyotları (gün)
+VALID_MODES    = {"recursive", "direct"}
+DIRECT_STEPS   = (1, 7, 14, 30, 90)  # direct modda model eğitilen ufuklar (gün)
 
 
 def train_and_predict_dynamic(
@@ -236,20 +223,50 @@ def train_and_predict_dynamic(
     model_type: str,
     selected_feature_groups: list,
     horizon: int = 14,
+    mode: str = "recursive",
+    progress: Optional[Callable[[str, float], None]] = None,
 ) -> tuple:
+    """
+    mode="recursive": 1 günlük model, her tahmini sentetik bar olarak ekleyip
+    horizon adım ilerler. mode="direct": DIRECT_STEPS ufuklarının her biri
+    için birikimli getiriyi doğrudan tahmin eden modeller; tahmin süresi ufuk
+    uzunluğundan bağımsızdır.
+    progress(aşama, oran): iş kuyruğu için aşama bildirimi (data/training/
+    backtest/forecast, 0..1).
+    """
+    report = progress or (lambda stage, pct: None)
     if horizon not in VALID_HORIZONS:
         horizon = 14   # geçersiz değer gelirse varsayılana dön
-
-    # ── Adım 1: Veriyi al ───────────────────────────────────────────────────
-    df = get_processed_data(ticker)
+    if mode not in VALID_MODES:
+        mode = "recursive"
+    if mode == "direct" and model_type == "LSTM":
+        print("[trainer] LSTM direct modu desteklemiyor — recursive kullanılıyor")
+        mode = "recursive"
+    direct = mode == "direct"
+
+    # ── Adım 1: Veriyi al (yalnızca seçilen feature grupları hesaplanır) ──
+    report("data", 0.05)
+    groups = selected_feature_groups if selected_feature_groups else DEFAULT_GROUPS
+    df = get_processed_data(ticker, groups=groups)
     if df is None or df.empty:
         print(f"[trainer] {ticker}: veri alınamadı")
         return None, None
 
+    # Aynı veri sürümü + parametrelerle üretilmiş tahmin varsa aynen döndür
+    c_key   = _cache_key(ticker, model_type, groups, data_version(ticker, df))
+    m_key   = f"{c_key}|direct" if direct else c_key
+    f_key   = f"{m_key}|{horizon}"
+    hit     = _FORECAST_CACHE.get(f_key)
+    if hit:
+        hit["at"] = time.time()
+        print(f"[trainer] Tahmin cache HIT: {f_key}")
+        return hit["result"]
+
     # ── Adım 2: Feature seçimi ───────────────────────────────────────────────
-    groups   = selected_feature_groups if selected_feature_groups else DEFAULT_GROUPS
+    # Sütun sırası cache anahtarındaki gibi sıralı gruplardan gelir; aynı
+    # anahtara farklı sırayla gelen istek modele sütunları kaydırarak vermesin
     feat_set = []
-    for g in groups:
+    for g in sorted(groups):
         for col in FEATURE_GROUPS.get(g, []):
             if col in df.columns and col not in feat_set:
                 feat_set.append(col)
@@ -259,6 +276,8 @@ def train_and_predict_dynamic(
 
     if len(feat_set) < 3:
         print("[trainer] yetersiz feature — DEFAULT_GROUPS kullanılıyor")
+        fallback = get_processed_data(ticker, groups=DEFAULT_GROUPS)
+        df = fallback if fallback is not None else df
         feat_set = []
         for g in DEFAULT_GROUPS:
             for col in FEATURE_GROUPS.get(g, []):
@@ -268,33 +287,45 @@ def train_and_predict_dynamic(
             return None, None
 
     # ── Adım 3: X (özellikler) ve y (hedef) hazırla ─────────────────────────
-    X_df   = df[feat_set].copy()
-    y_s    = df["target_lr"].copy()
-    valid  = X_df.notna().all(axis=1) & y_s.notna()   
-    X_df   = X_df[valid]
-    y_s    = y_s[valid]
-    closes = df.loc[valid, "Close"]
-
-    if len(X_df) < 100:
-        print(f"[trainer] az satır: {len(X_df)}")
+    # Cache'teki bloktan tek toplama ile (ara DataFrame kopyaları olmadan)
+    X      = feature_values(df, feat_set, dtype=float)
+    y      = df["target_lr"].to_numpy(dtype=float)
+    valid  = ~np.isnan(X).any(axis=1) & ~np.isnan(y)
+    closes = df["Close"]
+    if not valid.all():
+        X, y, closes = X[valid], y[valid], closes[valid]
+
+    if len(X) < 100:
+        print(f"[trainer] az satır: {len(X)}")
         return None, None
 
-    X = X_df.values.astype(float)
-    y = y_s.values.astype(float)
-
     # ── Adım 4: Eğitim/Test bölünmesi (%90 eğitim, %10 test) ───────────────
     split    = int(len(X) * 0.90)
     close_te = closes.values[split:]  
 
     # ── Adım 5: Cache kontrolü ──────────────────────────────────────────────
-    c_key   = _cache_key(ticker, model_type, groups)
-    cached  = _get_cached_model(c_key)
+    cached  = _get_cached_model(m_key)
     is_lstm = model_type == "LSTM"
+    if cached is None and not is_lstm:
+        # Bellekte yoksa diskteki kayıt (yeniden başlatma / başka worker)
+        cached = model_registry.load(m_key)
+        if cached is not None:
+            _cache_put(_MODEL_CACHE, m_key, cached)
+    if cached and cached["feat_set"] != feat_set:
+        if set(cached["feat_set"]) == set(feat_set):
+            # Sıralama öncesi yazılmış kayıt: X'i modelin sütun sırasına getir
+            X = X[:, [feat_set.index(c) for c in cached["feat_set"]]]
+        else:
+            cached = None
 
     if cached:
         model    = cached["model"]
+        models   = cached.get("models")
         sc       = cached["sc"]
         feat_set = cached["feat_set"]
+        if "fast" not in cached:                 # eski snapshot'tan gelen kayıt
+            cached["fast"] = compile_predictor(model, sc, X[-32:])
+        fast     = cached["fast"]
         X_sc     = sc.transform(X)
         X_tr, y_tr = X_sc[:split], y[:split]
         X_te, y_te = X_sc[split:], y[split:]
@@ -304,61 +335,12 @@ def train_and_predict_dynamic(
         X_tr, y_tr = X_sc[:split], y[:split]
         X_te, y_te = X_sc[split:], y[split:]
         model    = None
+        t_fit    = time.perf_counter()
+        report("training", 0.2)
 
         # ── Adım 6: Model eğitimi ────────────────────────────────────────────
         try:
-            if model_type == "LINEAR":
-                # Ridge regresyon: L2 regularizasyonlu lineer model.
-                model = Ridge(alpha=2.0)
-                model.fit(X_tr, y_tr)
-
-            elif model_type == "RANDOM_FOREST":
-                # 100 bağımsız karar ağacı eğitilir; sonuçların ortalaması tahmin olur.
-                model = RandomForestRegressor(
-                    n_estimators=100, max_depth=8, min_samples_leaf=5,
-                    n_jobs=1, random_state=42
-                )
-                model.fit(X_tr, y_tr)
-
-            elif model_type == "EXTRA_TREES":
-                # Random Forest'a benzer ama bölünme noktaları tamamen rastgele seçilir.
-                model = ExtraTreesRegressor(
-                    n_estimators=100, max_depth=8, min_samples_leaf=5,
-                    n_jobs=1, random_state=42
-                )
-                model.fit(X_tr, y_tr)
-
-            elif model_type == "GRADIENT_BOOST":
-                # Her yeni ağaç önceki ağacın hatasını düzeltmeye çalışır.
-                model = GradientBoostingRegressor(
-                    n_estimators=150, learning_rate=0.05, max_depth=4,
-                    subsample=0.8, min_samples_leaf=5, random_state=42
-                )
-                model.fit(X_tr, y_tr)
-
-            elif model_type == "XGBOOST":
-                if not HAS_XGB:
-                    raise ImportError("xgboost kurulu değil — requirements.txt'e ekle")
-                # XGBoost: en popüler ML yarışma algoritması.
-                model = xgb.XGBRegressor(
-                    n_estimators=200, learning_rate=0.05, max_depth=5,
-                    subsample=0.8, colsample_bytree=0.8, reg_lambda=2.0,
-                    random_state=42, verbosity=0, n_jobs=1
-                )
-                model.fit(X_tr, y_tr, eval_set=[(X_te, y_te)], verbose=False)
-
-            elif model_type == "LIGHTGBM":
-                if not HAS_LGB:
-                    raise ImportError("lightgbm kurulu değil — requirements.txt'e ekle")
-                # LightGBM: büyük veri setleri için XGBoost alternatifi.
-                model = lgb.LGBMRegressor(
-                    n_estimators=200, learning_rate=0.05, num_leaves=31,
-                    min_child_samples=20, reg_lambda=2.0,
-                    random_state=42, verbose=-1, n_jobs=1
-                )
-                model.fit(X_tr, y_tr, eval_set=[(X_te, y_te)])
-
-            elif model_type == "LSTM":
+            if model_type == "LSTM":
                 if not HAS_TF:
                     raise ImportError("tensorflow kurulu değil — Render free 512MB'a sığmayabilir")
                 is_lstm = True
@@ -390,7 +372,20 @@ def train_and_predict_dynamic(
                     verbose=0,
                 )
 
+            elif direct:
+                # Her ufuk için birikimli getiri hedefiyle ayrı model (aynı X)
+                models = {}
+                for k in DIRECT_STEPS:
+                    yk = _cum_target(y, k)
+                    tr, te = ~np.isnan(yk[:split]), ~np.isnan(yk[split:])
+                    models[k] = _fit_estimator(model_type, X_tr[tr], yk[:split][tr],
+                                               X_te[te], yk[split:][te])
+                model = models[1]
+
             else:
+                model = _fit_estimator(model_type, X_tr, y_tr, X_te, y_te)
+
+            if model is None:
                 print(f"[trainer] bilinmeyen model: {model_type}")
                 return None, None
 
@@ -399,10 +394,20 @@ def train_and_predict_dynamic(
             traceback.print_exc()
             return None, None
 
-        if not is_lstm:
-            _set_cached_model(c_key, model, sc, feat_set)
+        if direct:
+            fast = {k: compile_predictor(m, sc, X[-32:]) for k, m in models.items()}
+            _cache_put(_MODEL_CACHE, m_key, {"model": model, "models": models, "sc": sc,
+                                             "feat_set": feat_set, "fast": fast})
+        elif not is_lstm:
+            fast = compile_predictor(model, sc, X[-32:])
+            _set_cached_model(m_key, model, sc, feat_set, fast)
+        entry = None if is_lstm else _MODEL_CACHE.get(m_key)
+        if entry is not None:
+            model_registry.save(m_key, entry, time.perf_counter() - t_fit,
+                                len(X_tr), _test_metrics(model, X_te, y_te))
 
     # ── Adım 7: Backtest (test seti üzerinde geriye dönük değerlendirme) ────
+    report("backtest", 0.8)
     try:
         if is_lstm:
             seq_len = 15
@@ -429,53 +434,55 @@ def train_and_predict_dynamic(
         traceback.print_exc()
         bt_pred=[]; bt_actual=[]; bt_dates=[]
 
-    # ── Adım 8: Gelecek tahmin — rolling window yöntemi ────────────────────
-    # Son 80 günü başlangıç penceresi olarak al; her adımda tahmini listeye ekle
-    # ve bir sonraki adım için bu tahmini fiyatmış gibi kullan.
-    ph = list(df["Close"].values[-80:].astype(float))   # geçmiş kapanış fiyatları
-    hh = list(df["High"].values[-80:].astype(float))    # geçmiş yüksek fiyatlar
-    lh = list(df["Low"].values[-80:].astype(float))     # geçmiş düşük fiyatlar
-    vh = list(df["Volume"].values[-80:].astype(float))  # geçmiş hacim verileri
-
-    last   = ph[-1]
+    # ── Adım 8: Gelecek tahmin ──────────────────────────────────────────────
+    # recursive: artımlı gösterge motoru çerçevenin son barından kurulur; her
+    # adımda tahmin edilen fiyat sentetik bir bar olarak eklenir ve feature
+    # satırı (eğitimdekiyle aynı formüller) sabit zamanda güncellenir.
+    # direct: her ufuk modeli son satırdan o güne kadarki birikimli log
+    # getiriyi verir, ara günler doğrusal interpolasyonla doldurulur.
+    report("forecast", 0.9)
+    state  = None if direct else indicator_state(ticker, df)
+    last   = float(df["Close"].iloc[-1])
     future = []
-
-    if is_lstm:
+    row    = np.empty(len(feat_set))              # adımlar arasında tek tampon
+
+    def push(nxt: float):
+        # Sentetik bar: açılış önceki kapanış, ±%0.5 aralık, son 5 günün ortalama hacmi
+        state.push(last, nxt*1.005, nxt*0.995, nxt, state.mean_volume(5))
+
+    if direct:
+        ks, cum = [k for k in DIRECT_STEPS if k <= horizon], []
+        for k in ks:
+            f = fast.get(k)
+            r = f(X[-1]) if f else models[k].predict(X_sc[-1:])[0]
+            cum.append(float(np.clip(r, -0.15*k, 0.15*k)))
+        path   = np.interp(np.arange(1, horizon + 1), [0] + ks, [0.0] + cum)
+        future = [last * float(np.exp(c)) for c in path]
+    elif is_lstm:
         seq_len = 15
-        seq_rows = []
-        for i in range(seq_len):
-            idx  = -(seq_len - i)
-            ph_i = ph[:len(ph)+idx+1]
-            if len(ph_i) < 2:
-                ph_i = [ph[0]] * 2 + ph_i
-            row = _compute_row(ph_i, hh[:len(ph_i)], lh[:len(ph_i)], vh[:len(ph_i)], feat_set)
-            rdf = pd.DataFrame([row])[feat_set]
-            seq_rows.append(sc.transform(rdf.values)[0])
-        seq_arr = np.array(seq_rows)
+        seq_arr = X_sc[-seq_len:]
 
         for _ in range(horizon):
             inp   = seq_arr[-seq_len:][np.newaxis]
             lr_p  = float(np.clip(model.predict(inp, verbose=0).flatten()[0], -0.15, 0.15))
             nxt   = last * np.exp(lr_p)
             future.append(nxt)
-            ph.append(nxt); hh.append(nxt*1.005); lh.append(nxt*0.995)
-            vh.append(float(np.mean(vh[-5:]))); last = nxt
-            row = _compute_row(ph, hh, lh, vh, feat_set)
-            rdf = pd.DataFrame([row])[feat_set]
-            seq_arr = np.vstack([seq_arr, sc.transform(rdf.values)[0]])
+            push(nxt); last = nxt
+            np.nan_to_num(state.row(feat_set, out=row), copy=False)
+            seq_arr = np.vstack([seq_arr, sc.transform(row[np.newaxis])[0]])
     else:
+        # Derlenmiş tahminci (inference.py) 1 satırda predict'in sabit maliyetini atlar
+        predict = fast or (lambda r: model.predict(sc.transform(r[np.newaxis]))[0])
         for step in range(horizon):
             try:
-                row  = _compute_row(ph, hh, lh, vh, feat_set)
-                rdf  = pd.DataFrame([row])[feat_set]
-                lr_p = float(np.clip(model.predict(sc.transform(rdf.values))[0], -0.15, 0.15))
+                np.nan_to_num(state.row(feat_set, out=row), copy=False)
+                lr_p = float(np.clip(predict(row), -0.15, 0.15))
                 nxt  = last * np.exp(lr_p)
             except Exception as e:
                 print(f"[trainer] gelecek adım {step}: {e}")
                 nxt = last
             future.append(nxt)
-            ph.append(nxt); hh.append(nxt*1.005); lh.append(nxt*0.995)
-            vh.append(float(np.mean(vh[-5:]))); last = nxt
+            push(nxt); last = nxt
 
     if not future:
         print("[trainer] gelecek tahmin üretilemedi")
@@ -493,4 +500,6 @@ def train_and_predict_dynamic(
         "predicted_prices": bt_pred   + future,
         "horizon":          horizon,
     }
+    if not is_lstm:
+        _cache_put(_FORECAST_CACHE, f_key, {"result": (future, chart)})
     return future, chart
@@ -0,0 +1,421 @@
+from __future__ import annotations
+
+import math
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter; HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+# ──────────────────────────────────────────────────────────────
+#  GÖSTERGE ÇEKİRDEKLERİ — data_manager._indicators bunları kullanır.
+#  Hepsi 1-D float64 dizi alır/döndürür; pandas'ın rolling/ewm
+#  davranışını (ısınma satırlarında NaN, min_periods=pencere) birebir
+#  taklit eder, satır başına Python geri çağrısı yoktur.
+# ──────────────────────────────────────────────────────────────
+
+def _nan_window_mask(x: np.ndarray, w: int) -> np.ndarray:
+    """Penceresi dolmamış ya da NaN içeren satırlar için True."""
+    bad = np.concatenate(([0], np.cumsum(np.isnan(x))))
+    cnt = bad[w:] - bad[:-w]
+    mask = np.ones(len(x), dtype=bool)
+    mask[w - 1:] = cnt > 0
+    return mask
+
+
+def shift(x: np.ndarray, k: int) -> np.ndarray:
+    out = np.full(len(x), np.nan)
+    if k >= 0:
+        out[k:] = x[:len(x) - k]
+    else:
+        out[:k] = x[-k:]
+    return out
+
+
+def diff(x: np.ndarray, k: int = 1) -> np.ndarray:
+    return x - shift(x, k)
+
+
+def safe_div(a, b):
+    """a / b; payda 0 ise NaN (pandas'taki .replace(0, np.nan) karşılığı)."""
+    b = np.asarray(b, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return a / np.where(b == 0, np.nan, b)
+
+
+def rolling_mean(x: np.ndarray, w: int) -> np.ndarray:
+    """Önek toplamlarıyla O(n) hareketli ortalama."""
+    n = len(x)
+    if n < w:
+        return np.full(n, np.nan)
+    finite = x[np.isfinite(x)]
+    ref = finite[0] if len(finite) else 0.0          # sayısal hassasiyet için merkezle
+    cs = np.concatenate(([0.0], np.cumsum(np.where(np.isnan(x), 0.0, x - ref))))
+    out = np.empty(n)
+    out[w - 1:] = (cs[w:] - cs[:-w]) / w + ref
+    out[_nan_window_mask(x, w)] = np.nan
+    return out
+
+
+def rolling_std(x: np.ndarray, w: int) -> np.ndarray:
+    """
+    Örneklem standart sapması (ddof=1). Önek kareler toplamı fiyat
+    serilerinde ciddi iptal hatası ürettiğinden pencere görünümü üzerinde
+    iki geçişli hesap yapılır; pencereler kısa (≤20) olduğundan maliyet O(n).
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < w:
+        return out
+    win = sliding_window_view(x, w)
+    out[w - 1:] = win.std(axis=1, ddof=1)
+    out[_nan_window_mask(x, w)] = np.nan
+    return out
+
+
+def _rolling_extreme(x: np.ndarray, w: int, op) -> np.ndarray:
+    """
+    van Herk / Gil-Werman: blok içi önek ve sonek birikimli ekstremumlar
+    ile her pencere iki değerin karşılaştırılmasına iner → O(n), vektörel.
+    """
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < w:
+        return out
+    pad = (-n) % w
+    fill = -np.inf if op is np.maximum else np.inf
+    xp = np.concatenate((x, np.full(pad, fill))).reshape(-1, w)
+    pre = op.accumulate(xp, axis=1).ravel()
+    suf = op.accumulate(xp[:, ::-1], axis=1)[:, ::-1].ravel()
+    out[w - 1:] = op(suf[:n - w + 1], pre[w - 1:n])
+    out[_nan_window_mask(x, w)] = np.nan
+    return out
+
+
+def rolling_max(x: np.ndarray, w: int) -> np.ndarray:
+    return _rolling_extreme(x, w, np.maximum)
+
+
+def rolling_min(x: np.ndarray, w: int) -> np.ndarray:
+    return _rolling_extreme(x, w, np.minimum)
+
+
+def rolling_mad(x: np.ndarray, w: int) -> np.ndarray:
+    """Pencere ortalamasından ortalama mutlak sapma (CCI için)."""
+    n = len(x)
+    out = np.full(n, np.nan)
+    if n < w:
+        return out
+    win = sliding_window_view(x, w)
+    out[w - 1:] = np.abs(win - win.mean(axis=1, keepdims=True)).mean(axis=1)
+    out[_nan_window_mask(x, w)] = np.nan
+    return out
+
+
+def ewm(x: np.ndarray, span: int, seed: float | None = None) -> np.ndarray:
+    """
+    adjust=False üstel ortalama: y[t] = a·x[t] + (1-a)·y[t-1].
+    seed verilmezse y[0] = x[0] (pandas ile aynı); verilirse özyineleme
+    bir önceki barın değerinden devam eder. Girdi NaN içermemelidir.
+    """
+    if len(x) == 0:
+        return np.empty(0)
+    a = 2.0 / (span + 1.0)
+    prev = x[0] if seed is None else seed
+    if HAS_SCIPY:
+        y, _ = lfilter([a], [1.0, a - 1.0], x, zi=[(1.0 - a) * prev])
+        return y
+    y = np.empty(len(x))
+    for i, xi in enumerate(x):
+        prev = a * xi + (1.0 - a) * prev
+        y[i] = prev
+    return y
+
+
+def rsi(c: np.ndarray, p: int) -> np.ndarray:
+    """Basit ortalamalı RSI; ısınma ve kayıpsız pencerelerde 50."""
+    d = diff(c)
+    g = rolling_mean(np.where(d > 0, d, 0.0), p)     # ilk (NaN) fark 0 sayılır
+    l = rolling_mean(np.where(d < 0, -d, 0.0), p)
+    r = 100 - 100 / (1 + safe_div(g, l))
+    return np.where(np.isnan(r), 50.0, r)
+
+
+# ──────────────────────────────────────────────────────────────
+#  ARTIMLI GÖSTERGE MOTORU — tahmin döngüsü her adımda tek bir sentetik
+#  bar ekler. IndicatorState, _indicators'ın ürettiği feature'ların son
+#  satırını (aynı formüllerle) kayan toplamlar, monoton deque'ler ve EWM
+#  özyinelemesiyle günceller; adım maliyeti geçmiş uzunluğundan bağımsızdır.
+# ──────────────────────────────────────────────────────────────
+
+def _div(a: float, b: float) -> float:
+    """safe_div'in skaler karşılığı: payda 0 ise NaN."""
+    return a / b if b != 0 else math.nan
+
+
+def _clip(x: float, lo: float, hi: float) -> float:
+    return x if x != x else min(max(x, lo), hi)          # NaN olduğu gibi kalır
+
+
+def _nz(x: float, fill: float) -> float:
+    return fill if x != x else x
+
+
+class _Window:
+    """
+    Son w değerin kayan toplamı: ortalama O(1). Toplam her w adımda
+    math.fsum ile yeniden kurulur, böylece yuvarlama hatası birikmez.
+    std/MAD iki geçişlidir (pencereler ≤ 20).
+    """
+    __slots__ = ("w", "buf", "sum", "n")
+
+    def __init__(self, w: int):
+        self.w, self.buf, self.sum, self.n = w, deque(maxlen=w), 0.0, 0
+
+    def push(self, x: float):
+        if len(self.buf) == self.w:
+            self.sum -= self.buf[0]
+        self.buf.append(x)
+        self.n += 1
+        if self.n % self.w == 0:
+            self.sum = math.fsum(self.buf)
+        else:
+            self.sum += x
+
+    def full(self) -> bool:
+        return len(self.buf) == self.w
+
+    def mean(self) -> float:
+        return self.sum / self.w if self.full() else math.nan
+
+    def std(self) -> float:
+        if not self.full():
+            return math.nan
+        m = math.fsum(self.buf) / self.w
+        return math.sqrt(math.fsum((x - m) ** 2 for x in self.buf) / (self.w - 1))
+
+    def mad(self) -> float:
+        if not self.full():
+            return math.nan
+        m = math.fsum(self.buf) / self.w
+        return math.fsum(abs(x - m) for x in self.buf) / self.w
+
+
+class _Extreme:
+    """Monoton deque ile kayan maksimum (sign=1) / minimum (sign=-1), amortize O(1)."""
+    __slots__ = ("w", "sign", "q", "i")
+
+    def __init__(self, w: int, sign: int):
+        self.w, self.sign, self.q, self.i = w, sign, deque(), 0
+
+    def push(self, x: float):
+        q, s = self.q, self.sign
+        while q and s * q[-1][1] <= s * x:
+            q.pop()
+        q.append((self.i, x))
+        if q[0][0] <= self.i - self.w:
+            q.popleft()
+        self.i += 1
+
+    def value(self) -> float:
+        return self.q[0][1] if self.i >= self.w else math.nan
+
+
+def _lag(buf: deque, k: int) -> float:
+    """buf'taki son değerden k bar önceki değer (yoksa NaN)."""
+    return buf[-k - 1] if len(buf) > k else math.nan
+
+
+class IndicatorState:
+    """
+    data_manager._indicators ile birebir aynı feature'ları bar bar üreten
+    durum. from_history ile geçmişin kuyruğundan bir kez kurulur; push yeni
+    barı ekler, row(cols) son barın feature satırını cols sırasıyla verir.
+    """
+    _EWM_SPANS = (9, 12, 21, 26)
+    _RSI_PERIODS = (7, 14, 21)
+
+    def __init__(self, ewm_seed: dict, prev: tuple):
+        """
+        ewm_seed: ilk push'tan bir önceki bardaki EWM değerleri
+                  ("ema9", "ema12", "ema21", "ema26", "macd_sig").
+        prev:     aynı barın (close, high, low) değerleri.
+        """
+        self.ema = {sp: float(ewm_seed[f"ema{sp}"]) for sp in self._EWM_SPANS}
+        self.sig = float(ewm_seed["macd_sig"])
+        self.pc, self.ph, self.pl = (float(x) for x in prev)
+        self.bar: tuple = ()
+
+        self.closes = deque([self.pc], maxlen=21)     # roc/lr_w için 20 bar geri
+        self.lrs    = deque(maxlen=3)
+        self.macds  = deque(maxlen=4)
+        self.rsi14s = deque(maxlen=6)
+        self.s20s   = deque(maxlen=6)
+        self.s50s   = deque(maxlen=6)
+        self.vols   = deque(maxlen=5)
+
+        self.c_win  = {w: _Window(w) for w in (5, 10, 20, 50, 100)}
+        self.lr_win = {w: _Window(w) for w in (5, 10, 20)}
+        self.gain   = {p: _Window(p) for p in self._RSI_PERIODS}
+        self.loss   = {p: _Window(p) for p in self._RSI_PERIODS}
+        self.tr14, self.atr14s = _Window(14), _Window(14)
+        self.pdm14, self.mdm14 = _Window(14), _Window(14)
+        self.stk3, self.tp20   = _Window(3), _Window(20)
+        self.v14, self.v50     = _Window(14), _Window(50)
+        self.hh14, self.ll14   = _Extreme(14, 1), _Extreme(14, -1)
+        self.hi252, self.lo252 = _Extreme(252, 1), _Extreme(252, -1)
+
+    @classmethod
+    def from_history(cls, o, h, lo, c, v, tail: int = 300) -> "IndicatorState":
+        """
+        Tam OHLCV geçmişinden kurar: EWM'ler baştan vektörel hesaplanıp kuyruk
+        başına kadar taşınır, son `tail` bar push edilir. tail ≥ 253 olduğunda
+        tüm pencereler (52 haftalık dahil) _indicators ile aynı değerleri verir.
+        """
+        o, h, lo, c, v = (np.asarray(x, dtype=float) for x in (o, h, lo, c, v))
+        if len(c) < 2:
+            raise ValueError("IndicatorState için en az 2 bar gerekli")
+        s = max(1, len(c) - tail)
+        ems = {sp: ewm(c[:s], sp) for sp in cls._EWM_SPANS}
+        with np.errstate(divide="ignore", invalid="ignore"):
+            macd = safe_div(ems[12] - ems[26], c[:s])
+        seed = {f"ema{sp}": e[-1] for sp, e in ems.items()}
+        seed["macd_sig"] = ewm(macd, 9)[-1]
+        st = cls(seed, (c[s - 1], h[s - 1], lo[s - 1]))
+        for i in range(s, len(c)):
+            st.push(o[i], h[i], lo[i], c[i], v[i])
+        return st
+
+    def push(self, o: float, h: float, lo: float, c: float, v: float):
+        """Yeni bir günlük bar ekler (sentetik tahmin barları dahil)."""
+        o, h, lo, c, v = float(o), float(h), float(lo), float(c), float(v)
+        pc = self.pc
+        r = c / pc if pc != 0 else math.nan
+        lr = math.log(r) if r > 0 else (-math.inf if r == 0 else math.nan)
+        self.lrs.append(lr); self.closes.append(c); self.vols.append(v)
+
+        d = c - pc
+        for p in self._RSI_PERIODS:
+            self.gain[p].push(d if d > 0 else 0.0)
+            self.loss[p].push(-d if d < 0 else 0.0)
+        self.rsi14s.append(self._rsi(14))
+
+        for sp in self._EWM_SPANS:
+            self.ema[sp] = self._ewm_step(sp, c, self.ema[sp])
+        macd = _div(self.ema[12] - self.ema[26], c)
+        self.sig = self._ewm_step(9, macd, self.sig)
+        self.macds.append(macd)
+
+        for win in self.c_win.values():
+            win.push(c)
+        self.s20s.append(self.c_win[20].mean()); self.s50s.append(self.c_win[50].mean())
+        for win in self.lr_win.values():
+            win.push(lr)
+
+        self.tr14.push(max(h - lo, abs(h - pc), abs(lo - pc)))
+        self.atr14s.push(self.tr14.mean())
+        self.hh14.push(h); self.ll14.push(lo)
+        hh, ll = self.hh14.value(), self.ll14.value()
+        self.stk3.push(_nz(100 * _div(c - ll, hh - ll), 50.0))
+        self.tp20.push((h + lo + c) / 3)
+        dh, dl = h - self.ph, self.pl - lo
+        self.pdm14.push(dh if dh > 0 else 0.0); self.mdm14.push(dl if dl > 0 else 0.0)
+        self.v14.push(v); self.v50.push(v)
+        self.hi252.push(c); self.lo252.push(c)
+
+        self.pc, self.ph, self.pl = c, h, lo
+        self.bar = (o, h, lo, c, v, lr)
+
+    @staticmethod
+    def _ewm_step(span: int, x: float, prev: float) -> float:
+        a = 2.0 / (span + 1.0)
+        return a * x + (1.0 - a) * prev
+
+    def _rsi(self, p: int) -> float:
+        return _nz(100 - 100 / (1 + _div(self.gain[p].mean(), self.loss[p].mean())), 50.0)
+
+    def mean_volume(self, k: int = 5) -> float:
+        """Son k barın ortalama hacmi (sentetik barların hacmi için)."""
+        vs = list(self.vols)[-k:]
+        return math.fsum(vs) / len(vs)
+
+    def features(self) -> dict:
+        """Son barın tüm feature değerleri (_indicators ile aynı ad ve formüller)."""
+        o, h, lo, c, v, lr = self.bar
+        cl, f = self.closes, {}
+
+        f["lr_1"] = lr; f["lr_2"] = _lag(self.lrs, 1); f["lr_3"] = _lag(self.lrs, 2)
+        for w in (5, 10, 20):
+            r = _div(c, _lag(cl, w))
+            f[f"lr_{w}"] = (math.log(r) if r > 0 else math.nan) / w
+
+        for p in self._RSI_PERIODS:
+            f[f"rsi_{p}"] = self.rsi14s[-1] if p == 14 else self._rsi(p)
+        f["rsi_diff"] = f["rsi_14"] - f["rsi_7"]
+        f["rsi_mom"]  = f["rsi_14"] - _lag(self.rsi14s, 5)
+
+        macd = self.macds[-1]
+        f["macd"] = macd; f["macd_sig"] = self.sig
+        f["macd_hist"] = macd - self.sig; f["macd_mom"] = macd - _lag(self.macds, 3)
+
+        s20, sd20 = self.c_win[20].mean(), self.c_win[20].std()
+        bbu, bbl = s20 + 2 * sd20, s20 - 2 * sd20
+        f["bb_pct"]   = _clip(_div(c - bbl, bbu - bbl), 0, 1)
+        f["bb_width"] = _div(bbu - bbl, s20)
+
+        for w, win in self.c_win.items():
+            sm = win.mean(); f[f"dist_sma{w}"] = _div(c - sm, sm)
+        for sp in (9, 21):
+            e = self.ema[sp]; f[f"dist_ema{sp}"] = _div(c - e, e)
+
+        for w, win in self.lr_win.items():
+            f[f"vol_{w}d"] = win.std()
+        f["rvol_20"]   = f["vol_20d"] * math.sqrt(252)
+        f["vol_ratio"] = _div(f["vol_10d"], f["vol_20d"])
+
+        atr = self.atr14s.buf[-1]
+        f["atr_pct"]   = _div(atr, c)
+        f["atr_trend"] = _div(atr, self.atr14s.mean())
+
+        hh, ll = self.hh14.value(), self.ll14.value()
+        f["stoch_k"] = self.stk3.buf[-1]; f["stoch_d"] = self.stk3.mean()
+        f["stoch_diff"] = f["stoch_k"] - f["stoch_d"]
+        f["willr"] = _nz(-100 * _div(hh - c, hh - ll), -50.0)
+
+        tp = self.tp20.buf[-1]
+        f["cci"] = _nz(_clip(_div(tp - self.tp20.mean(), 0.015 * self.tp20.mad()), -300, 300), 0.0)
+
+        f["adx_plus"]  = _nz(100 * _div(self.pdm14.mean(), atr), 0.0)
+        f["adx_minus"] = _nz(100 * _div(self.mdm14.mean(), atr), 0.0)
+        f["adx_diff"]  = f["adx_plus"] - f["adx_minus"]
+
+        for w in (3, 5, 10, 20):
+            f[f"roc_{w}"] = (_div(c, _lag(cl, w)) - 1) * 100
+
+        vsma = self.v14.mean(); vrel = _div(v, vsma)
+        f["v_ratio"] = _clip(vrel, 0, 10)
+        f["v_trend"] = _clip(_div(vsma, self.v50.mean()), 0, 5)
+        f["pv_corr"] = _clip(lr * vrel, -5, 5)
+
+        f["hl_pct"] = _div(h - lo, c); f["open_close"] = _div(c - o, c)
+
+        f["dist_52w_high"] = _div(c - self.hi252.value(), c)
+        f["dist_52w_low"]  = _div(c - self.lo252.value(), c)
+
+        for name, buf in (("sma20_slope", self.s20s), ("sma50_slope", self.s50s)):
+            prev = _lag(buf, 5); f[name] = _div(buf[-1] - prev, prev)
+        return f
+
+    def row(self, cols: list, out: np.ndarray | None = None) -> np.ndarray:
+        """Son barın feature satırı, cols sırasıyla (model girdisi); out verilirse ona yazılır."""
+        f = self.features()
+        if out is None:
+            return np.array([f[k] for k in cols], dtype=float)
+        for i, k in enumerate(cols):
+            out[i] = f[k]
+        return out
@@ -0,0 +1,235 @@
+"""
+Tek satırlık hızlı çıkarım — tahmin döngüsü için.
+
+sklearn/XGBoost/LightGBM'in predict çağrısı 1 satırlık girdide bile
+doğrulama, DataFrame/DMatrix dönüşümü ve thread havuzu maliyeti taşır
+(adım başına milisaniyeler). compile_predictor eğitilmiş modeli ve
+RobustScaler'ı düz NumPy dizilerine çevirir:
+  - Ridge: ölçekleyici katsayılara katlanır → tek nokta çarpımı,
+  - ağaç toplulukları (RF, ExtraTrees, GBM, XGBoost, LightGBM): tüm
+    ağaçların düğümleri tek dizide; bütün ağaçlar seviye seviye birlikte
+    yürünür, tamponlar önceden ayrılmıştır.
+Derlenen tahminci birkaç örnek satırda modelin kendi predict'iyle
+karşılaştırılır; uyuşmazsa None döner ve çağıran normal yola düşer.
+"""
+from __future__ import annotations
+
+import json
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+
+class CompiledPredictor(ABC):
+    """Ham (ölçeklenmemiş) feature satırından tek tahmin üretir."""
+
+    @abstractmethod
+    def __call__(self, row: np.ndarray) -> float:
+        ...
+
+
+class _Linear(CompiledPredictor):
+    def __init__(self, coef: np.ndarray, intercept: float):
+        self.coef, self.intercept = coef, float(intercept)
+
+    def __call__(self, row: np.ndarray) -> float:
+        return float(row @ self.coef) + self.intercept
+
+
+class _Forest(CompiledPredictor):
+    """
+    Düzleştirilmiş ağaç topluluğu. Yapraklar kendilerine bağlıdır (sol = sağ
+    = kendisi, eşik +inf), böylece en derin ağaç kadar adım tüm ağaçlarda
+    dallanmasız uygulanır. Sonuç: bias + scale · Σ yaprak değeri.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, depth,
+                 scale: float, center, inv_scale, f32: bool):
+        self.feature, self.threshold = feature, threshold
+        self.left, self.right, self.value = left, right, value
+        self.roots, self.depth, self.scale, self.bias = roots, depth, float(scale), 0.0
+        self.center, self.inv_scale, self.f32 = center, inv_scale, f32
+        self._alloc()
+
+    def _alloc(self):
+        k = len(self.roots)
+        self._x    = np.empty(len(self.center))
+        self._x32  = np.empty(len(self.center), dtype=np.float32)
+        self._node = np.empty(k, dtype=np.intp)
+        self._fi   = np.empty(k, dtype=np.intp)
+        self._xv   = np.empty(k)
+        self._tv   = np.empty(k)
+        self._lr   = np.empty(k, dtype=np.intp)
+        self._mask = np.empty(k, dtype=bool)
+
+    def __getstate__(self):
+        return {k: v for k, v in self.__dict__.items() if not k.startswith("_")}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._alloc()
+
+    def leaf_sum(self, row: np.ndarray) -> float:
+        x, node, fi, xv, tv, lr, mask = (self._x, self._node, self._fi, self._xv,
+                                         self._tv, self._lr, self._mask)
+        np.subtract(row, self.center, out=x)
+        np.multiply(x, self.inv_scale, out=x)
+        if self.f32:                                   # sklearn/XGBoost float32 karşılaştırır
+            np.copyto(self._x32, x, casting="same_kind")
+            np.copyto(x, self._x32)
+        np.copyto(node, self.roots)
+        for _ in range(self.depth):
+            np.take(self.feature, node, out=fi)
+            np.take(x, fi, out=xv)
+            np.take(self.threshold, node, out=tv)
+            np.less_equal(xv, tv, out=mask)
+            np.take(self.right, node, out=lr)
+            np.take(self.left, node, out=node)
+            np.copyto(node, lr, where=~mask)
+        return float(np.take(self.value, node, out=tv).sum())
+
+    def __call__(self, row: np.ndarray) -> float:
+        return self.bias + self.scale * self.leaf_sum(row)
+
+
+# ── Ağaç düzleştirme ─────────────────────────────────────────────────────────
+class _Builder:
+    def __init__(self):
+        self.feature, self.threshold, self.left, self.right, self.value = [], [], [], [], []
+        self.roots, self.depth = [], 0
+
+    def node(self) -> int:
+        for lst, fill in ((self.feature, 0), (self.threshold, np.inf), (self.left, -1),
+                          (self.right, -1), (self.value, 0.0)):
+            lst.append(fill)
+        return len(self.feature) - 1
+
+    def add(self, root, children, split, leaf) -> None:
+        """
+        Genel ağaç ekleme. children(n) → (sol, sağ) ya da yapraksa None;
+        split(n) → (feature, eşik) — sol dal x <= eşik; leaf(n) → değer.
+        """
+        stack = [(root, self.node(), 0)]
+        self.roots.append(stack[0][1])
+        while stack:
+            n, i, d = stack.pop()
+            kids = children(n)
+            if kids is None:
+                self.left[i] = self.right[i] = i
+                self.value[i] = float(leaf(n))
+                self.depth = max(self.depth, d)
+                continue
+            self.feature[i], self.threshold[i] = split(n)
+            li, ri = self.node(), self.node()
+            self.left[i], self.right[i] = li, ri
+            stack += [(kids[0], li, d + 1), (kids[1], ri, d + 1)]
+
+    def build(self, scale: float, sc, f32: bool) -> _Forest:
+        center = np.zeros(len(sc.scale_)) if sc.center_ is None else np.asarray(sc.center_, float)
+        inv = 1.0 / (np.ones(len(center)) if sc.scale_ is None else np.asarray(sc.scale_, float))
+        return _Forest(np.asarray(self.feature, np.intp), np.asarray(self.threshold, float),
+                       np.asarray(self.left, np.intp), np.asarray(self.right, np.intp),
+                       np.asarray(self.value, float), np.asarray(self.roots, np.intp),
+                       self.depth, scale, center, inv, f32)
+
+
+def _add_sklearn_tree(b: _Builder, tree) -> None:
+    t = tree.tree_
+    cl, cr, feat, thr, val = (t.children_left, t.children_right, t.feature,
+                              t.threshold, t.value[:, 0, 0])
+    b.add(0, lambda n: None if cl[n] == -1 else (cl[n], cr[n]),
+          lambda n: (feat[n], thr[n]), lambda n: val[n])
+
+
+def _add_xgb_tree(b: _Builder, tree: dict) -> None:
+    # XGBoost: sol dal x < eşik (float32) → x <= eşiğin bir alt float32 komşusu
+    def split(n):
+        t = np.float32(n["split_condition"])
+        return int(n["split"].lstrip("f")), float(np.nextafter(t, np.float32(-np.inf)))
+
+    def children(n):
+        if "leaf" in n:
+            return None
+        kids = {c["nodeid"]: c for c in n["children"]}
+        return kids[n["yes"]], kids[n["no"]]
+
+    b.add(tree, children, split, lambda n: n["leaf"])
+
+
+def _add_lgb_tree(b: _Builder, tree: dict) -> None:
+    def children(n):
+        return None if "leaf_value" in n else (n["left_child"], n["right_child"])
+
+    b.add(tree, children, lambda n: (n["split_feature"], n["threshold"]),
+          lambda n: n["leaf_value"])
+
+
+def _compile_forest(model, sc) -> Optional[_Forest]:
+    name = type(model).__name__
+    b = _Builder()
+    if name in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        for est in model.estimators_:
+            _add_sklearn_tree(b, est)
+        return b.build(1.0 / len(model.estimators_), sc, f32=True)
+    if name == "GradientBoostingRegressor":
+        for est in model.estimators_[:, 0]:
+            _add_sklearn_tree(b, est)
+        return b.build(model.learning_rate, sc, f32=True)
+    if name == "XGBRegressor":
+        for dump in model.get_booster().get_dump(dump_format="json"):
+            _add_xgb_tree(b, json.loads(dump))
+        return b.build(1.0, sc, f32=True)
+    if name == "LGBMRegressor":
+        info = model.booster_.dump_model()["tree_info"]
+        if any(n.get("decision_type", "<=") != "<="
+               for n in _lgb_nodes(t["tree_structure"] for t in info)):
+            return None                                # kategorik bölünme desteklenmiyor
+        for t in info:
+            _add_lgb_tree(b, t["tree_structure"])
+        return b.build(1.0, sc, f32=False)
+    return None
+
+
+def _lgb_nodes(roots):
+    stack = list(roots)
+    while stack:
+        n = stack.pop()
+        if "leaf_value" not in n:
+            yield n
+            stack += [n["left_child"], n["right_child"]]
+
+
+# ── Giriş noktası ────────────────────────────────────────────────────────────
+def compile_predictor(model, sc, X_check: np.ndarray) -> Optional[CompiledPredictor]:
+    """
+    model + RobustScaler için tek satırlık tahminci derler.
+    X_check: ölçeklenmemiş birkaç örnek satır; ağaçlarda sabit terim (GBM
+    başlangıcı, XGBoost base_score) bunlardan kalibre edilir ve sonuç
+    model.predict ile doğrulanır. Desteklenmeyen/uyuşmayan modelde None.
+    """
+    try:
+        X_check = np.ascontiguousarray(X_check, dtype=float)
+        if len(X_check) == 0:
+            return None
+        if type(model).__name__ == "Ridge":
+            inv  = 1.0 / sc.scale_
+            coef = np.ravel(model.coef_) * inv
+            pred = _Linear(coef, float(model.intercept_) - float(sc.center_ @ coef))
+        else:
+            pred = _compile_forest(model, sc)
+            if pred is None:
+                return None
+            ref0 = float(np.ravel(model.predict(sc.transform(X_check[:1])))[0])
+            pred.bias = ref0 - pred.scale * pred.leaf_sum(X_check[0])
+
+        ref = np.ravel(model.predict(sc.transform(X_check))).astype(float)
+        got = np.array([pred(r) for r in X_check])
+        if not np.allclose(got, ref, rtol=1e-5, atol=1e-6):
+            print(f"[inference] {type(model).__name__}: derlenen tahminci uyuşmadı, "
+                  f"normal predict kullanılacak")
+            return None
+        return pred
+    except Exception as e:
+        print(f"[inference] {type(model).__name__} derlenemedi: {e}")
+        return None
@@ -0,0 +1,246 @@
+"""
+Asenkron eğitim iş kuyruğu.
+
+/api/predict_run eğitim + tahmini istek içinde yaptığında (saniyeler, LSTM'de
+dakikalar) sync gunicorn worker'ı o süre boyunca başka istek alamaz. Bu modül
+işi sınırlı bir süreç havuzunda (FINTAP_JOB_PROCS) çalıştırır ve çağırana
+hemen bir iş kimliği verir.
+
+İş durumu FINTAP_JOB_DIR altında iş başına bir JSON dosyasıdır (atomik
+yazılır); böylece durum isteği hangi gunicorn worker'ına düşerse düşsün
+okunabilir. Çocuk süreç aşamaları (data/training/backtest/forecast) dosyaya
+kendisi yazar. Sonuç, işi gönderen süreçteki on_done geri çağrısından geçer:
+token düşümü ve Prediction kaydı orada, yalnızca başarılı tamamlanmada yapılır.
+Çocukta eğitilen model model_registry'ye yazıldığından web worker'ları da
+yeniden eğitmeden kullanır.
+"""
+from __future__ import annotations
+
+import glob
+import json
+import multiprocessing as mp
+import os
+import re
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterator, Optional
+
+try:
+    from . import data_manager as dm
+    from . import dynamic_trainer as trainer
+except ImportError:
+    import data_manager as dm
+    import dynamic_trainer as trainer
+
+
+_PROCS     = int(os.environ.get("FINTAP_JOB_PROCS", 1))       # 0 = süreç yerine thread
+_MAX_QUEUE = int(os.environ.get("FINTAP_JOB_QUEUE", 8))       # worker başına bekleyen + çalışan
+_PER_USER  = int(os.environ.get("FINTAP_JOB_PER_USER", 2))    # kullanıcı başına eşzamanlı iş
+_TTL_SEC   = int(os.environ.get("FINTAP_JOB_TTL", 3600))      # biten iş dosyalarının ömrü
+_STALE_SEC = int(os.environ.get("FINTAP_JOB_TIMEOUT", 900))   # güncellenmeyen iş kayıp sayılır
+_JOB_DIR   = os.environ.get("FINTAP_JOB_DIR")                 # varsayılan data/jobs
+
+ACTIVE   = ("queued", "running")
+FINISHED = ("done", "error")
+
+_EXECUTOR = None
+_INFLIGHT: set = set()
+_LOCK     = threading.Lock()
+_ID_RE    = re.compile(r"[0-9a-f]{32}")
+
+
+class JobRejected(Exception):
+    """Kuyruk dolu ya da kullanıcının eşzamanlı iş sınırı aşıldı."""
+
+    def __init__(self, message: str, status: int = 503):
+        super().__init__(message)
+        self.status = status
+
+
+class JobError(Exception):
+    """on_done'ın işi kullanıcıya gösterilecek bir mesajla başarısız saydırması için."""
+
+
+def job_dir() -> str:
+    return _JOB_DIR or os.path.join(dm._DATA_DIR, "jobs")
+
+
+# ── İş dosyaları ─────────────────────────────────────────────────────────────
+def _file(job_id: str, directory: Optional[str] = None) -> str:
+    return os.path.join(directory or job_dir(), f"{job_id}.json")
+
+
+def _read(path: str) -> Optional[dict]:
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(job_id: str, directory: Optional[str] = None, **fields) -> dict:
+    """İş kaydını günceller (oku-birleştir-yaz, atomik replace)."""
+    path = _file(job_id, directory)
+    rec  = _read(path) or {"id": job_id}
+    rec.update(fields, updated=time.time())
+    tmp  = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "w") as fh:
+        json.dump(rec, fh)
+    os.replace(tmp, path)
+    return rec
+
+
+def _sweep() -> int:
+    """TTL'i geçmiş iş dosyalarını siler."""
+    n, cutoff = 0, time.time() - _TTL_SEC
+    for path in glob.glob(os.path.join(job_dir(), "*.json")):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path); n += 1
+        except OSError:
+            pass
+    return n
+
+
+# ── Çocuk süreç ──────────────────────────────────────────────────────────────
+def _run(job_id: str, params: dict, directory: str) -> tuple:
+    """Havuzdaki süreçte çalışır: eğitir, aşamaları iş dosyasına yazar."""
+    def report(stage: str, pct: float):
+        try:
+            _write(job_id, directory, state="running", stage=stage, progress=round(pct, 2))
+        except OSError:
+            pass
+
+    report("starting", 0.0)
+    preds, chart = trainer.train_and_predict_dynamic(
+        params["ticker"], params["model"], params["features"], params["horizon"],
+        mode=params["mode"], progress=report,
+    )
+    retry = dm.retry_status().get(params["ticker"]) if not preds else None
+    if retry and retry["retry_in_sec"] is not None:
+        # Upstream çekimi başarısız, yeniden deneme planlı (bu süreçte)
+        raise JobError("Market data refresh pending. Please try again shortly.")
+    return preds, chart
+
+
+def _executor():
+    global _EXECUTOR
+    if _EXECUTOR is None:
+        if _PROCS > 0:
+            # spawn: çok thread'li gunicorn worker'ından fork güvenli değil
+            _EXECUTOR = ProcessPoolExecutor(max_workers=_PROCS,
+                                            mp_context=mp.get_context("spawn"))
+        else:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="train-job")
+    return _EXECUTOR
+
+
+def _finish(job_id: str, fut, on_done: Optional[Callable]):
+    """İşi gönderen süreçte çalışır: sonucu on_done'dan geçirip kaydı kapatır."""
+    global _EXECUTOR
+    try:
+        preds, chart = fut.result()
+        result = on_done(preds, chart) if on_done else {"prediction": preds, "chart_data": chart}
+        _write(job_id, state="done", stage="done", progress=1.0,
+               result=result, finished=time.time())
+    except JobError as e:
+        _write(job_id, state="error", error=str(e), finished=time.time())
+    except Exception as e:
+        print(f"[jobs] {job_id}: {e}"); traceback.print_exc()
+        if isinstance(e, BrokenProcessPool):          # çocuk öldü (ör. OOM) → havuzu yenile
+            with _LOCK:
+                _EXECUTOR = None
+        _write(job_id, state="error", error=f"Model exception: {str(e)[:300]}",
+               finished=time.time())
+    finally:
+        with _LOCK:
+            _INFLIGHT.discard(job_id)
+
+
+# ── Genel arayüz ─────────────────────────────────────────────────────────────
+def active_jobs(owner) -> int:
+    """owner'ın (tüm worker'lardaki) bekleyen/çalışan iş sayısı."""
+    n = 0
+    for path in glob.glob(os.path.join(job_dir(), "*.json")):
+        rec = _read(path)
+        if rec and rec.get("owner") == owner and _live(rec)["state"] in ACTIVE:
+            n += 1
+    return n
+
+
+def submit(owner, params: dict, on_done: Optional[Callable] = None) -> dict:
+    """
+    Eğitim işini kuyruğa alır ve iş kaydını hemen döndürür.
+    params: ticker, model, features, horizon, mode. on_done(preds, chart) →
+    sonuç sözlüğü; JobError fırlatırsa iş o mesajla başarısız olur.
+    Kuyruk doluysa ya da kullanıcı sınırı aşıldıysa JobRejected.
+    """
+    global _EXECUTOR
+    os.makedirs(job_dir(), exist_ok=True)
+    _sweep()
+    if _PER_USER > 0 and active_jobs(owner) >= _PER_USER:
+        raise JobRejected("Too many running predictions. Please wait for one to finish.", 429)
+    job_id = uuid.uuid4().hex
+    with _LOCK:
+        if len(_INFLIGHT) >= _MAX_QUEUE:
+            raise JobRejected("Prediction queue is full. Please try again shortly.", 503)
+        _INFLIGHT.add(job_id)
+    rec = _write(job_id, owner=owner, params=params, state="queued", stage="queued",
+                 progress=0.0, created=time.time(), result=None, error=None)
+    try:
+        fut = _executor().submit(_run, job_id, params, job_dir())
+    except Exception as e:
+        with _LOCK:
+            _INFLIGHT.discard(job_id)
+            if isinstance(e, BrokenProcessPool):
+                _EXECUTOR = None
+        print(f"[jobs] kuyruğa alınamadı: {e}")
+        raise JobRejected("Prediction queue is unavailable. Please try again shortly.", 503)
+    fut.add_done_callback(lambda f: _finish(job_id, f, on_done))
+    print(f"[jobs] {job_id}: {params['ticker']} | {params['model']} kuyrukta")
+    return rec
+
+
+def _live(rec: dict) -> dict:
+    # Süreci ölen worker'ın işi sonsuza dek "running" kalmasın
+    if rec.get("state") in ACTIVE and time.time() - rec.get("updated", 0) > _STALE_SEC:
+        rec = dict(rec, state="error", error="Job timed out.")
+    return rec
+
+
+def get(job_id: str) -> Optional[dict]:
+    """İş kaydı ya da (bilinmeyen/geçersiz kimlikte) None."""
+    if not _ID_RE.fullmatch(job_id or ""):
+        return None
+    rec = _read(_file(job_id))
+    return _live(rec) if rec else None
+
+
+def watch(job_id: str, timeout: float = 25.0, interval: float = 0.5) -> Iterator[dict]:
+    """
+    Kayıt değiştikçe onu üretir; iş bittiğinde ya da timeout dolunca durur
+    (sync worker'ı uzun süre tutmamak için — istemci yeniden bağlanır).
+    """
+    deadline, last = time.monotonic() + timeout, None
+    while True:
+        rec = get(job_id)
+        if rec is None:
+            return
+        if rec.get("updated") != last:
+            last = rec.get("updated")
+            yield rec
+        if rec["state"] in FINISHED or time.monotonic() >= deadline:
+            return
+        time.sleep(interval)
+
+
+def job_status() -> dict:
+    with _LOCK:
+        inflight = len(_INFLIGHT)
+    return {"mode": "process" if _PROCS > 0 else "thread", "workers": max(_PROCS, 1),
+            "inflight": inflight, "max_queue": _MAX_QUEUE, "per_user": _PER_USER,
+            "dir": job_dir()}
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+try:
+    from zoneinfo import ZoneInfo
+    _ET = ZoneInfo("America/New_York")
+except Exception:        # zoneinfo/tzdata yoksa ABD yaz saati kuralı elle uygulanır
+    _ET = None
+
+
+# ──────────────────────────────────────────────────────────────
+#  PİYASA TAKVİMİ — data_manager cache süresini buna göre belirler.
+#  Hisse: yeni günlük bar ancak NYSE kapanışından (+ veri sağlayıcının
+#  barı yerleştirme payı) sonra oluşur; tatiller ve yarım günler
+#  algoritmik olarak hesaplanır. Kripto: 7/24 işlem görür; günlük bar
+#  UTC gece yarısında döner, arada kısmi bar saatlik yenilenir.
+#  Tüm zamanlar tz'siz UTC datetime'dır (datetime.utcnow() ile uyumlu).
+# ──────────────────────────────────────────────────────────────
+
+EQUITY_SETTLE  = timedelta(minutes=20)   # kapanıştan sonra barın kesinleşmesi
+CRYPTO_SETTLE  = timedelta(minutes=10)   # UTC günü döndükten sonra
+CRYPTO_REFRESH = timedelta(hours=1)      # gün içi kısmi bar yenileme aralığı
+
+_OPEN_MIN, _CLOSE_MIN, _EARLY_CLOSE_MIN = 9 * 60 + 30, 16 * 60, 13 * 60
+
+
+def is_crypto(ticker: str) -> bool:
+    return ticker.upper().endswith("-USD")
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """Ayın n. haftanın günü (n=-1: son)."""
+    if n > 0:
+        d = date(year, month, 1)
+        d += timedelta(days=(weekday - d.weekday()) % 7)
+        return d + timedelta(weeks=n - 1)
+    nxt = date(year + (month == 12), month % 12 + 1, 1)
+    d = nxt - timedelta(days=1)
+    return d - timedelta(days=(d.weekday() - weekday) % 7)
+
+
+def _easter(year: int) -> date:
+    """Gregoryen Paskalya (anonim algoritma)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month = (h + l - 7 * m + 114) // 31
+    day = (h + l - 7 * m + 114) % 31 + 1
+    return date(year, month, day)
+
+
+def _observed(d: date) -> date:
+    """Cumartesiye denk gelen tatil cuma, pazara denk gelen pazartesi yapılır."""
+    if d.weekday() == 5:
+        return d - timedelta(days=1)
+    if d.weekday() == 6:
+        return d + timedelta(days=1)
+    return d
+
+
+@lru_cache(maxsize=64)
+def nyse_holidays(year: int) -> frozenset:
+    days = {
+        _nth_weekday(year, 1, 0, 3),                 # Martin Luther King Jr. Day
+        _nth_weekday(year, 2, 0, 3),                 # Washington's Birthday
+        _easter(year) - timedelta(days=2),           # Good Friday
+        _nth_weekday(year, 5, 0, -1),                # Memorial Day
+        _observed(date(year, 7, 4)),                 # Independence Day
+        _nth_weekday(year, 9, 0, 1),                 # Labor Day
+        _nth_weekday(year, 11, 3, 4),                # Thanksgiving
+        _observed(date(year, 12, 25)),               # Christmas
+    }
+    if date(year, 1, 1).weekday() != 5:              # cumartesiyse önceki cuma açık
+        days.add(_observed(date(year, 1, 1)))
+    if year >= 2022:
+        days.add(_observed(date(year, 6, 19)))       # Juneteenth
+    return frozenset(days)
+
+
+@lru_cache(maxsize=64)
+def nyse_early_closes(year: int) -> frozenset:
+    """13:00 ET'de kapanan günler: 3 Temmuz, Şükran Günü ertesi, Noel arifesi."""
+    cands = {date(year, 7, 3), _nth_weekday(year, 11, 3, 4) + timedelta(days=1),
+             date(year, 12, 24)}
+    return frozenset(d for d in cands if is_trading_day(d))
+
+
+def is_trading_day(d: date) -> bool:
+    return d.weekday() < 5 and d not in nyse_holidays(d.year)
+
+
+def _et_offset(d: date) -> timedelta:
+    """UTC − ET farkı (EDT: 4s, EST: 5s)."""
+    if _ET is not None:
+        return -datetime(d.year, d.month, d.day, 12, tzinfo=_ET).utcoffset()
+    dst_start = _nth_weekday(d.year, 3, 6, 2)       # Mart'ın 2. pazarı
+    dst_end   = _nth_weekday(d.year, 11, 6, 1)      # Kasım'ın 1. pazarı
+    return timedelta(hours=4 if dst_start <= d < dst_end else 5)
+
+
+def _et_date(at: datetime) -> date:
+    return (at - _et_offset(at.date())).date()
+
+
+def session_close(d: date) -> datetime:
+    """d günündeki NYSE kapanışı (UTC)."""
+    minutes = _EARLY_CLOSE_MIN if d in nyse_early_closes(d.year) else _CLOSE_MIN
+    return datetime(d.year, d.month, d.day) + timedelta(minutes=minutes) + _et_offset(d)
+
+
+def market_open(now: datetime) -> bool:
+    d = _et_date(now)
+    if not is_trading_day(d):
+        return False
+    opens = datetime(d.year, d.month, d.day) + timedelta(minutes=_OPEN_MIN) + _et_offset(d)
+    return opens <= now < session_close(d)
+
+
+def next_equity_bar(after: datetime) -> datetime:
+    """after'dan sonra yeni (kesinleşmiş) günlük hisse barının görülebileceği ilk an."""
+    d = _et_date(after)
+    for _ in range(15):
+        if is_trading_day(d):
+            ready = session_close(d) + EQUITY_SETTLE
+            if ready > after:
+                return ready
+        d += timedelta(days=1)
+    return after + timedelta(days=1)                 # ulaşılmaz; güvenli üst sınır
+
+
+def next_crypto_bar(after: datetime) -> datetime:
+    """Günlük bar UTC gece yarısında döner; arada kısmi bar saatlik yenilenir."""
+    roll = datetime(after.year, after.month, after.day) + timedelta(days=1) + CRYPTO_SETTLE
+    if after < roll - timedelta(days=1):            # gece yarısı ile settle arası
+        roll -= timedelta(days=1)
+    return min(roll, after + CRYPTO_REFRESH)
+
+
+def next_bar_at(ticker: str, after: datetime) -> datetime:
+    return next_crypto_bar(after) if is_crypto(ticker) else next_equity_bar(after)
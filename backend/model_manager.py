@@ -20,7 +20,7 @@ def get_suggestion_metrics(ticker: str) -> dict | None:
 
         future_price = float(future_preds[-1])
 
-        df = get_processed_data(ticker)
+        df = get_processed_data(ticker, groups=["RSI", "MACD", "Bollinger"])
         if df is None or df.empty:
             return None
 
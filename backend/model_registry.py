@@ -0,0 +1,182 @@
+"""
+Diskte kalıcı model kaydı.
+
+dynamic_trainer'ın bellekteki _MODEL_CACHE'i yeniden başlatmada kaybolur ve
+worker'lar arasında paylaşılmaz. Bu modül eğitilmiş modeli (direct modda tüm
+ufuk modelleriyle), RobustScaler'ı, feature listesini ve derlenmiş
+tahminciyi cache anahtarıyla (ticker@veri sürümü|model|gruplar[|direct])
+FINTAP_MODEL_DIR altına yazar. Her kaydın yanında okunabilir bir .json
+metadata dosyası durur: ticker, model tipi, sıralı gruplar, mod, veri
+sürümü, eğitim zamanı/süresi ve test metrikleri.
+
+Anahtar veri sürümünü içerdiğinden yeni bar gelince eski kayıt eşleşmez;
+aynı ticker'ın daha eski tarihli sürümleri yeni kayıt yazılırken silinir
+(daha taze veriyle çalışan başka bir worker'ın kaydı korunur).
+"""
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+from datetime import datetime
+from typing import Optional
+
+import sklearn
+
+try:
+    import xgboost
+except ImportError:
+    xgboost = None
+try:
+    import lightgbm
+except ImportError:
+    lightgbm = None
+
+try:
+    from . import data_manager as dm
+except ImportError:
+    import data_manager as dm
+
+
+_ENABLED   = os.environ.get("FINTAP_MODEL_REGISTRY", "1") != "0"
+_MODEL_DIR = os.environ.get("FINTAP_MODEL_DIR")            # varsayılan data/models
+
+# Pickle'lar bu kütüphanelerin sürümüne bağlı; farklı sürümle yazılan kayıt yüklenmez
+_LIB_VERSIONS = {"sklearn": sklearn.__version__,
+                 "xgboost": getattr(xgboost, "__version__", None),
+                 "lightgbm": getattr(lightgbm, "__version__", None)}
+
+_STATS = {"hits": 0, "misses": 0, "saved": 0, "pruned": 0, "errors": 0}
+_LOCK  = threading.Lock()
+
+
+def registry_dir() -> str:
+    return _MODEL_DIR or os.path.join(dm._DATA_DIR, "models")
+
+
+def _parse(key: str) -> tuple:
+    """'AAPL@20260102-ab12cd34|LINEAR|RSI_MACD[|direct]' → (ticker, version, model, groups, mode)."""
+    parts = key.split("|")
+    ticker, _, version = parts[0].partition("@")
+    mode = parts[3] if len(parts) > 3 else "recursive"
+    return ticker, version, parts[1], [g for g in parts[2].split("_") if g], mode
+
+
+def _newer(version: str, than: str) -> bool:
+    """Sürümler "YYYYMMDD-crc" — tarih kısmı kesin olarak daha yeniyse True."""
+    return version.partition("-")[0] > than.partition("-")[0]
+
+
+def _path(key: str) -> str:
+    ticker, version = _parse(key)[:2]
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    return os.path.join(registry_dir(), f"{dm._shared_key(ticker)}@{version}__{digest}.pkl")
+
+
+def _count(name: str):
+    with _LOCK:
+        _STATS[name] += 1
+
+
+def load(key: str) -> Optional[dict]:
+    """Anahtara ait kayıtlı model girdisi ({"model", "sc", "feat_set", ...}) ya da None."""
+    if not _ENABLED:
+        return None
+    path = _path(key)
+    if not os.path.exists(path):
+        _count("misses")
+        return None
+    try:
+        with open(path, "rb") as fh:
+            rec = pickle.load(fh)
+        meta = rec["meta"]
+        if meta["key"] != key or any(meta.get(k) != v for k, v in _LIB_VERSIONS.items()):
+            _count("misses")                           # farklı kütüphane sürümüyle yazılmış
+            return None
+    except Exception as e:
+        print(f"[registry] {key}: okuma hatası: {e}")
+        _count("errors")
+        return None
+    _count("hits")
+    print(f"[registry] HIT: {key}")
+    return rec["entry"]
+
+
+def save(key: str, entry: dict, train_sec: float, rows: int, metrics: dict) -> bool:
+    """Girdiyi metadata ile yazar (atomik), ticker'ın eski ya da aynı günkü diğer sürümlerini siler."""
+    if not _ENABLED:
+        return False
+    ticker, version, model_type, groups, mode = _parse(key)
+    meta = {
+        "key": key, "ticker": ticker, "model_type": model_type, "groups": sorted(groups),
+        "mode": mode, "data_version": version, "feat_set": list(entry["feat_set"]),
+        "trained_at": datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        "train_sec": round(train_sec, 3), "rows": rows, "metrics": metrics,
+        **_LIB_VERSIONS,
+    }
+    rec  = {"meta": meta, "entry": {k: v for k, v in entry.items() if k != "at"}}
+    path = _path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as fh:
+            pickle.dump(rec, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        with open(f"{tmp}.json", "w") as fh:
+            json.dump(meta, fh, indent=1)
+        os.replace(f"{tmp}.json", path[:-4] + ".json")
+    except Exception as e:
+        print(f"[registry] {key}: yazma hatası: {e}")
+        _count("errors")
+        return False
+    _count("saved")
+    prune(ticker, keep_version=version)
+    return True
+
+
+def prune(ticker: str, keep_version: Optional[str] = None) -> int:
+    """
+    ticker'ın keep_version dışındaki aynı ya da eski tarihli (None: tüm)
+    kayıtlarını siler; gün içi düzeltilmiş (farklı crc) sürümler de gider.
+    Daha yeni tarihli sürümler kalır — daha taze veriyle çalışan worker'ın
+    yeni yazdığı model silinip yeniden eğitilmez.
+    """
+    n = 0
+    for path in glob.glob(os.path.join(registry_dir(), f"{dm._shared_key(ticker)}@*")):
+        version = os.path.basename(path).partition("@")[2].partition("__")[0]
+        if keep_version is not None and (version == keep_version
+                                         or _newer(version, keep_version)):
+            continue
+        try:
+            os.remove(path)
+            n += path.endswith(".pkl")
+        except OSError:
+            pass
+    if n:
+        with _LOCK:
+            _STATS["pruned"] += n
+        print(f"[registry] {ticker}: {n} eski model silindi")
+    return n
+
+
+def entries() -> list:
+    """Kayıtlı modellerin metadata listesi (yeniden eskiye)."""
+    out = []
+    for path in glob.glob(os.path.join(registry_dir(), "*.json")):
+        try:
+            with open(path) as fh:
+                out.append(json.load(fh))
+        except Exception:
+            continue
+    return sorted(out, key=lambda m: m.get("trained_at", ""), reverse=True)
+
+
+def registry_status() -> dict:
+    files = glob.glob(os.path.join(registry_dir(), "*.pkl"))
+    with _LOCK:
+        stats = dict(_STATS)
+    return {"enabled": _ENABLED, "dir": registry_dir(), "models": len(files),
+            "bytes": sum(os.path.getsize(f) for f in files if os.path.exists(f)), **stats}
@@ -0,0 +1,113 @@
+"""
+Açılışta cache ısınması ve periyodik snapshot.
+
+Deploy/yeniden başlatma sonrası _MEM_CACHE ve model cache'i boştur; ilk
+kullanıcı indirme + feature + eğitim maliyetini öder. Bu modül:
+  - çalışırken bellekteki çerçeveleri ve modelleri periyodik olarak (ve
+    süreç kapanırken) FINTAP_SNAPSHOT_DIR altına yazar,
+  - açılışta arka plan thread'inde önce en çok istenen ticker'ları olmak
+    üzere snapshot'ı geri yükler, ardından her ticker'a bir kez dokunarak
+    süresi geçmiş olanların (SWR/artımlı) yenilenmesini başlatır.
+Modeller veri sürümüyle anahtarlandığından eski veriye ait model sunulmaz.
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+from typing import Callable, Optional
+
+try:
+    from . import data_manager as dm
+    from . import dynamic_trainer as trainer
+except ImportError:
+    import data_manager as dm
+    import dynamic_trainer as trainer
+
+
+_ENABLED      = os.environ.get("FINTAP_WARMUP", "1") != "0"
+_SNAPSHOT_DIR = os.environ.get("FINTAP_SNAPSHOT_DIR")            # varsayılan data/snapshot
+_SNAPSHOT_SEC = int(os.environ.get("FINTAP_SNAPSHOT_SEC", 900))  # 0 = yalnızca kapanışta
+
+_STATUS: dict = {
+    "state": "idle", "restored_frames": 0, "restored_models": 0,
+    "warmed": 0, "sec": None, "last_snapshot": None,
+}
+_SAVE_LOCK = threading.Lock()
+
+
+def snapshot_dir() -> str:
+    return _SNAPSHOT_DIR or os.path.join(dm._DATA_DIR, "snapshot")
+
+
+def save_snapshot() -> dict:
+    """Bellekteki çerçeveleri ve modelleri snapshot dizinine yazar."""
+    with _SAVE_LOCK:
+        d = snapshot_dir()
+        try:
+            frames = dm.snapshot_frames(d)
+            models = trainer.snapshot_models(os.path.join(d, "models.pkl"))
+        except Exception as e:
+            print(f"[warmup] snapshot hatası: {e}")
+            return {"ok": False}
+        _STATUS["last_snapshot"] = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[warmup] snapshot: {frames} çerçeve yazıldı, {models} model/tahmin")
+        return {"ok": True, "frames": frames, "models": models}
+
+
+def warm_up(tickers: list) -> dict:
+    """
+    Snapshot'ı verilen öncelik sırasıyla geri yükler, sonra her ticker'ı bir
+    kez ister (taze olanlar cache'ten, eskiler SWR/yenileme ile gelir).
+    """
+    t0 = time.perf_counter()
+    _STATUS["state"] = "restoring"
+    d = snapshot_dir()
+    restored = dm.restore_frames(tickers, d)
+    _STATUS["restored_frames"] = len(restored)
+    _STATUS["restored_models"] = trainer.restore_models(os.path.join(d, "models.pkl"))
+
+    _STATUS["state"] = "warming"
+    for t in tickers:
+        try:
+            with dm.background_lane():       # kullanıcı istekleri upstream'de öne geçer
+                if dm.get_processed_data(t, groups=[]) is not None:
+                    _STATUS["warmed"] += 1
+        except Exception as e:
+            print(f"[warmup] {t}: {e}")
+    _STATUS["state"] = "done"
+    _STATUS["sec"] = round(time.perf_counter() - t0, 2)
+    print(f"[warmup] {len(restored)}/{len(tickers)} çerçeve snapshot'tan, "
+          f"{_STATUS['warmed']} ticker hazır ({_STATUS['sec']}s)")
+    return dict(_STATUS)
+
+
+def start(priority: Callable[[], list]) -> Optional[threading.Thread]:
+    """
+    Isınma + periyodik snapshot thread'ini başlatır (FINTAP_WARMUP=0 ise hiçbir şey yapmaz).
+    priority: ticker listesini en çok istenen önce olacak şekilde döndürür.
+    """
+    if not _ENABLED:
+        return None
+
+    def run():
+        try:
+            warm_up(priority())
+        except Exception as e:
+            _STATUS["state"] = "error"
+            print(f"[warmup] ısınma hatası: {e}"); traceback.print_exc()
+        while _SNAPSHOT_SEC > 0:
+            time.sleep(_SNAPSHOT_SEC)
+            save_snapshot()
+
+    atexit.register(save_snapshot)
+    th = threading.Thread(target=run, name="cache-warmup", daemon=True)
+    th.start()
+    return th
+
+
+def warmup_status() -> dict:
+    return dict(_STATUS)
@@ -0,0 +1,154 @@
+"""
+Gösterge çekirdekleri mikro-benchmark'ı.
+
+backend/indicators.py üzerine kurulu data_manager._indicators ile eski pandas
+rolling/apply uygulamasını aynı sentetik OHLCV üzerinde karşılaştırır;
+önce çıktıların eşitliğini doğrular, sonra süreleri yazdırır.
+
+    python benchmarks/bench_features.py [satır_sayısı]
+"""
+from __future__ import annotations
+
+import os, sys, time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend import data_manager as dm
+
+
+def _ewm(s: pd.Series, span: int, seed=None) -> pd.Series:
+    if seed is None:
+        return s.ewm(span=span, adjust=False, min_periods=1).mean()
+    ext = pd.concat([pd.Series([seed]), s.reset_index(drop=True)], ignore_index=True)
+    out = ext.ewm(span=span, adjust=False, min_periods=1).mean().iloc[1:]
+    out.index = s.index
+    return out
+
+
+def _indicators_pandas(df_raw: pd.DataFrame, seed=None) -> tuple:
+    """Eski pandas rolling/apply uygulaması (karşılaştırma referansı)."""
+    sd = (lambda k: None) if seed is None else (lambda k: float(seed[k]))
+
+    c = df_raw["close"].astype(float)
+    h = df_raw["high"].astype(float)
+    lo = df_raw["low"].astype(float)
+    v  = df_raw["volume"].astype(float)
+    op = df_raw["open"].astype(float)
+    out = pd.DataFrame(index=df_raw.index)
+
+    lr = np.log(c / c.shift(1))
+    out["lr_1"]  = lr;          out["lr_2"]  = lr.shift(1)
+    out["lr_3"]  = lr.shift(2); out["lr_5"]  = np.log(c/c.shift(5))/5
+    out["lr_10"] = np.log(c/c.shift(10))/10
+    out["lr_20"] = np.log(c/c.shift(20))/20
+
+    for p in [7, 14, 21]:
+        d = c.diff(); g = d.where(d>0,0.).rolling(p).mean()
+        l = (-d.where(d<0,0.)).rolling(p).mean()
+        out[f"rsi_{p}"] = (100 - 100/(1+g/l.replace(0,np.nan))).fillna(50)
+    out["rsi_diff"] = out["rsi_14"] - out["rsi_7"]
+    out["rsi_mom"]  = out["rsi_14"].diff(5)
+
+    e12 = _ewm(c,12,sd("ema12")); e26 = _ewm(c,26,sd("ema26"))
+    macd = (e12-e26)/c.replace(0,np.nan); sig = _ewm(macd,9,sd("macd_sig"))
+    out["macd"] = macd; out["macd_sig"] = sig
+    out["macd_hist"] = macd-sig; out["macd_mom"] = macd.diff(3)
+
+    s20=c.rolling(20).mean(); sd20=c.rolling(20).std()
+    bbu=s20+2*sd20; bbl=s20-2*sd20
+    out["bb_pct"]   = ((c-bbl)/(bbu-bbl).replace(0,np.nan)).clip(0,1)
+    out["bb_width"] = (bbu-bbl)/s20.replace(0,np.nan)
+
+    for w in [5,10,20,50,100]:
+        sm=c.rolling(w).mean(); out[f"dist_sma{w}"]=(c-sm)/sm.replace(0,np.nan)
+    ems = {}
+    for sp in [9,21]:
+        em=_ewm(c,sp,sd(f"ema{sp}")); ems[sp]=em
+        out[f"dist_ema{sp}"]=(c-em)/em.replace(0,np.nan)
+
+    for w in [5,10,20]: out[f"vol_{w}d"]=lr.rolling(w).std()
+    out["rvol_20"]  = lr.rolling(20).std()*np.sqrt(252)
+    out["vol_ratio"]= out["vol_10d"]/out["vol_20d"].replace(0,np.nan)
+
+    pc=c.shift(1); tr=pd.concat([h-lo,(h-pc).abs(),(lo-pc).abs()],axis=1).max(axis=1)
+    atr14=tr.rolling(14).mean()
+    out["atr_pct"]  =atr14/c.replace(0,np.nan)
+    out["atr_trend"]=atr14/atr14.rolling(14).mean().replace(0,np.nan)
+
+    ll14=lo.rolling(14).min(); hh14=h.rolling(14).max()
+    stk=(100*(c-ll14)/(hh14-ll14).replace(0,np.nan)).fillna(50)
+    out["stoch_k"]=stk; out["stoch_d"]=stk.rolling(3).mean()
+    out["stoch_diff"]=stk-out["stoch_d"]
+    out["willr"]=(-100*(hh14-c)/(hh14-ll14).replace(0,np.nan)).fillna(-50)
+
+    tp=(h+lo+c)/3; tp_ma=tp.rolling(20).mean()
+    tp_md=tp.rolling(20).apply(lambda x:np.mean(np.abs(x-x.mean())),raw=True)
+    out["cci"]=((tp-tp_ma)/(0.015*tp_md.replace(0,np.nan))).clip(-300,300).fillna(0)
+
+    pdm=h.diff().clip(lower=0); mdm=(-lo.diff()).clip(lower=0)
+    tr14=tr.rolling(14).mean().replace(0,np.nan)
+    out["adx_plus"] =(100*pdm.rolling(14).mean()/tr14).fillna(0)
+    out["adx_minus"]=(100*mdm.rolling(14).mean()/tr14).fillna(0)
+    out["adx_diff"] =out["adx_plus"]-out["adx_minus"]
+
+    for w in [3,5,10,20]: out[f"roc_{w}"]=c.pct_change(w)*100
+
+    vsma=v.rolling(14).mean()
+    out["v_ratio"]=(v/vsma.replace(0,np.nan)).clip(0,10)
+    out["v_trend"]=(vsma/v.rolling(50).mean().replace(0,np.nan)).clip(0,5)
+    out["pv_corr"]=(lr*(v/vsma.replace(0,np.nan))).clip(-5,5)
+
+    out["hl_pct"]    =(h-lo)/c.replace(0,np.nan)
+    out["open_close"]=(c-op)/c.replace(0,np.nan)
+    out["dist_52w_high"]=(c-c.rolling(252).max())/c.replace(0,np.nan)
+    out["dist_52w_low"] =(c-c.rolling(252).min())/c.replace(0,np.nan)
+
+    out["sma20_slope"]=s20.diff(5)/s20.shift(5).replace(0,np.nan)
+    s50=c.rolling(50).mean()
+    out["sma50_slope"]=s50.diff(5)/s50.shift(5).replace(0,np.nan)
+
+    out["target_lr"]=lr.shift(-1)
+    out["Close"]=c; out["High"]=h; out["Low"]=lo; out["Volume"]=v
+
+    ewm_state = pd.DataFrame({"ema9": ems[9], "ema12": e12, "ema21": ems[21],
+                              "ema26": e26, "macd_sig": sig}, index=df_raw.index)
+    return out, ewm_state
+
+
+
+def _synthetic(n: int) -> pd.DataFrame:
+    rng   = np.random.default_rng(42)
+    idx   = pd.bdate_range("2018-01-02", periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.02, n)))
+    return pd.DataFrame({
+        "open":   close * (1 + rng.normal(0, 0.004, n)),
+        "high":   close * (1 + np.abs(rng.normal(0, 0.01, n))),
+        "low":    close * (1 - np.abs(rng.normal(0, 0.01, n))),
+        "close":  close,
+        "volume": rng.integers(1_000_000, 5_000_000, n).astype(float),
+    }, index=idx)
+
+
+def _best_of(fn, repeat: int = 7) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(n: int = 2200):
+    raw = _synthetic(n)
+    ref, _ = _indicators_pandas(raw)
+    new, _ = dm._indicators(raw)
+    pd.testing.assert_frame_equal(new, ref, rtol=1e-7, atol=1e-9)
+
+    t_old = _best_of(lambda: _indicators_pandas(raw))
+    t_new = _best_of(lambda: dm._indicators(raw))
+    print(f"{n} satır, {new.shape[1]} sütun — çıktılar eşit")
+    print(f"  pandas rolling/apply : {t_old*1000:8.2f} ms")
+    print(f"  numpy çekirdekleri   : {t_new*1000:8.2f} ms   ({t_old/t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2200)
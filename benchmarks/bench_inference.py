@@ -0,0 +1,70 @@
+"""
+Tahmin döngüsü çıkarım benchmark'ı — ağsız, tekrarlanabilir.
+
+Her model tipi için sentetik veriyle train_and_predict_dynamic'in eğitip
+cache'lediği modeli alır ve tek adımlık çıkarımı iki yoldan ölçer:
+  eski     : dict → pd.DataFrame([row])[feat_set] → sc.transform → model.predict
+  derlenmiş: backend/inference.py'deki compile_predictor (ön-ayrılmış tampon)
+Önce iki yolun aynı tahmini verdiğini doğrular, sonra adım başına süreyi yazar.
+
+    python benchmarks/bench_inference.py [adım_sayısı]
+"""
+from __future__ import annotations
+
+import contextlib, io, os, sys, tempfile, time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("FINTAP_DATA_DIR", tempfile.mkdtemp(prefix="fintap-bench-"))
+os.environ.setdefault("FINTAP_SHARED_CACHE", "0")
+os.environ.setdefault("FINTAP_WARMUP", "0")
+
+from backend import data_manager as dm
+from backend import dynamic_trainer as trainer
+from backend.inference import compile_predictor
+
+MODELS = ["LINEAR", "RANDOM_FOREST", "EXTRA_TREES", "GRADIENT_BOOST", "XGBOOST", "LIGHTGBM"]
+
+
+def _per_step(fn, rows) -> float:
+    t0 = time.perf_counter()
+    for r in rows:
+        fn(r)
+    return (time.perf_counter() - t0) / len(rows)
+
+
+def main(steps: int):
+    dm.set_provider("synthetic")
+    ticker = "AAPL"
+    print(f"{'model':<16}{'eski':>12}{'derlenmiş':>14}{'hızlanma':>11}   maks. fark")
+    for m in MODELS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            fut, _ = trainer.train_and_predict_dynamic(ticker, m, [], 7)
+        entry = next((e for k, e in trainer._MODEL_CACHE.items() if f"|{m}|" in k), None)
+        if fut is None or entry is None:
+            print(f"{m:<16}{'atlandı (kurulu değil / eğitilemedi)':>40}")
+            continue
+        model, sc, feat_set = entry["model"], entry["sc"], entry["feat_set"]
+        df = dm.get_processed_data(ticker)
+        X = dm.feature_values(df, feat_set, dtype=float)
+        X = X[~np.isnan(X).any(axis=1)][-steps:]
+
+        fast = compile_predictor(model, sc, X[-32:])
+        if fast is None:
+            print(f"{m:<16}{'derlenemedi':>26}")
+            continue
+
+        def old(r):
+            rdf = pd.DataFrame([dict(zip(feat_set, r))])[feat_set]
+            return float(model.predict(sc.transform(rdf.values))[0])
+
+        n_old = max(1, min(len(X), 50))
+        diff = max(abs(old(r) - fast(r)) for r in X[:n_old])
+        t_old, t_new = _per_step(old, X[:n_old]), _per_step(fast, X)
+        print(f"{m:<16}{t_old*1e6:9.0f} µs{t_new*1e6:11.1f} µs{t_old/t_new:10.0f}×   {diff:.1e}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,55 @@
+"""
+Uçtan uca yol benchmark'ı — ağsız, tekrarlanabilir.
+
+Sentetik sağlayıcıyla (deterministik GBM) evrenin verisini üretir ve
+tahmin (train_and_predict_dynamic), backtest ve screener (teknik özet)
+yollarını ölçer. Upstream gürültüsü olmadığından sürümler arası
+karşılaştırma için uygundur.
+
+    python benchmarks/bench_pipeline.py [ticker_sayısı] [model]
+"""
+from __future__ import annotations
+
+import os, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("FINTAP_DATA_DIR", tempfile.mkdtemp(prefix="fintap-bench-"))
+os.environ.setdefault("FINTAP_SHARED_CACHE", "0")
+os.environ.setdefault("FINTAP_WARMUP", "0")
+
+from backend import data_manager as dm
+from backend.backtester import run_backtest
+from backend.dynamic_trainer import train_and_predict_dynamic
+from train import TICKERS_TO_TRAIN
+
+
+def _timed(label: str, fn, tickers: list):
+    t0 = time.perf_counter()
+    ok = sum(fn(t) is not None for t in tickers)
+    dt = time.perf_counter() - t0
+    print(f"{label:<22} {dt*1000:9.1f} ms  ({dt/len(tickers)*1000:7.1f} ms/ticker, {ok}/{len(tickers)} ok)")
+
+
+def main(n: int, model: str):
+    dm.set_provider("synthetic")
+    tickers = TICKERS_TO_TRAIN[:n]
+    print(f"{len(tickers)} ticker, model={model}, sağlayıcı={dm.provider_name()}\n")
+
+    _timed("data (soğuk)", dm.get_processed_data, tickers)
+    _timed("data (sıcak)", dm.get_processed_data, tickers)
+    _timed("forecast", lambda t: train_and_predict_dynamic(t, model, [], 14)[0], tickers)
+    _timed("forecast 90d direct", lambda t: train_and_predict_dynamic(
+        t, model, [], 90, mode="direct")[0], tickers)
+    _timed("backtest", run_backtest, tickers)
+    try:
+        from app import _technical_snapshot
+    except Exception as e:                 # Flask bağımlılıkları yoksa atla
+        print(f"screener               atlandı ({e})")
+    else:
+        _timed("screener snapshot", _technical_snapshot, tickers)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else len(TICKERS_TO_TRAIN),
+         sys.argv[2] if len(sys.argv) > 2 else "LINEAR")
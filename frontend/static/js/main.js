@@ -38,7 +38,15 @@ document.addEventListener('DOMContentLoaded', () => {
                     throw new Error("Sunucu JSON yerine HTML döndürdü. Backend hatası olabilir.");
                 }
 
-                const data = await response.json();
+                let data = await response.json();
+
+                // Eğitim arka planda iş olarak çalışır: bitene kadar durumu sorgula
+                while (!data.error && data.status_url) {
+                    await new Promise(r => setTimeout(r, 1000));
+                    const job = await (await fetch(data.status_url)).json();
+                    if (job.state === 'done') data = job.result;
+                    else if (job.state === 'error' || job.error) data = { error: job.error || "İş bulunamadı" };
+                }
 
                 if (data.error) {
                     alert("Hata: " + data.error);
@@ -0,0 +1,10 @@
+"""
+Gunicorn hooks. Background work (cache warm-up and periodic snapshots) is
+started here per worker instead of on `import app`, so processes that import
+the app for other reasons (job-queue children, scripts, tests) stay inert.
+"""
+
+
+def post_worker_init(worker):
+    from app import start_background_tasks
+    start_background_tasks()
@@ -1,4 +1,4 @@
-from app import app
+from app import app, start_background_tasks
 import os
 import sys
 
@@ -14,6 +14,11 @@ if __name__ == '__main__':
     print(">>> Tarayıcını aç ve şu adrese git: http://127.0.0.1:5000")
     print("----------------------------------------------------------------")
 
+    # Isınma thread'i yalnızca sunucuyu çalıştıran süreçte (reloader'ın izleyici
+    # sürecinde değil) başlar; app import'u yan etkisizdir
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_tasks()
+
     # debug=True  → kodda değişiklik yaparsan sunucu otomatik yenilenir
     # host='0.0.0.0' → yalnızca localhost değil, aynı WiFi'deki cihazlar da erişebilir
     #                  (örn. telefonundan test etmek için bilgisayarının yerel IP'sini kullanabilirsin)
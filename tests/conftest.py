@@ -1,8 +1,16 @@
 import pytest
 import sys
 import os
+import tempfile
+
+import numpy as np
+import pandas as pd
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+os.environ.setdefault("FINTAP_WARMUP", "0")
+os.environ.setdefault("FINTAP_MODEL_DIR", tempfile.mkdtemp(prefix="fintap-models-"))
+os.environ.setdefault("FINTAP_JOB_PROCS", "0")
+os.environ.setdefault("FINTAP_JOB_DIR", tempfile.mkdtemp(prefix="fintap-jobs-"))
 
 from app import app
 
@@ -11,4 +19,25 @@ def client():
     app.config['TESTING'] = True
 
     with app.test_client() as client:
-        yield client
\ No newline at end of file
+        yield client
+
+def _ohlcv(n=400, start="2024-01-01", seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.bdate_range(start, periods=n)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame(
+        {
+            "open": close * (1 + rng.normal(0, 0.002, n)),
+            "high": close * 1.01,
+            "low": close * 0.99,
+            "close": close,
+            "volume": rng.integers(1_000_000, 2_000_000, n).astype(float),
+        },
+        index=idx,
+    )
+
+
+@pytest.fixture
+def ohlcv():
+    """Deterministic synthetic OHLCV bars: ohlcv(n=400, start="2024-01-01", seed=0)."""
+    return _ohlcv
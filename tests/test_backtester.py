@@ -19,7 +19,7 @@ def test_backtest_allow_short_returns_json_safe_bools(monkeypatch):
         },
         index=idx,
     )
-    monkeypatch.setattr(backtester, "get_processed_data", lambda ticker: df)
+    monkeypatch.setattr(backtester, "get_processed_data", lambda ticker, **kw: df)
 
     result = backtester.run_backtest("AAPL", allow_short=True)
 
@@ -30,3 +30,25 @@ def test_backtest_allow_short_returns_json_safe_bools(monkeypatch):
     with app.app_context():
         payload = jsonify(result).get_data(as_text=True)
     assert json.loads(payload)["ticker"] == "AAPL"
+
+
+def test_backtest_results_reused_until_data_version_changes(monkeypatch):
+    idx = pd.date_range("2024-01-01", periods=200, freq="D")
+    close = 100 + np.cumsum(np.random.default_rng(4).normal(0, 1, 200))
+    full = pd.DataFrame({"Close": close, "High": close * 1.01, "Low": close * 0.99,
+                         "Volume": 1_000_000.0}, index=idx)
+    frame = {"df": full.iloc[:199]}
+    runs = []
+    simulate = backtester._simulate
+    monkeypatch.setattr(backtester, "_RESULT_CACHE", {})
+    monkeypatch.setattr(backtester, "get_processed_data", lambda ticker, **kw: frame["df"])
+    monkeypatch.setattr(backtester, "_simulate", lambda *a: runs.append(a) or simulate(*a))
+
+    first = backtester.run_backtest("ZZZ")
+    assert backtester.run_backtest("ZZZ") is first and len(runs) == 1
+    backtester.run_backtest("ZZZ", horizon=7)
+    assert len(runs) == 2
+
+    frame["df"] = full                                       # yeni bar
+    assert backtester.run_backtest("ZZZ") is not first
+    assert len(runs) == 3 and len(backtester._RESULT_CACHE) == 1
@@ -0,0 +1,608 @@
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backend.data_manager as dm
+
+
+def test_store_appends_tail_and_serves_restart_offline(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    full = ohlcv(402)
+    calls = []
+
+    def fake_download(ticker, start, min_rows=51):
+        calls.append(start)
+        src = full.iloc[:400] if len(calls) == 1 else full
+        return src[src.index >= start].copy()
+
+    monkeypatch.setattr(dm, "_download_raw", fake_download)
+
+    first = dm.get_processed_data("AAPL")
+    assert calls == ["2018-01-01"]
+
+    second = dm.get_processed_data("AAPL", force_refresh=True)
+    assert len(calls) == 2 and calls[1] > "2025-01-01"   # yalnızca kuyruk
+    assert second.index[-1] > first.index[-1]
+    assert len(dm._store_load("AAPL")["raw"]) == 402
+
+    dm._MEM_CACHE.clear()
+    restarted = dm.get_processed_data("AAPL")
+    assert len(calls) == 2                                # ağa çıkılmadı
+    pd.testing.assert_frame_equal(restarted, second, check_freq=False)
+
+
+def test_changed_partial_last_bar_is_overwritten_not_redownloaded(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    final = ohlcv(402, seed=2)
+    partial = final.iloc[:400].copy()
+    partial.iloc[-1, partial.columns.get_loc("close")] *= 1.02   # gün içi kısmi kapanış
+    calls = []
+
+    def fake_download(ticker, start, min_rows=51):
+        calls.append(start)
+        src = partial if len(calls) == 1 else final
+        return src[src.index >= start].copy()
+
+    monkeypatch.setattr(dm, "_download_raw", fake_download)
+
+    dm.get_processed_data("AAPL")
+    dm.get_processed_data("AAPL", force_refresh=True)
+    assert len(calls) == 2 and calls[1] > "2025-01-01"   # kuyruk, tam indirme değil
+    stored = dm._store_load("AAPL")["raw"]
+    assert len(stored) == 402
+    assert stored["close"].iloc[399] == final["close"].iloc[399]
+
+
+def test_incremental_features_match_full_recompute(ohlcv):
+    raw = ohlcv(600, seed=1)
+    prev_df, prev_state = dm._build_features(raw.iloc[:590].copy(), "AAPL")
+
+    df, state = dm._features_incremental(raw.copy(), prev_df, prev_state, "AAPL")
+    full = dm._features(raw.copy(), "AAPL")
+
+    assert state["last"] == raw.index[-1]
+    pd.testing.assert_frame_equal(df, full, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize("n_prev", [590, 600])           # yeni barlarla / yeni bar olmadan
+def test_incremental_features_rewrite_revised_last_bar(ohlcv, n_prev):
+    raw = ohlcv(600, seed=1)
+    partial = raw.iloc[:n_prev].copy()
+    partial.iloc[-1, partial.columns.get_loc("close")] *= 1.02   # gün içi kısmi kapanış
+    prev_df, prev_state = dm._build_features(partial, "AAPL")
+
+    df, state = dm._features_incremental(raw.copy(), prev_df, prev_state, "AAPL")
+    full, full_state = dm._build_features(raw.copy(), "AAPL")
+
+    pd.testing.assert_frame_equal(df, full, rtol=1e-9, atol=1e-12)
+    pd.testing.assert_frame_equal(state["ewm"], full_state["ewm"].tail(len(state["ewm"])),
+                                  rtol=1e-9, atol=1e-12)
+
+
+def test_zero_volume_days_leave_no_nan_rows(monkeypatch, tmp_path, ohlcv):
+    raw = ohlcv(600, seed=8)
+    raw.iloc[570:586, raw.columns.get_loc("volume")] = 0.0     # 16 işlemsiz gün
+    full = dm._features(raw.copy(), "AAPL")
+    assert not full.isna().any().any()
+    assert len(full) < len(raw) - dm._FEATURE_WARMUP - 1
+
+    prev_df, prev_state = dm._build_features(raw.iloc[:560].copy(), "AAPL")
+    df, _ = dm._features_incremental(raw.copy(), prev_df, prev_state, "AAPL")
+    pd.testing.assert_frame_equal(df, full, rtol=1e-9, atol=1e-12)
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raw.copy())
+    dm.get_processed_data("AAPL", groups=[])
+    vol = dm.get_processed_data("AAPL", groups=["Volume"])
+    assert not vol.isna().any().any()
+    pd.testing.assert_frame_equal(vol, full[vol.columns], check_freq=False)
+
+
+def test_concurrent_cache_misses_share_one_refresh(monkeypatch, tmp_path, ohlcv):
+    import threading, time
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    raw = ohlcv(400)
+    calls = []
+
+    def slow_download(ticker, start, min_rows=51):
+        calls.append(start)
+        time.sleep(0.2)
+        return raw.copy()
+
+    monkeypatch.setattr(dm, "_download_raw", slow_download)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(dm.get_processed_data("MSFT")))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert len(results) == 5 and all(r is results[0] for r in results)
+
+
+def test_stale_entry_is_served_while_revalidating(monkeypatch, tmp_path, ohlcv):
+    import threading
+    from datetime import datetime, timedelta
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    raw = ohlcv(400)
+    stale_df = dm._features(raw.iloc[:390].copy(), "NVDA")
+    monkeypatch.setattr(dm, "_expiry", lambda ticker, at: at + timedelta(hours=1))
+    dm._MEM_CACHE["NVDA"] = {"df": stale_df, "state": None,
+                             "at": datetime.utcnow() - timedelta(hours=1, minutes=1)}
+    release = threading.Event()
+
+    def blocked_download(ticker, start, min_rows=51):
+        release.wait(5)
+        return raw.copy()
+
+    monkeypatch.setattr(dm, "_download_raw", blocked_download)
+
+    assert dm.get_processed_data("NVDA") is stale_df      # beklemeden döner
+    assert dm.cache_status()["NVDA"]["revalidating"] is True
+
+    flight = dm._INFLIGHT["NVDA"]
+    release.set()
+    fresh = flight.result(timeout=5)
+    assert dm._MEM_CACHE["NVDA"]["df"] is fresh and len(fresh) > len(stale_df)
+    assert dm.cache_status()["NVDA"]["refresh_sec"] is not None
+
+
+def test_other_worker_reads_published_frame_zero_copy(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    calls = []
+    raw = ohlcv(400)
+
+    def fake_download(ticker, start, min_rows=51):
+        calls.append(start)
+        return raw.copy()
+
+    monkeypatch.setattr(dm, "_download_raw", fake_download)
+    published = dm.get_processed_data("AMD")
+
+    dm._MEM_CACHE.clear()                           # ikinci worker: boş yerel cache
+    monkeypatch.setattr(dm, "_store_load", lambda t: None)
+    shared = dm.get_processed_data("AMD")
+
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(shared, published, check_freq=False)
+    base = shared["Close"].to_numpy()
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+
+def test_cache_evicts_least_recently_used_over_budget(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_CACHE_STATS", dict.fromkeys(dm._CACHE_STATS, 0))
+    monkeypatch.setattr(dm, "_download_raw", lambda ticker, start, min_rows=51: ohlcv(400))
+
+    dm.get_processed_data("AAA")
+    size = dm.cache_status()["AAA"]["bytes"]
+    assert size > 0
+    monkeypatch.setattr(dm, "_CACHE_BUDGET", int(size * 2.5))
+
+    dm.get_processed_data("BBB")
+    dm.get_processed_data("AAA")                   # AAA yeniden kullanıldı → BBB en eski
+    dm.get_processed_data("CCC")
+
+    assert set(dm._MEM_CACHE) == {"AAA", "CCC"}
+    stats = dm.cache_stats()
+    assert stats["evictions"] == 1 and stats["hits"] == 1 and stats["misses"] == 3
+    assert stats["resident_bytes"] <= stats["budget_bytes"]
+
+
+def test_compact_mode_stores_float32_block_and_serves_views(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_COMPACT", True)
+    raw = ohlcv(400)
+    monkeypatch.setattr(dm, "_download_raw", lambda ticker, start, min_rows=51: raw.copy())
+
+    full = dm._features(raw.copy(), "META")
+    df = dm.get_processed_data("META")
+
+    feat = [c for c in full.columns if c not in dm._WIDE_COLS]
+    assert list(df.columns) == list(full.columns)
+    assert (df[feat].dtypes == np.float32).all() and (df[dm._WIDE_COLS].dtypes == np.float64).all()
+    assert df.memory_usage(deep=True).sum() < 0.6 * full.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(df.astype(float), full, rtol=1e-6, atol=1e-6)
+
+    view = dm.feature_values(df, feat[3:10])
+    assert np.shares_memory(view, dm.feature_values(df, feat))
+    np.testing.assert_array_equal(dm.feature_values(df, ["rsi_14", "lr_1"], dtype=float),
+                                  df[["rsi_14", "lr_1"]].to_numpy(dtype=float))
+
+    dm._MEM_CACHE.clear()                           # paylaşımlı katman dtype'ları korur
+    monkeypatch.setattr(dm, "_store_load", lambda t: None)
+    pd.testing.assert_frame_equal(dm.get_processed_data("META"), df, check_freq=False)
+
+
+def test_shared_frame_maps_every_block_and_raw_without_copy(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    raw = ohlcv(400)
+    df, state = dm._build_features(raw.copy(), "NVDA")
+    df = dm._compact(df)
+    assert len(dm._frame_blocks(df)) > 1                 # float32 + float64 blokları
+    dm._shared_publish("NVDA", df, state, pd.Timestamp.now().to_pydatetime())
+
+    shared = dm._shared_load("NVDA")
+
+    def mapped(arr):
+        while arr is not None and not isinstance(arr, np.memmap):
+            arr = arr.base
+        return isinstance(arr, np.memmap)
+
+    pd.testing.assert_frame_equal(shared["df"], df, check_freq=False)
+    pd.testing.assert_frame_equal(shared["state"]["raw"], state["raw"], check_freq=False)
+    pd.testing.assert_frame_equal(shared["state"]["ewm"], state["ewm"], check_freq=False)
+    assert all(mapped(arr) for _, arr in dm._frame_blocks(shared["df"]))
+    assert all(mapped(arr) for _, arr in dm._frame_blocks(shared["state"]["raw"]))
+    with open(os.path.join(dm._shared_dir(), "NVDA.meta"), "rb") as fh:
+        assert "raw" not in pickle.load(fh)["state"]      # ham veri meta'da taşınmaz
+
+
+def test_http_session_reuses_keepalive_connections(monkeypatch):
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(dm, "_HTTP_SESSION", None)
+    try:
+        sess = dm._http_session()
+        for _ in range(3):
+            sess.get(f"http://127.0.0.1:{server.server_port}/", timeout=5).raise_for_status()
+        assert dm._http_session() is sess
+        stats = dm.http_stats()
+        assert stats["connections_opened"] == 1 and stats["connections_reused"] == 2
+    finally:
+        server.shutdown()
+
+
+def test_failing_source_is_skipped_and_healthy_source_preferred(monkeypatch, ohlcv):
+    import time
+
+    monkeypatch.setattr(dm, "_SOURCE_HEALTH", {})
+    monkeypatch.setattr(dm, "_BREAKER_FAILS", 1)
+    raw = ohlcv(100)
+    calls = []
+
+    def yf_down(ticker, start):
+        calls.append("yf"); time.sleep(0.05); return None
+
+    def v8_ok(ticker, start):
+        calls.append("v8"); return raw
+
+    monkeypatch.setattr(dm, "_yf", yf_down)
+    monkeypatch.setattr(dm, "_v8", v8_ok)
+
+    assert dm._download_raw("AAPL", "2024-01-01") is raw
+    assert dm.source_stats()["yfinance"]["breaker"] == "open"
+    assert dm._download_raw("AAPL", "2024-01-01") is raw          # yfinance atlandı
+
+    dm._SOURCE_HEALTH["yfinance"]["open_until"] = 0.0            # bekleme bitti
+    assert dm._download_raw("AAPL", "2024-01-01") is raw          # v8 daha sağlıklı → önce
+    assert calls == ["yf", "v8", "v8", "v8"]
+    stats = dm.source_stats()
+    assert stats["v8"]["success_rate"] == 1.0 and stats["yfinance"]["success_rate"] == 0.0
+    assert stats["yfinance"]["p95_ms"] >= 50
+
+
+def test_hedged_download_returns_first_valid_frame(monkeypatch, ohlcv):
+    import time
+
+    monkeypatch.setattr(dm, "_SOURCE_HEALTH", {})
+    monkeypatch.setattr(dm, "_HEDGE_DELAY", 0.05)
+    slow, fast = ohlcv(100), ohlcv(100, seed=1)
+
+    def yf_slow(ticker, start):
+        time.sleep(0.5); return slow
+
+    monkeypatch.setattr(dm, "_yf", yf_slow)
+    monkeypatch.setattr(dm, "_v8", lambda ticker, start: fast)
+
+    t0 = time.perf_counter()
+    assert dm._download_raw("AAPL", "2024-01-01") is fast
+    assert time.perf_counter() - t0 < 0.4
+
+
+def test_refresh_universe_batches_fetch_and_falls_back_per_ticker(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    frames = {t: ohlcv(400, seed=i) for i, t in enumerate(["AAPL", "MSFT", "TSLA"])}
+    batches, singles = [], []
+
+    def fake_bulk(tickers, start):
+        batches.append(list(tickers))
+        return {t: frames[t] for t in tickers if t != "TSLA"}      # TSLA toplu yanıtta yok
+
+    def fake_download(ticker, start, min_rows=51):
+        singles.append(ticker)
+        return frames[ticker].copy()
+
+    monkeypatch.setattr(dm, "_bulk_download", fake_bulk)
+    monkeypatch.setattr(dm, "_download_raw", fake_download)
+
+    report = dm.refresh_universe(["AAPL", "MSFT", "TSLA"])
+
+    assert batches == [["AAPL", "MSFT", "TSLA"]] and singles == ["TSLA"]
+    assert [r["path"] for r in report.values()] == ["bulk", "bulk", "single"]
+    assert all(r["ok"] and r["total_sec"] is not None for r in report.values())
+    assert dm._groups_in(dm._MEM_CACHE["MSFT"]["df"]) == []         # gruplar tembel
+    pd.testing.assert_frame_equal(dm.get_processed_data("MSFT"),
+                                  dm._features(frames["MSFT"].copy(), "MSFT"), check_freq=False)
+
+
+def test_offline_providers_replay_files_and_generate_deterministic_bars(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_SHARED_CACHE", False)
+
+    monkeypatch.setattr(dm, "_DATA_PROVIDER", "synthetic")
+    df = dm.get_processed_data("ZZZ")
+    again = dm._features(dm._download_raw("ZZZ", "2018-01-01"), "ZZZ")
+    pd.testing.assert_frame_equal(df, again, check_freq=False)
+    assert not df.equals(dm._features(dm._download_raw("YYY", "2018-01-01"), "YYY"))
+
+    (tmp_path / "replay").mkdir()
+    ohlcv(300).rename_axis("Date").to_csv(tmp_path / "replay" / "RPL.csv")
+    dm.set_provider("replay")
+    raw = dm._download_raw("RPL", "2024-06-01", min_rows=1)
+    assert raw.index[0] >= pd.Timestamp("2024-06-01") and list(raw.columns) == ["open", "high", "low", "close", "volume"]
+    assert dm._download_raw("NOPE", "2018-01-01") is None
+
+
+def test_quote_table_serves_latest_bar_without_frame_lookups(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_QUOTES", {})
+    monkeypatch.setattr(dm, "_CLOSE_HIST", {})
+    raws = {"AAPL": ohlcv(400, seed=1), "MSFT": ohlcv(400, seed=2)}
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raws[t].copy())
+
+    quotes = dm.get_quotes(["AAPL", "MSFT", "AAPL"])
+    frames = {t: dm._MEM_CACHE[t]["df"] for t in raws}
+    for t, q in quotes.items():
+        cur, prev = frames[t]["Close"].iloc[-1], frames[t]["Close"].iloc[-2]
+        assert q["price"] == cur and q["prev_close"] == prev
+        assert abs(q["change_pct"] - (cur - prev) / prev * 100) < 1e-12
+        assert q["date"] == str(frames[t].index[-1].date()) and q["version"].startswith(q["date"].replace("-", ""))
+
+    monkeypatch.setattr(dm, "get_processed_data", lambda *a, **kw: pytest.fail("frame lookup"))
+    assert dm.get_quotes(["MSFT"])["MSFT"] == quotes["MSFT"]
+    day = frames["AAPL"].index[100]
+    assert dm.close_on("AAPL", day) == frames["AAPL"]["Close"].iloc[100]
+    assert dm.close_on("AAPL", day + pd.Timedelta(hours=10)) == frames["AAPL"]["Close"].iloc[101]
+    assert dm.close_on("AAPL", frames["AAPL"].index[-1] + pd.Timedelta(days=1)) is None
+
+
+def test_data_version_changes_only_when_bars_change(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    full = ohlcv(402, seed=3)
+    src = {"raw": full.iloc[:400]}
+    monkeypatch.setattr(dm, "_download_raw",
+                        lambda t, start, min_rows=51: src["raw"][src["raw"].index >= start].copy())
+
+    df = dm.get_processed_data("AAPL")
+    v1 = dm.data_version("AAPL")
+    assert v1 == dm.data_version("AAPL", df) == dm._fingerprint(df)
+    assert v1.startswith(f"{df.index[-1]:%Y%m%d}-")
+
+    dm.get_processed_data("AAPL", force_refresh=True)     # yeni bar yok
+    assert dm.data_version("AAPL") == v1
+
+    src["raw"] = full
+    dm.get_processed_data("AAPL", force_refresh=True)
+    v2 = dm.data_version("AAPL")
+    assert v2 != v1 and v2 > v1
+    assert dm.data_version("AAPL", df) == v1               # eski çerçeve kendi sürümünü korur
+
+
+def test_feature_groups_are_materialized_lazily_and_memoized(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    raw = ohlcv(420, seed=5)
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raw.iloc[:400].copy())
+    built = []
+    indicators = dm._indicators
+    monkeypatch.setattr(dm, "_indicators",
+                        lambda *a, **kw: built.append(kw.get("groups")) or indicators(*a, **kw))
+
+    base = dm.get_processed_data("AAPL", groups=[])
+    assert list(base.columns) == dm._WIDE_COLS and built == [[]]
+
+    rsi = dm.get_processed_data("AAPL", groups=["RSI", "MACD"])
+    assert built[-1] == ["RSI", "MACD"] and dm._groups_in(rsi) == ["RSI", "MACD"]
+    assert dm.get_processed_data("AAPL", groups=["RSI"]) is rsi and len(built) == 2
+    assert dm.data_version("AAPL") == dm.data_version("AAPL", base)
+
+    full = dm._features(raw.iloc[:400].copy(), "AAPL")
+    pd.testing.assert_frame_equal(rsi, full[rsi.columns], check_freq=False)
+
+    # Artımlı yenileme yalnızca hesaplanmış grupları taşır
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raw[raw.index >= start].copy())
+    fresh = dm.get_processed_data("AAPL", force_refresh=True, groups=[])
+    assert dm._groups_in(fresh) == ["RSI", "MACD"] and built[-1] == ["RSI", "MACD"]
+    full = dm._features(raw.copy(), "AAPL")
+    pd.testing.assert_frame_equal(fresh, full[fresh.columns], rtol=1e-9, atol=1e-12, check_freq=False)
+
+
+def test_groups_materialize_from_store_after_eviction(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    raw = ohlcv(420, seed=9)
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raw.copy())
+
+    base = dm.get_processed_data("AAPL", groups=[])
+    dm._MEM_CACHE.clear()                                   # LRU tarafından atıldı
+    rsi = dm._materialize("AAPL", base, ["RSI"])
+    assert dm._groups_in(rsi) == ["RSI"] and "AAPL" not in dm._MEM_CACHE
+    full = dm._features(raw.copy(), "AAPL")
+    pd.testing.assert_frame_equal(rsi, full[rsi.columns], check_freq=False)
+
+
+def test_group_dropping_rows_changes_data_version(monkeypatch, tmp_path, ohlcv):
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_QUOTES", {})
+    monkeypatch.setattr(dm, "_CLOSE_HIST", {})
+    raw = ohlcv(400, seed=4)
+    raw.iloc[300:320] = raw.iloc[300].values                # yatay seri: Bollinger std = 0
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: raw.copy())
+
+    base = dm.get_processed_data("INTC", groups=[])
+    before = dm.data_version("INTC", base)
+    boll = dm.get_processed_data("INTC", groups=["Bollinger"])
+
+    assert len(boll) < len(base)
+    assert dm.data_version("INTC", boll) == dm._fingerprint(boll) != before
+    assert dm.get_quotes(["INTC"])["INTC"]["version"] == dm.data_version("INTC")
+
+
+def test_snapshot_restores_frames_and_only_current_models(monkeypatch, tmp_path, ohlcv):
+    from backend import dynamic_trainer as trainer
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_SNAPSHOT_SAVED", {})
+    monkeypatch.setattr(trainer, "_MODEL_CACHE", {})
+    monkeypatch.setattr(trainer, "_FORECAST_CACHE", {})
+    monkeypatch.setattr(dm, "_download_raw", lambda t, start, min_rows=51: ohlcv(400, seed=6))
+
+    df = dm.get_processed_data("AAPL", groups=["RSI"])
+    version = dm.data_version("AAPL")
+    trainer._set_cached_model(trainer._cache_key("AAPL", "LINEAR", ["RSI"], version), "m", "sc", [])
+    trainer._set_cached_model(trainer._cache_key("MSFT", "LINEAR", ["RSI"], "old"), "m", "sc", [])
+    snap = tmp_path / "snap"
+    assert dm.snapshot_frames(str(snap)) == 1 and dm.snapshot_frames(str(snap)) == 0
+    trainer.snapshot_models(str(snap / "models.pkl"))
+
+    dm._MEM_CACHE.clear(); trainer._MODEL_CACHE.clear()
+    monkeypatch.setattr(dm, "_download_raw", lambda *a, **kw: pytest.fail("network"))
+    assert dm.restore_frames(["MSFT", "AAPL"], str(snap)) == ["AAPL"]
+    pd.testing.assert_frame_equal(dm._MEM_CACHE["AAPL"]["df"], df, check_freq=False)
+    assert dm.data_version("AAPL") == version
+
+    assert trainer.restore_models(str(snap / "models.pkl")) == 1
+    assert list(trainer._MODEL_CACHE) == [f"AAPL@{version}|LINEAR|RSI"]
+
+
+def test_failed_download_returns_fast_and_retries_in_background(monkeypatch, tmp_path, ohlcv):
+    import time
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_RETRIES", {})
+    monkeypatch.setattr(dm, "_RETRY_BASE", 0.05)
+    monkeypatch.setattr(dm, "_RETRY_BUDGET", 2)
+    calls = []
+
+    def flaky(ticker, start, min_rows=51):
+        calls.append(time.monotonic())
+        return ohlcv(400) if len(calls) >= 3 else None
+
+    monkeypatch.setattr(dm, "_download_raw", flaky)
+
+    t0 = time.monotonic()
+    assert dm.get_processed_data("AAPL") is None
+    assert time.monotonic() - t0 < 0.5 and len(calls) == 1
+    assert dm.retry_status()["AAPL"]["attempt"] == 1
+    assert dm.get_processed_data("AAPL") is None and len(calls) == 1   # deneme bekliyor → upstream yok
+
+    deadline = time.monotonic() + 5
+    while "AAPL" not in dm._MEM_CACHE and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert len(calls) == 3
+    assert calls[1] - calls[0] >= 0.025 and calls[2] - calls[1] >= 0.05   # üstel geri çekilme
+    assert dm.retry_status() == {} and dm.get_processed_data("AAPL", groups=[]) is not None
+
+
+def test_spent_retry_budget_keeps_requests_off_upstream_until_cooldown(monkeypatch, tmp_path):
+    import time
+
+    monkeypatch.setattr(dm, "_DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(dm, "_MEM_CACHE", {})
+    monkeypatch.setattr(dm, "_RETRIES", {})
+    monkeypatch.setattr(dm, "_RETRY_BASE", 0.02)
+    monkeypatch.setattr(dm, "_RETRY_MAX", 0.6)
+    monkeypatch.setattr(dm, "_RETRY_BUDGET", 2)
+    calls = []
+    monkeypatch.setattr(dm, "_download_raw",
+                        lambda ticker, start, min_rows=51: calls.append(start) or None)
+
+    assert dm.get_processed_data("AAPL") is None
+    deadline = time.monotonic() + 5
+    while not dm.retry_status()["AAPL"]["exhausted"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    status = dm.retry_status()["AAPL"]
+    assert len(calls) == 3 and status["exhausted"] and status["retry_in_sec"] > 0
+
+    for _ in range(3):                                       # soğumada upstream'e gidilmez
+        assert dm.get_processed_data("AAPL") is None
+    assert len(calls) == 3
+
+    time.sleep(0.65)
+    assert dm.get_processed_data("AAPL") is None             # soğuma bitti → tek deneme
+    assert len(calls) == 4 and dm.retry_status()["AAPL"]["attempt"] == 1
+    dm._clear_retry("AAPL")
+
+
+def test_rate_limiter_paces_requests_and_serves_user_lane_first(monkeypatch):
+    import contextlib, threading, time
+
+    monkeypatch.setattr(dm, "_RATE_LIMIT", 20.0)
+    monkeypatch.setattr(dm, "_RATE_BURST", 1)
+    monkeypatch.setattr(dm, "_BUCKET", {"tokens": 0.0, "at": time.monotonic()})
+    monkeypatch.setattr(dm, "_LANE_STATS", {l: {"acquired": 0, "waited": 0, "wait_sec": 0.0,
+                                                "max_wait_sec": 0.0} for l in dm._LANES})
+    order = []
+
+    def take(lane):
+        with dm.background_lane() if lane == "background" else contextlib.nullcontext():
+            dm._acquire(1)
+        order.append(lane)
+
+    t0 = time.monotonic()
+    threads = [threading.Thread(target=take, args=("background",)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    threads.append(threading.Thread(target=take, args=("user",)))
+    threads[-1].start()
+    for t in threads:
+        t.join()
+
+    assert order[0] == "user" and order.count("background") == 3
+    assert time.monotonic() - t0 >= 0.15                      # 4 jeton / 20 s⁻¹
+    lanes = dm.limiter_stats()["lanes"]
+    assert lanes["user"]["acquired"] == 1 and lanes["background"]["acquired"] == 3
+    assert lanes["background"]["max_wait_ms"] >= lanes["user"]["max_wait_ms"] > 0
+    assert lanes["user"]["queued"] == lanes["background"]["queued"] == 0
@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+import backend.data_manager as dm
+import backend.dynamic_trainer as trainer
+
+
+def test_cum_target_sums_forward_log_returns():
+    y = np.array([0.01, -0.02, 0.03, 0.04])
+    np.testing.assert_allclose(trainer._cum_target(y, 1), y)
+    np.testing.assert_allclose(trainer._cum_target(y, 3), [0.02, 0.05, np.nan, np.nan])
+
+
+def test_direct_mode_trains_once_and_serves_every_horizon(monkeypatch, ohlcv):
+    df = dm._features(ohlcv(900, seed=4), "AAPL")
+    monkeypatch.setattr(trainer, "get_processed_data", lambda t, **kw: df)
+    monkeypatch.setattr(trainer, "data_version", lambda t, df=None: "v1")
+    monkeypatch.setattr(trainer, "_MODEL_CACHE", {})
+    monkeypatch.setattr(trainer, "_FORECAST_CACHE", {})
+
+    f90, chart = trainer.train_and_predict_dynamic("AAPL", "LINEAR", [], 90, mode="direct")
+    f7, _ = trainer.train_and_predict_dynamic("AAPL", "LINEAR", [], 7, mode="direct")
+
+    assert len(f90) == 90 and chart["horizon"] == 90
+    assert [k.endswith("|direct") for k in trainer._MODEL_CACHE] == [True]
+    np.testing.assert_allclose(f7, f90[:7])          # 1..7. gün aynı ufuk modellerinden
+
+    rec, _ = trainer.train_and_predict_dynamic("AAPL", "LINEAR", [], 7)
+    assert len(rec) == 7 and len(trainer._MODEL_CACHE) == 2
+
+
+def test_registry_reuses_models_across_restarts_and_prunes_old_versions(monkeypatch, tmp_path, ohlcv):
+    from backend import model_registry as registry
+
+    df = dm._features(ohlcv(700, seed=6), "AAPL")
+    version = {"v": "20260102-0000aaaa"}
+    monkeypatch.setattr(registry, "_MODEL_DIR", str(tmp_path))
+    monkeypatch.setattr(trainer, "get_processed_data", lambda t, **kw: df)
+    monkeypatch.setattr(trainer, "data_version", lambda t, df=None: version["v"])
+    monkeypatch.setattr(trainer, "_MODEL_CACHE", {})
+    monkeypatch.setattr(trainer, "_FORECAST_CACHE", {})
+
+    first, _ = trainer.train_and_predict_dynamic("AAPL", "RANDOM_FOREST", ["RSI", "MACD"], 7)
+    meta = registry.entries()
+    assert [(m["ticker"], m["model_type"], m["groups"], m["data_version"]) for m in meta] == \
+        [("AAPL", "RANDOM_FOREST", ["MACD", "RSI"], "20260102-0000aaaa")]
+    assert set(meta[0]["metrics"]) >= {"rmse", "mae", "hit_rate"}
+
+    # "Yeniden başlatma": bellek boş, eğitim yasak → model diskten gelmeli
+    trainer._MODEL_CACHE.clear(); trainer._FORECAST_CACHE.clear()
+    fit = trainer._fit_estimator
+    monkeypatch.setattr(trainer, "_fit_estimator", lambda *a: pytest.fail("yeniden eğitildi"))
+    again, _ = trainer.train_and_predict_dynamic("AAPL", "RANDOM_FOREST", ["MACD", "RSI"], 7)
+    np.testing.assert_allclose(again, first)
+
+    monkeypatch.setattr(trainer, "_fit_estimator", fit)
+    version["v"] = "20260105-0000bbbb"
+    trainer.train_and_predict_dynamic("AAPL", "LINEAR", ["RSI"], 7)
+    assert {m["data_version"] for m in registry.entries()} == {"20260105-0000bbbb"}
+
+    # Bir bar geride kalan worker'ın kaydı daha yeni sürümü silmez
+    version["v"] = "20260102-0000aaaa"
+    trainer.train_and_predict_dynamic("AAPL", "LINEAR", ["RSI"], 7)
+    assert {m["data_version"] for m in registry.entries()} == \
+        {"20260102-0000aaaa", "20260105-0000bbbb"}
+
+    # Kütüphane sürümü değişince kayıt yüklenmez
+    key = next(m["key"] for m in registry.entries() if m["data_version"] == "20260105-0000bbbb")
+    assert registry.load(key) is not None
+    monkeypatch.setitem(registry._LIB_VERSIONS, "xgboost", "0.0.1")
+    assert registry.load(key) is None
+
+    # Aynı gün düzeltilen kapanış (farklı crc) o günün eski sürümünü de siler
+    version["v"] = "20260105-0000cccc"
+    trainer.train_and_predict_dynamic("AAPL", "LINEAR", ["RSI"], 7)
+    assert {m["data_version"] for m in registry.entries()} == {"20260105-0000cccc"}
+
+
+def test_group_order_does_not_change_feature_columns(monkeypatch, ohlcv):
+    df = dm._features(ohlcv(700, seed=8), "AAPL")
+    monkeypatch.setattr(trainer, "get_processed_data", lambda t, **kw: df)
+    monkeypatch.setattr(trainer, "data_version", lambda t, df=None: "v1")
+    monkeypatch.setattr(trainer, "_MODEL_CACHE", {})
+    monkeypatch.setattr(trainer, "_FORECAST_CACHE", {})
+
+    first, chart = trainer.train_and_predict_dynamic("AAPL", "LINEAR", ["RSI", "MACD"], 7)
+    trainer._FORECAST_CACHE.clear()
+    monkeypatch.setattr(trainer, "_fit_estimator", lambda *a: pytest.fail("yeniden eğitildi"))
+    again, chart2 = trainer.train_and_predict_dynamic("AAPL", "LINEAR", ["MACD", "RSI"], 7)
+
+    np.testing.assert_allclose(again, first)
+    np.testing.assert_allclose(chart2["predicted_prices"], chart["predicted_prices"])
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+import backend.data_manager as dm
+from backend import indicators as ind
+
+
+def test_kernels_match_pandas_rolling_and_ewm():
+    rng = np.random.default_rng(7)
+    x = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 700)))
+    x[0] = np.nan   # lr/diff serilerindeki gibi başta NaN
+    s = pd.Series(x)
+
+    for w in (3, 14, 20, 252):
+        np.testing.assert_allclose(ind.rolling_mean(x, w), s.rolling(w).mean(), rtol=1e-10)
+        np.testing.assert_allclose(ind.rolling_std(x, w), s.rolling(w).std(), rtol=1e-6)
+        np.testing.assert_allclose(ind.rolling_max(x, w), s.rolling(w).max())
+        np.testing.assert_allclose(ind.rolling_min(x, w), s.rolling(w).min())
+    mad = s.rolling(20).apply(lambda a: np.mean(np.abs(a - a.mean())), raw=True)
+    np.testing.assert_allclose(ind.rolling_mad(x, 20), mad, rtol=1e-10)
+
+    y = x[1:]
+    full = pd.Series(y).ewm(span=12, adjust=False, min_periods=1).mean().values
+    np.testing.assert_allclose(ind.ewm(y, 12), full, rtol=1e-12)
+    np.testing.assert_allclose(ind.ewm(y[300:], 12, seed=full[299]), full[300:], rtol=1e-12)
+
+
+def test_indicator_state_streams_rows_identical_to_features(monkeypatch, ohlcv):
+    raw = ohlcv(700, seed=3)
+    full = dm._features(raw.copy(), "AAPL")
+    cols = [c for g in dm.FEATURE_GROUPS.values() for c in g]
+    monkeypatch.setattr(dm, "_MEM_CACHE", {"AAPL": {"df": full, "state": {"raw": raw}}})
+
+    head = full.iloc[:-40]
+    state = dm.indicator_state("AAPL", head)       # son satırdan itibaren devam eder
+    np.testing.assert_allclose(state.row(cols), head[cols].iloc[-1], rtol=1e-7, atol=1e-9)
+
+    for ts in full.index[-40:]:
+        bar = raw.loc[ts]
+        state.push(bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"])
+        np.testing.assert_allclose(state.row(cols), full.loc[ts, cols], rtol=1e-7, atol=1e-9)
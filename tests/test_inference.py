@@ -0,0 +1,44 @@
+import pickle
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+from sklearn.preprocessing import RobustScaler
+
+from backend.inference import compile_predictor
+
+
+def _data(n=400, k=8, seed=5):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(0, 1, (n, k)) * rng.uniform(0.1, 50, k) + rng.normal(0, 10, k)
+    y = np.tanh(X[:, 0] / 20) * 0.02 + rng.normal(0, 0.01, n)
+    return X, y
+
+
+def _models():
+    yield Ridge(alpha=2.0)
+    yield RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)
+    yield GradientBoostingRegressor(n_estimators=30, max_depth=3, random_state=0)
+    try:
+        import xgboost as xgb
+        yield xgb.XGBRegressor(n_estimators=30, max_depth=4, n_jobs=1, verbosity=0)
+    except ImportError:
+        pass
+    try:
+        import lightgbm as lgb
+        yield lgb.LGBMRegressor(n_estimators=30, num_leaves=15, n_jobs=1, verbose=-1)
+    except ImportError:
+        pass
+
+
+@pytest.mark.parametrize("model", list(_models()), ids=lambda m: type(m).__name__)
+def test_compiled_predictor_matches_model_predict(model):
+    X, y = _data()
+    sc = RobustScaler()
+    model.fit(sc.fit_transform(X[:300]), y[:300])
+
+    fast = pickle.loads(pickle.dumps(compile_predictor(model, sc, X[:32])))
+    ref = np.ravel(model.predict(sc.transform(X[300:])))
+    got = np.array([fast(r) for r in X[300:]])
+    np.testing.assert_allclose(got, ref, rtol=1e-5, atol=1e-7)
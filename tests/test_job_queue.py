@@ -0,0 +1,120 @@
+import os
+import subprocess
+import sys
+import time
+
+from werkzeug.security import generate_password_hash
+
+import backend.job_queue as jq
+from app import app, db
+from models import User, Wallet, Prediction
+
+
+def _login(client, email):
+    with app.app_context():
+        user = User.query.filter_by(email=email).first()
+        if not user:
+            user = User(email=email, name="Job Test", password=generate_password_hash("Pass12345"))
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(Wallet(user_id=user.id, balance=5))
+        Wallet.query.filter_by(user_id=user.id).first().balance = 5
+        db.session.commit()
+        uid = user.id
+    client.post("/login", data={"email": email, "password": "Pass12345"})
+    return uid
+
+
+def _wait(client, url, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(url).get_json()
+        if job["state"] in jq.FINISHED:
+            return job
+        time.sleep(0.05)
+    raise AssertionError("job did not finish")
+
+
+def _balance(uid):
+    with app.app_context():
+        return Wallet.query.filter_by(user_id=uid).first().balance
+
+
+def test_predict_run_queues_job_and_debits_only_on_success(monkeypatch):
+    app.config["TESTING"] = True
+    app.config["WTF_CSRF_ENABLED"] = False
+    stages = []
+
+    def fake_train(ticker, model, groups, horizon, mode="recursive", progress=None):
+        for stage, pct in (("data", 0.05), ("training", 0.2), ("forecast", 0.9)):
+            progress(stage, pct)
+            stages.append(stage)
+        if model == "XGBOOST":
+            return None, None
+        return [101.0, 102.5], {"dates": [], "predicted_prices": [101.0, 102.5], "horizon": 7}
+
+    monkeypatch.setattr(jq.trainer, "train_and_predict_dynamic", fake_train)
+
+    with app.test_client() as client:
+        uid = _login(client, "job-queue-test@example.com")
+        with app.app_context():
+            before = Prediction.query.filter_by(user_id=uid).count()
+
+        res = client.post("/api/predict_run", json={"ticker": "AAPL", "model": "LINEAR",
+                                                    "features": [], "horizon": 7})
+        assert res.status_code == 202
+        queued = res.get_json()
+        job = _wait(client, queued["status_url"])
+
+        assert job["state"] == "done" and job["progress"] == 1.0
+        assert job["result"]["prediction"] == 102.5 and job["result"]["balance"] == 4
+        assert stages == ["data", "training", "forecast"]
+        assert _balance(uid) == 4
+        with app.app_context():
+            assert Prediction.query.filter_by(user_id=uid).count() == before + 1
+
+        stream = client.get(queued["stream_url"])
+        assert stream.mimetype == "text/event-stream"
+        assert "event: done" in stream.get_data(as_text=True)
+
+        res = client.post("/api/predict_run", json={"ticker": "AAPL", "model": "XGBOOST",
+                                                    "features": [], "horizon": 7})
+        job = _wait(client, res.get_json()["status_url"])
+        assert job["state"] == "error" and "Prediction failed" in job["error"]
+        assert _balance(uid) == 4                      # failed job is free
+
+    with app.test_client() as other:
+        _login(other, "job-queue-other@example.com")
+        assert other.get(queued["status_url"]).status_code == 404
+
+
+def test_process_pool_runs_a_job_in_a_spawned_child(monkeypatch, tmp_path):
+    monkeypatch.setenv("FINTAP_DATA_PROVIDER", "synthetic")       # inherited by the spawned child
+    monkeypatch.setenv("FINTAP_DATA_DIR", str(tmp_path / "data"))
+    monkeypatch.setattr(jq, "_PROCS", 1)
+    monkeypatch.setattr(jq, "_EXECUTOR", None)
+    monkeypatch.setattr(jq, "_JOB_DIR", str(tmp_path / "jobs"))
+    params = {"ticker": "AAPL", "model": "LINEAR", "features": [], "horizon": 7,
+              "mode": "recursive"}
+    try:
+        rec = jq.submit("proc-test", params,
+                        on_done=lambda preds, chart: {"n": len(preds), "horizon": chart["horizon"]})
+        deadline = time.time() + 120
+        while jq.get(rec["id"])["state"] not in jq.FINISHED and time.time() < deadline:
+            time.sleep(0.1)
+        job = jq.get(rec["id"])
+    finally:
+        jq._EXECUTOR.shutdown(wait=True)
+
+    assert job["state"] == "done", job["error"]
+    assert job["result"] == {"n": 7, "horizon": 7}
+
+
+def test_importing_app_starts_no_background_threads(tmp_path):
+    env = dict(os.environ, FINTAP_WARMUP="1", FINTAP_DATA_DIR=str(tmp_path))
+    code = ("import threading, app; "
+            "print(sorted(t.name for t in threading.enumerate()))")
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                         text=True, timeout=120, cwd=os.path.dirname(os.path.dirname(__file__)))
+    assert out.returncode == 0, out.stderr
+    assert "cache-warmup" not in out.stdout.splitlines()[-1]
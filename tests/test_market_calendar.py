@@ -0,0 +1,31 @@
+from datetime import date, datetime
+
+from backend import market_calendar as cal
+
+
+def test_nyse_holidays_and_early_closes():
+    assert sorted(cal.nyse_holidays(2025)) == [
+        date(2025, 1, 1), date(2025, 1, 20), date(2025, 2, 17), date(2025, 4, 18),
+        date(2025, 5, 26), date(2025, 6, 19), date(2025, 7, 4), date(2025, 9, 1),
+        date(2025, 11, 27), date(2025, 12, 25),
+    ]
+    assert date(2021, 12, 31) not in cal.nyse_holidays(2021)       # 1 Ocak 2022 cumartesi
+    assert date(2026, 7, 3) in cal.nyse_holidays(2026)             # 4 Temmuz cumartesi
+    assert cal.nyse_early_closes(2025) == {date(2025, 7, 3), date(2025, 11, 28), date(2025, 12, 24)}
+
+
+def test_equity_entries_expire_after_next_close():
+    # Piyasa açıkken alınan veri kapanış + yerleşme payına kadar taze (EDT: 20:00 UTC)
+    assert cal.next_equity_bar(datetime(2025, 6, 10, 15, 0)) == datetime(2025, 6, 10, 20, 20)
+    # Şükran Günü → ertesi günün yarım gün kapanışı (13:00 EST = 18:00 UTC)
+    assert cal.next_equity_bar(datetime(2025, 11, 27, 15, 0)) == datetime(2025, 11, 28, 18, 20)
+    # Cuma kapanıştan sonra → pazartesi kapanışı
+    assert cal.next_equity_bar(datetime(2025, 6, 13, 21, 0)) == datetime(2025, 6, 16, 20, 20)
+    assert not cal.market_open(datetime(2025, 12, 25, 16, 0))
+    assert cal.market_open(datetime(2025, 12, 24, 17, 0)) and not cal.market_open(datetime(2025, 12, 24, 18, 5))
+
+
+def test_crypto_entries_roll_hourly_and_at_utc_midnight():
+    assert cal.next_bar_at("BTC-USD", datetime(2025, 6, 14, 10, 0)) == datetime(2025, 6, 14, 11, 0)
+    assert cal.next_bar_at("BTC-USD", datetime(2025, 6, 14, 23, 30)) == datetime(2025, 6, 15, 0, 10)
+    assert cal.next_bar_at("ETH-USD", datetime(2025, 6, 15, 0, 5)) == datetime(2025, 6, 15, 0, 10)